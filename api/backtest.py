@@ -0,0 +1,252 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from api.market_history import day_of, to_ms
+
+# Rule parameters one backtest run takes, with their defaults (prices in cents)
+DEFAULT_PARAMS = {
+    "side": "yes",          # contract bought: "yes" or "no"
+    "entry_below": 40,      # buy when the ask is at or below this...
+    "entry_above": 1,       # ...and at or above this
+    "target": 10,           # take profit once the bid is this far above the entry
+    "stop_loss": 5,         # cut the position once the bid is this far below the entry
+    "max_hold": None,       # seconds before the position is closed regardless
+    "contracts": 1,
+}
+
+MAX_PARAM_SETS = int(os.getenv("BACKTEST_MAX_PARAM_SETS", 200))
+WORKERS = int(os.getenv("BACKTEST_WORKERS", 0)) or os.cpu_count() or 1
+# Largest panel (time steps x tickers) one run may build; each cell costs ~13 bytes across the matrices
+MAX_CELLS = int(os.getenv("BACKTEST_MAX_CELLS", 20_000_000))
+
+
+class PanelTooLarge(ValueError):
+    pass
+
+
+class Panel:
+    """Yes bid/ask of many tickers on a regular time grid, as (steps, tickers) matrices.
+
+    0 means no quote. Built from change-only history records by bucketing
+    them into `step_ms` slots and forward-filling each ticker's last quote.
+    """
+
+    def __init__(self, tickers: list, ts_ms, yes_bid, yes_ask, step_ms: int):
+        self.tickers = tickers
+        self.ts_ms = ts_ms
+        self.yes_bid = yes_bid
+        self.yes_ask = yes_ask
+        self.step_ms = step_ms
+
+    @property
+    def shape(self):
+        return self.yes_bid.shape
+
+    @classmethod
+    def from_records(cls, records, names: list, step_ms: int, start_ms: int = None, tickers=None, max_cells: int = None):
+        """Panel over `records` (MarketHistory rows); `names[ticker_id]` is the ticker.
+
+        Raises PanelTooLarge before allocating anything when the panel would
+        exceed `max_cells` (default BACKTEST_MAX_CELLS) steps x tickers.
+        """
+        import numpy as np  # deferred: only backtests need it, and it is slow to import
+
+        if tickers is not None:
+            tickers = set(tickers)
+            wanted = [i for i, name in enumerate(names) if name in tickers]
+            records = records[np.isin(records["ticker_id"], wanted)]
+        if not len(records):
+            empty = np.zeros((0, 0), dtype=np.int32)
+            return cls([], np.empty(0, dtype=np.int64), empty, empty, step_ms)
+
+        ids, col = np.unique(records["ticker_id"], return_inverse=True)
+        bucket = records["ts_ms"] // step_ms
+        first = int(bucket[0])
+        row = bucket - first
+        steps, width = int(row[-1]) + 1, len(ids)
+        max_cells = max_cells or MAX_CELLS
+        if steps * width > max_cells:
+            raise PanelTooLarge(f"{steps} steps x {width} tickers exceeds the {max_cells} cell limit; "
+                                f"narrow start/end or tickers, or raise step_seconds")
+
+        # Last record per (slot, ticker): records are in time order, so take first occurrences of the reversed keys
+        key = row * width + col
+        _, from_end = np.unique(key[::-1], return_index=True)
+        last = len(key) - 1 - from_end
+
+        have = np.zeros((steps, width), dtype=bool)
+        bid = np.zeros((steps, width), dtype=np.int32)
+        ask = np.zeros((steps, width), dtype=np.int32)
+        have[row[last], col[last]] = True
+        bid[row[last], col[last]] = records["yes_bid"][last]
+        ask[row[last], col[last]] = records["yes_ask"][last]
+
+        # Forward fill: every cell points at the latest slot with a record for its ticker
+        source = np.where(have, np.arange(steps)[:, None], 0)
+        np.maximum.accumulate(source, axis=0, out=source)
+        columns = np.arange(width)
+        bid, ask = bid[source, columns], ask[source, columns]
+
+        ts_ms = (first + np.arange(steps, dtype=np.int64)) * step_ms
+        skip = int(np.searchsorted(ts_ms, start_ms - start_ms % step_ms)) if start_ms is not None else 0
+        return cls([names[i] for i in ids.tolist()], ts_ms[skip:], bid[skip:], ask[skip:], step_ms)
+
+    @classmethod
+    def from_history(cls, history, start=None, end=None, step_seconds: int = 60, tickers=None, max_cells: int = None):
+        """Panel from a MarketHistory, reading from the start of `start`'s day so every quote is known."""
+        start_ms = to_ms(start)
+        day_start = f"{day_of(start_ms)}T00:00:00Z" if start_ms is not None else None
+        records = history.scan(day_start, end)
+        return cls.from_records(records, history.tickers, int(step_seconds * 1000), start_ms, tickers, max_cells)
+
+
+def backtest(panel: Panel, params: dict = None, slippage: int = 0, fee: int = 0) -> dict:
+    """Replay `panel` with one set of entry/exit rules over every ticker at once.
+
+    Steps through time; each step is a handful of NumPy operations across
+    all tickers. Entries fill at the ask and exits at the bid (the simple
+    book: top of book with unlimited size), each `slippage` cents worse,
+    and every fill pays `fee` cents per contract. At most one position per
+    ticker; positions still open at the end are closed at the last bid.
+    All money is in cents.
+    """
+    import numpy as np
+
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    steps, width = panel.shape
+    if p["side"] == "no":
+        ask = np.where(panel.yes_bid > 0, 100 - panel.yes_bid, 0)
+        bid = np.where(panel.yes_ask > 0, 100 - panel.yes_ask, 0)
+    elif p["side"] == "yes":
+        ask, bid = panel.yes_ask, panel.yes_bid
+    else:
+        raise ValueError(f"Unsupported side: {p['side']}")
+    contracts = int(p["contracts"])
+    max_hold = int(p["max_hold"] * 1000 // panel.step_ms) if p["max_hold"] else None
+
+    holding = np.zeros(width, dtype=bool)
+    entry = np.zeros(width, dtype=np.int64)
+    entered_at = np.zeros(width, dtype=np.int64)
+    mark = np.zeros(width, dtype=np.int64)
+    realized = 0
+    trades = wins = 0
+    equity = np.zeros(steps, dtype=np.int64)
+
+    for t in range(steps):
+        b, a = bid[t], ask[t]
+        quoted = (a > 0) & (b > 0)
+        np.copyto(mark, b, where=quoted & holding)
+
+        exit_now = holding & quoted & ((b >= entry + p["target"]) | (b <= entry - p["stop_loss"]))
+        if max_hold is not None:
+            exit_now |= holding & quoted & (t - entered_at >= max_hold)
+        if exit_now.any():
+            pnl = (b[exit_now] - slippage - entry[exit_now]) * contracts - 2 * fee * contracts
+            realized += int(pnl.sum())
+            trades += len(pnl)
+            wins += int((pnl > 0).sum())
+            holding &= ~exit_now
+
+        enter = ~holding & ~exit_now & quoted & (a <= p["entry_below"]) & (a >= p["entry_above"])
+        if enter.any():
+            entry[enter] = a[enter] + slippage
+            mark[enter] = b[enter]
+            entered_at[enter] = t
+            holding |= enter
+
+        equity[t] = realized + int(((mark - entry) * holding).sum()) * contracts - int(holding.sum()) * fee * contracts
+
+    if holding.any():  # close out at the last known bid
+        pnl = (mark[holding] - slippage - entry[holding]) * contracts - 2 * fee * contracts
+        realized += int(pnl.sum())
+        trades += len(pnl)
+        wins += int((pnl > 0).sum())
+
+    # Peak-to-trough of the equity curve, which starts at 0
+    drawdown = int((np.maximum(np.maximum.accumulate(equity), 0) - equity).max()) if steps else 0
+    return {
+        "params": p,
+        "pnl_cents": realized,
+        "trades": trades,
+        "wins": wins,
+        "hit_rate": wins / trades if trades else None,
+        "avg_pnl_cents": realized / trades if trades else None,
+        "max_drawdown_cents": drawdown,
+    }
+
+
+def _spawn_pool(workers: int) -> ProcessPoolExecutor:
+    # Spawned, not forked: the app has threads running
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class BacktestPool:
+    """Worker processes shared by every backtest request, shut down with the app.
+
+    Spawned on first use rather than at start-up, so apps that never run a
+    backtest don't pay for them.
+    """
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or WORKERS
+        self._pool = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = _spawn_pool(self.workers)
+        return self._pool
+
+    async def start(self):
+        pass
+
+    async def aclose(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+
+def _run_chunk(args) -> list:
+    panel, param_sets, slippage, fee = args
+    return [backtest(panel, params, slippage, fee) for params in param_sets]
+
+
+def run_many(panel: Panel, param_sets: list, slippage: int = 0, fee: int = 0, workers: int = None,
+             pool: BacktestPool = None) -> list:
+    """`backtest` for each parameter set, on a process pool when there is more than one.
+
+    Parameter sets are split into one contiguous chunk per worker, so the
+    panel is pickled once per worker rather than once per set. Uses `pool`
+    when given, otherwise a pool just for this call.
+    """
+    if len(param_sets) > MAX_PARAM_SETS:
+        raise ValueError(f"At most {MAX_PARAM_SETS} parameter sets per run")
+    workers = min(workers or (pool.workers if pool else WORKERS), len(param_sets))
+    if workers <= 1:
+        return [backtest(panel, params, slippage, fee) for params in param_sets]
+    size = -(-len(param_sets) // workers)
+    chunks = [(panel, param_sets[i:i + size], slippage, fee) for i in range(0, len(param_sets), size)]
+    if pool is not None:
+        return [r for chunk in pool.pool.map(_run_chunk, chunks) for r in chunk]
+    with _spawn_pool(workers) as own:
+        return [r for chunk in own.map(_run_chunk, chunks) for r in chunk]
+
+
+def run_backtest(history, param_sets: list, start=None, end=None, step_seconds: int = 60, tickers=None,
+                 slippage: int = 0, fee: int = 0, workers: int = None, pool: BacktestPool = None) -> dict:
+    started = time.perf_counter()
+    panel = Panel.from_history(history, start, end, step_seconds, tickers)
+    loaded = time.perf_counter()
+    results = run_many(panel, param_sets or [{}], slippage, fee, workers, pool)
+    best = max(range(len(results)), key=lambda i: results[i]["pnl_cents"]) if results else None
+    return {
+        "results": results,
+        "best": best,
+        "tickers": len(panel.tickers),
+        "steps": panel.shape[0],
+        "load_ms": round((loaded - started) * 1000, 1),
+        "run_ms": round((time.perf_counter() - loaded) * 1000, 1),
+    }
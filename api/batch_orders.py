@@ -0,0 +1,52 @@
+import asyncio
+
+# Kalshi's batched order endpoints accept at most 20 orders per call
+MAX_BATCH_LEGS = 20
+
+SIDES = ("yes", "no")
+ACTIONS = ("buy", "sell")
+ORDER_TYPES = ("limit", "market")
+
+
+def validate_order(req) -> str:
+    """Reason the order can't be sent, or None if it looks valid."""
+    if not req.ticker:
+        return "ticker is required"
+    if req.side not in SIDES:
+        return f"side must be one of {SIDES}"
+    if req.action not in ACTIONS:
+        return f"action must be one of {ACTIONS}"
+    if req.order_type not in ORDER_TYPES:
+        return f"type must be one of {ORDER_TYPES}"
+    if req.count <= 0:
+        return "count must be positive"
+    if not 1 <= req.price <= 99:
+        return "price must be between 1 and 99 cents"
+    return None
+
+
+def order_payload(req, client_order_id: str) -> dict:
+    return {
+        "ticker": req.ticker,
+        "side": req.side,
+        "count": req.count,
+        "type": req.order_type,
+        "action": req.action,
+        "yes_price": req.price,
+        "client_order_id": client_order_id,
+    }
+
+
+async def run_bounded(items, fn, concurrency: int) -> list:
+    """`await fn(item)` for every item, at most `concurrency` at a time.
+
+    Results come back in input order; an exception from one item is returned
+    in its slot instead of cancelling the others.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(item):
+        async with semaphore:
+            return await fn(item)
+
+    return await asyncio.gather(*(one(item) for item in items), return_exceptions=True)
@@ -0,0 +1,103 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import orjson
+from starlette.responses import Response
+
+
+def fingerprint(key: str, item) -> int:
+    """Stable 64-bit hash of one item (same value in every process, unlike `hash()`)."""
+    data = key.encode() + b"\x00" + orjson.dumps(item, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class DeltaLog:
+    """Versioned view of a keyed collection for conditional GETs and `?since=` deltas.
+
+    `update(items)` moves to a new version only when an item was added,
+    changed or removed. Per-item fingerprints of the last `history` versions
+    are kept (not the items themselves), so `diff(since)` can list what
+    changed against any recent version while only the current items stay in
+    memory. Versions and ETags are both derived from content, not counted,
+    so every instance (worker, serverless copy) serving the same data hands
+    out the same ones; a `since` an instance never saw simply gets the full
+    response. Versions are opaque ids below 2**53 (safe as JSON numbers) and
+    do not order. The ETag is weak (`W/"..."`): the same version is served
+    identity, gzip or brotli encoded, and those bodies differ byte for byte.
+    """
+
+    def __init__(self, key: str = "ticker", history: int = None):
+        self.key = key
+        self.history = history or int(os.getenv("DELTA_HISTORY_VERSIONS", 32))
+        self.version = 0
+        self.items = {}
+        self.extra = None
+        self.etag = 'W/"empty"'
+        self._fingerprints = OrderedDict()   # version -> {key: fingerprint}, oldest first
+        self._extra_fingerprint = None
+
+    def update(self, items, extra=None) -> int:
+        """Record the current items; `extra` is any JSON that is versioned but not diffed."""
+        current = {}
+        by_key = {}
+        for item in items:
+            k = str(item.get(self.key))
+            current[k] = fingerprint(k, item)
+            by_key[k] = item
+        extra_fingerprint = fingerprint("", extra) if extra is not None else None
+        self.items = by_key
+        self.extra = extra
+        if current == self._fingerprints.get(self.version) and extra_fingerprint == self._extra_fingerprint:
+            return self.version
+
+        combined = extra_fingerprint or 0
+        for value in current.values():
+            combined ^= value
+        self.version = fingerprint("version", [combined, len(current)]) & (2 ** 53 - 1)
+        self._fingerprints.pop(self.version, None)   # content seen before: it is the newest again
+        self._fingerprints[self.version] = current
+        self._extra_fingerprint = extra_fingerprint
+        while len(self._fingerprints) > self.history:
+            self._fingerprints.popitem(last=False)
+        self.etag = f'W/"{combined:016x}-{len(current)}"'
+        return self.version
+
+    def diff(self, since: int) -> dict:
+        """Items added or changed and keys removed since `since`, or None if that version is gone."""
+        old = self._fingerprints.get(since)
+        if old is None:
+            return None
+        current = self._fingerprints.get(self.version, {})
+        changed = [self.items[k] for k, value in current.items() if old.get(k) != value]
+        removed = [k for k in old if k not in current]
+        return {"version": self.version, "since": since, "changed": changed, "removed": removed}
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "etag": self.etag,
+            "items": len(self.items),
+            "versions_kept": list(self._fingerprints),
+        }
+
+
+def etag_matches(request, etag: str) -> bool:
+    """True when the request's If-None-Match covers `etag` (weak comparison)."""
+    header = request.headers.get("if-none-match") if request is not None else None
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=conditional_headers(etag))
+
+
+def conditional_headers(etag: str) -> dict:
+    # no-cache: browsers keep the body but revalidate (If-None-Match) on every poll.
+    # Vary: the body may be compressed, so caches must key it by Accept-Encoding.
+    return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
@@ -0,0 +1,621 @@
+import asyncio
+import math
+import os
+import random
+import re
+import time
+from array import array
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from itertools import count
+
+import httpx
+import orjson
+
+from api.portfolio import PAYOUT, Portfolio
+
+MAX_PRICE = 99
+# Order owners: the simulated account, and the synthetic liquidity around it
+MEMBER = "member"
+MAKER = "maker"
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+# Fill tuples as kept on the hot path; turned into dicts only when served
+FILL_FIELDS = ("trade_id", "order_id", "ticker", "side", "action", "count", "yes_price", "is_taker", "created_time")
+
+
+class SimError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+    def to_dict(self) -> dict:
+        return {"error": {"code": self.code, "message": str(self)}}
+
+
+def _int_param(value, name: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise SimError(400, "invalid_parameters", f"{name} must be an integer") from None
+
+
+class SimOrder:
+    __slots__ = ("order_id", "client_order_id", "ticker", "side", "action", "order_type", "buy", "limit",
+                 "count", "remaining", "filled", "status", "owner", "unit_cost", "created_time")
+
+    def __init__(self, order_id, client_order_id, ticker, side, action, order_type, buy, limit, count, owner,
+                 unit_cost=0, created_time=None):
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.ticker = ticker
+        self.side = side
+        self.action = action
+        self.order_type = order_type
+        self.buy = buy              # buys YES in book terms: buy YES or sell NO
+        self.limit = limit          # YES price in cents
+        self.count = count
+        self.remaining = count      # 0 once executed or canceled; dead orders are skipped in the book
+        self.filled = 0             # tracked for member orders only
+        self.status = "resting"
+        self.owner = owner
+        self.unit_cost = unit_cost  # cash held back per unfilled contract of a buy
+        self.created_time = created_time  # epoch seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "order_id": self.order_id,
+            "client_order_id": self.client_order_id,
+            "ticker": self.ticker,
+            "side": self.side,
+            "action": self.action,
+            "type": self.order_type,
+            "status": self.status,
+            "yes_price": self.limit,
+            "no_price": PAYOUT - self.limit,
+            "count": self.count,
+            "remaining_count": self.remaining,
+            "fill_count": self.filled,
+            "created_time": _iso(self.created_time) if self.created_time else None,
+        }
+
+
+class SimBook:
+    """Price-time priority book for one binary market, in YES terms.
+
+    Buying YES and selling NO are bids; selling YES and buying NO are asks
+    at 100 minus the NO price. Each of the 99 price levels is a FIFO deque
+    with its resting quantity in a typed array, and the best bid/ask are
+    kept as indexes, so matching touches only the levels it trades through.
+    Cancels zero the order in place; the matcher drops dead orders when it
+    reaches them.
+    """
+
+    __slots__ = ("ticker", "bids", "asks", "bid_qty", "ask_qty", "best_bid", "best_ask", "last_price", "volume")
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.bids = [deque() for _ in range(MAX_PRICE + 1)]
+        self.asks = [deque() for _ in range(MAX_PRICE + 1)]
+        self.bid_qty = array("q", [0] * (MAX_PRICE + 2))
+        self.ask_qty = array("q", [0] * (MAX_PRICE + 2))
+        self.best_bid = 0             # 0: no bids
+        self.best_ask = MAX_PRICE + 1  # 100: no asks
+        self.last_price = 0
+        self.volume = 0
+
+    def rest(self, order: SimOrder):
+        price = order.limit
+        if order.buy:
+            self.bids[price].append(order)
+            self.bid_qty[price] += order.remaining
+            if price > self.best_bid:
+                self.best_bid = price
+        else:
+            self.asks[price].append(order)
+            self.ask_qty[price] += order.remaining
+            if price < self.best_ask:
+                self.best_ask = price
+
+    def remove(self, order: SimOrder) -> int:
+        """Take a resting order's remaining quantity off the book (lazily)."""
+        reduced = order.remaining
+        price = order.limit
+        order.remaining = 0
+        if order.buy:
+            self.bid_qty[price] -= reduced
+            if not self.bid_qty[price]:
+                self.bids[price].clear()
+                if price == self.best_bid:
+                    self.best_bid = self._next_bid(price)
+        else:
+            self.ask_qty[price] -= reduced
+            if not self.ask_qty[price]:
+                self.asks[price].clear()
+                if price == self.best_ask:
+                    self.best_ask = self._next_ask(price)
+        return reduced
+
+    def _next_bid(self, price: int) -> int:
+        qty = self.bid_qty
+        price -= 1
+        while price > 0 and not qty[price]:
+            price -= 1
+        return price
+
+    def _next_ask(self, price: int) -> int:
+        qty = self.ask_qty
+        price += 1
+        while price <= MAX_PRICE and not qty[price]:
+            price += 1
+        return price
+
+    def match(self, order: SimOrder, on_fill):
+        """Fill `order` against the opposite side up to its limit; `on_fill(taker, maker, qty, price)` per fill."""
+        if order.buy:
+            levels, qty, limit = self.asks, self.ask_qty, order.limit
+            while order.remaining and self.best_ask <= limit:
+                price = self.best_ask
+                self._take(order, levels[price], qty, price, on_fill)
+                if not qty[price]:
+                    levels[price].clear()
+                    self.best_ask = self._next_ask(price)
+        else:
+            levels, qty, limit = self.bids, self.bid_qty, order.limit
+            while order.remaining and self.best_bid >= limit:
+                price = self.best_bid
+                self._take(order, levels[price], qty, price, on_fill)
+                if not qty[price]:
+                    levels[price].clear()
+                    self.best_bid = self._next_bid(price)
+
+    def _take(self, order, level: deque, qty, price: int, on_fill):
+        while order.remaining and level:
+            maker = level[0]
+            if not maker.remaining:
+                level.popleft()
+                continue
+            filled = order.remaining if order.remaining < maker.remaining else maker.remaining
+            order.remaining -= filled
+            maker.remaining -= filled
+            qty[price] -= filled
+            if not maker.remaining:
+                level.popleft()
+            self.last_price = price
+            self.volume += filled
+            on_fill(order, maker, filled, price)
+
+    def depth(self) -> dict:
+        """Kalshi-style book: YES bids and NO bids as ascending [price, quantity] lists."""
+        yes = [[p, self.bid_qty[p]] for p in range(1, MAX_PRICE + 1) if self.bid_qty[p]]
+        no = [[PAYOUT - p, self.ask_qty[p]] for p in range(MAX_PRICE, 0, -1) if self.ask_qty[p]]
+        return {"yes": yes or None, "no": no or None}
+
+
+class Exchange:
+    """In-process stand-in for the Kalshi exchange, for paper trading and load tests.
+
+    Holds a `SimBook` per synthetic market, the simulated account's orders,
+    fills and positions (a `Portfolio`), and a cash balance from which open
+    buy orders are held back. Sells are limited to contracts held and not
+    already committed to open sells; there is no short selling. `step()` moves every market's fair value by a
+    random walk in log-odds space, re-quotes the synthetic market maker
+    around it and sends some random taker flow, so resting orders fill as
+    the market moves. With `tick_interval`, `start()` runs `step()` in the
+    background. Serve it over HTTP semantics with `ExchangeTransport`.
+    """
+
+    def __init__(self, markets: int = 200, balance: int = 1_000_000, tick_interval: float = 1.0, seed: int = None,
+                 volatility: float = 0.05, spread: int = 2, depth: int = 3, taker_rate: float = 0.2,
+                 history: int = 10_000):
+        self.rng = random.Random(seed)
+        self.starting_balance = balance
+        self.tick_interval = tick_interval
+        self.volatility = volatility
+        self.spread = max(1, spread)
+        self.depth = depth
+        self.taker_rate = taker_rate
+
+        self.books = {}
+        self.markets = {}
+        self.log_odds = {}
+        self._quotes = {}                 # ticker -> market maker orders currently resting
+        self.orders = {}                  # open member orders by id
+        self.finished = OrderedDict()     # recent closed member orders
+        self.fills = deque(maxlen=history)
+        self.history = history
+        self.portfolio = Portfolio()
+        self.held = 0                     # cash reserved for open buy orders
+        self.selling = {}                 # (ticker, side) -> contracts in open sell orders
+        self._ids = count(1)
+        self._task = None
+
+        # Counters
+        self.orders_placed = 0
+        self.orders_rejected = 0
+        self.orders_canceled = 0
+        self.fill_count = 0
+        self.steps = 0
+
+        close = int(time.time()) + 30 * 86400
+        for i in range(markets):
+            ticker = f"SIM-{i:05d}"
+            self.books[ticker] = SimBook(ticker)
+            self.markets[ticker] = {
+                "ticker": ticker,
+                "event_ticker": f"SIMEV-{i // 4:04d}",
+                "title": f"Simulated market {i}",
+                "category": ("Crypto", "Economics", "Politics", "Weather", "Sports")[i % 5],
+                "status": "open",
+                "close_time": datetime.fromtimestamp(close + i * 3600, timezone.utc).isoformat().replace("+00:00", "Z"),
+            }
+            self.log_odds[ticker] = self.rng.uniform(-2.5, 2.5)
+            self._quotes[ticker] = []
+        self.step()
+
+    @classmethod
+    def from_env(cls):
+        seed = os.getenv("SIM_SEED")
+        return cls(
+            markets=int(os.getenv("SIM_MARKETS", 200)),
+            balance=int(os.getenv("SIM_BALANCE_CENTS", 1_000_000)),
+            tick_interval=float(os.getenv("SIM_TICK_SECONDS", 1.0)),
+            seed=int(seed) if seed else None,
+            volatility=float(os.getenv("SIM_VOLATILITY", 0.05)),
+            taker_rate=float(os.getenv("SIM_TAKER_RATE", 0.2)),
+        )
+
+    # Orders
+
+    def balance(self) -> int:
+        """Cash in cents: starting balance + realised P&L - fees - cost of open positions."""
+        p = self.portfolio
+        return self.starting_balance + p.realized - p.fees - p.exposure
+
+    def place(self, payload: dict) -> SimOrder:
+        """Submit an order for the simulated account, from a Kalshi create-order payload."""
+        ticker = payload.get("ticker")
+        book = self.books.get(ticker)
+        side, action = payload.get("side"), payload.get("action", "buy")
+        order_type = payload.get("type", "limit")
+        contracts = payload.get("count")
+        try:
+            if book is None:
+                raise SimError(404, "market_not_found", f"No market {ticker}")
+            if side not in ("yes", "no") or action not in ("buy", "sell") or order_type not in ("limit", "market"):
+                raise SimError(400, "invalid_parameters", "side, action or type is invalid")
+            if not isinstance(contracts, int) or contracts <= 0:
+                raise SimError(400, "invalid_parameters", "count must be a positive integer")
+            buy = (side == "yes") == (action == "buy")
+            if payload.get("yes_price") is not None:
+                limit = _int_param(payload["yes_price"], "yes_price")
+            elif payload.get("no_price") is not None:
+                limit = PAYOUT - _int_param(payload["no_price"], "no_price")
+            elif order_type == "market":
+                limit = MAX_PRICE if buy else 1
+            else:
+                raise SimError(400, "invalid_parameters", "yes_price or no_price is required for limit orders")
+            if not 1 <= limit <= MAX_PRICE:
+                raise SimError(400, "invalid_parameters", "price must be between 1 and 99 cents")
+            unit_cost = 0
+            if action == "buy":
+                unit_cost = limit if side == "yes" else PAYOUT - limit
+                if contracts * unit_cost > self.balance() - self.held:
+                    raise SimError(400, "insufficient_balance", "Insufficient balance for this order")
+            elif contracts > self._sellable(ticker, side):
+                # No short selling: selling what isn't held would open the other side without cash behind it
+                raise SimError(400, "insufficient_position", f"Not enough {side.upper()} contracts held to sell")
+        except SimError:
+            self.orders_rejected += 1
+            raise
+
+        order = SimOrder(f"sim-{next(self._ids)}", payload.get("client_order_id"), ticker, side, action, order_type,
+                         buy, limit, contracts, MEMBER, unit_cost, time.time())
+        self.held += contracts * unit_cost
+        if action == "sell":
+            self.selling[ticker, side] = self.selling.get((ticker, side), 0) + contracts
+        self.orders[order.order_id] = order
+        self.orders_placed += 1
+        self._execute(book, order)
+        return order
+
+    def _sellable(self, ticker: str, side: str) -> int:
+        """Contracts of `side` held and not already committed to open sell orders."""
+        h = self.portfolio.holdings.get(ticker)
+        held = 0 if h is None else (h.position if side == "yes" else -h.position)
+        return max(0, held) - self.selling.get((ticker, side), 0)
+
+    def _release(self, order: SimOrder, contracts: int):
+        """Free what `contracts` unfilled contracts of a member order had reserved."""
+        if order.action == "buy":
+            self.held -= contracts * order.unit_cost
+        else:
+            self.selling[order.ticker, order.side] -= contracts
+
+    def _execute(self, book: SimBook, order: SimOrder):
+        book.match(order, self._on_fill)
+        if not order.remaining:
+            self._close(order, "executed")
+        elif order.order_type == "market":
+            self._close(order, "canceled")  # immediate-or-cancel remainder
+        else:
+            book.rest(order)
+
+    def cancel(self, order_id: str):
+        """Cancel a resting member order; returns (order, contracts canceled)."""
+        order = self.orders.get(order_id)
+        if order is None:
+            raise SimError(404, "not_found", f"No resting order {order_id}")
+        reduced = self.books[order.ticker].remove(order)
+        self._release(order, reduced)
+        order.status = "canceled"
+        self._retire(order)
+        self.orders_canceled += 1
+        return order, reduced
+
+    def _close(self, order: SimOrder, status: str):
+        if order.owner is not MEMBER:
+            return
+        self._release(order, order.remaining)
+        order.remaining = 0
+        order.status = status
+        self._retire(order)
+
+    def _retire(self, order: SimOrder):
+        self.orders.pop(order.order_id, None)
+        self.finished[order.order_id] = order
+        if len(self.finished) > self.history:
+            self.finished.popitem(last=False)
+
+    def _on_fill(self, taker: SimOrder, maker: SimOrder, qty: int, price: int):
+        if taker.owner is MEMBER:
+            self._member_fill(taker, qty, price, True)
+        if maker.owner is MEMBER:
+            self._member_fill(maker, qty, price, False)
+            if not maker.remaining:
+                self._close(maker, "executed")
+
+    def _member_fill(self, order: SimOrder, qty: int, price: int, is_taker: bool):
+        side_price = price if order.side == "yes" else PAYOUT - price
+        self._release(order, qty)
+        order.filled += qty
+        self.portfolio.apply_fill(order.ticker, order.side, order.action, qty, side_price)
+        self.fill_count += 1
+        self.fills.append((self.fill_count, order.order_id, order.ticker, order.side, order.action, qty, price,
+                           is_taker, time.time()))
+
+    # Synthetic market
+
+    def step(self):
+        """Move every market once: fair value random walk, market maker re-quote, random taker flow."""
+        rng = self.rng
+        for ticker, book in self.books.items():
+            x = max(-4.5, min(4.5, self.log_odds[ticker] + rng.gauss(0, self.volatility)))
+            self.log_odds[ticker] = x
+            fair = PAYOUT / (1 + math.exp(-x))
+            self._requote(book, fair)
+            if rng.random() < self.taker_rate:
+                buy = rng.random() < 0.5
+                self._maker_order(book, buy, MAX_PRICE if buy else 1, rng.randint(1, 50), rest=False)
+        self.steps += 1
+
+    def _requote(self, book: SimBook, fair: float):
+        quotes = self._quotes[book.ticker]
+        for order in quotes:
+            if order.remaining:
+                book.remove(order)
+        quotes.clear()
+        bid = max(1, min(MAX_PRICE - self.spread, int(fair - self.spread / 2)))
+        ask = bid + self.spread
+        rng = self.rng
+        for level in range(self.depth):
+            if bid - level >= 1:
+                quotes.append(self._maker_order(book, True, bid - level, rng.randint(10, 200)))
+            if ask + level <= MAX_PRICE:
+                quotes.append(self._maker_order(book, False, ask + level, rng.randint(10, 200)))
+
+    def _maker_order(self, book: SimBook, buy: bool, limit: int, contracts: int, rest: bool = True) -> SimOrder:
+        order = SimOrder(None, None, book.ticker, "yes", "buy" if buy else "sell", "limit", buy, limit, contracts, MAKER)
+        book.match(order, self._on_fill)
+        if order.remaining and rest:
+            book.rest(order)
+        return order
+
+    async def start(self):
+        if self.tick_interval and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.step()
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # Views
+
+    def market(self, ticker: str) -> dict:
+        book = self.books[ticker]
+        yes_bid = book.best_bid
+        yes_ask = book.best_ask if book.best_ask <= MAX_PRICE else 0
+        return {
+            **self.markets[ticker],
+            "yes_bid": yes_bid,
+            "yes_ask": yes_ask,
+            "no_bid": PAYOUT - yes_ask if yes_ask else 0,
+            "no_ask": PAYOUT - yes_bid if yes_bid else 0,
+            "last_price": book.last_price,
+            "volume": book.volume,
+            "volume_24h": book.volume,
+        }
+
+    def recent_fills(self, limit: int = 100) -> list:
+        """The account's last `limit` fills, newest first, as Kalshi fill objects."""
+        fills = []
+        for fill in list(self.fills)[-limit:][::-1]:
+            f = dict(zip(FILL_FIELDS, fill))
+            f["trade_id"] = f"fill-{f['trade_id']}"
+            f["no_price"] = PAYOUT - f["yes_price"]
+            f["created_time"] = _iso(f["created_time"])
+            fills.append(f)
+        return fills
+
+    def positions(self) -> list:
+        resting = {}
+        for order in self.orders.values():
+            resting[order.ticker] = resting.get(order.ticker, 0) + 1
+        return [{
+            "ticker": h.ticker,
+            "position": h.position,
+            "market_exposure": h.exposure,
+            "realized_pnl": h.realized,
+            "fees_paid": h.fees,
+            "resting_orders_count": resting.get(h.ticker, 0),
+        } for h in self.portfolio.holdings.values()]
+
+    def stats(self) -> dict:
+        return {
+            "markets": len(self.books),
+            "steps": self.steps,
+            "balance_cents": self.balance(),
+            "held_for_orders_cents": self.held,
+            "open_orders": len(self.orders),
+            "orders_placed": self.orders_placed,
+            "orders_rejected": self.orders_rejected,
+            "orders_canceled": self.orders_canceled,
+            "fills": self.fill_count,
+        }
+
+
+class ExchangeTransport(httpx.AsyncBaseTransport):
+    """httpx transport answering the Kalshi REST endpoints the apps use from an `Exchange`.
+
+    Set as `KalshiClient.transport` so every upstream call is served in
+    process, with no network and no credentials. Paths are matched after
+    `/trade-api/v2`, whatever host the base URL names.
+    """
+
+    def __init__(self, exchange: Exchange):
+        self.exchange = exchange
+        self.routes = [
+            ("GET", re.compile(r"/markets"), self.list_markets),
+            ("GET", re.compile(r"/markets/(?P<ticker>[^/]+)"), self.get_market),
+            ("GET", re.compile(r"/markets/(?P<ticker>[^/]+)/orderbook"), self.get_orderbook),
+            ("POST", re.compile(r"/portfolio/orders"), self.create_order),
+            ("POST", re.compile(r"/portfolio/orders/batched"), self.create_orders),
+            ("DELETE", re.compile(r"/portfolio/orders/batched"), self.cancel_orders),
+            ("GET", re.compile(r"/portfolio/orders"), self.list_orders),
+            ("GET", re.compile(r"/portfolio/orders/(?P<order_id>[^/]+)"), self.get_order),
+            ("DELETE", re.compile(r"/portfolio/orders/(?P<order_id>[^/]+)"), self.cancel_order),
+            ("GET", re.compile(r"/portfolio/positions"), self.get_positions),
+            ("GET", re.compile(r"/portfolio/fills"), self.get_fills),
+            ("GET", re.compile(r"/portfolio/balance"), self.get_balance),
+            ("POST", re.compile(r"/log_in"), self.log_in),
+        ]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        path = request.url.path
+        prefix = path.find("/trade-api/v2")
+        if prefix >= 0:
+            path = path[prefix + len("/trade-api/v2"):]
+        path = path.rstrip("/")
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path) if method == request.method else None
+            if match:
+                try:
+                    status, body = handler(request, **match.groupdict())
+                except SimError as e:
+                    status, body = e.status, e.to_dict()
+                return httpx.Response(status, content=orjson.dumps(body), headers={"Content-Type": "application/json"})
+        return httpx.Response(404, json={"error": {"code": "not_found", "message": f"{request.method} {path}"}})
+
+    @staticmethod
+    def _json(request) -> dict:
+        try:
+            return orjson.loads(request.content) if request.content else {}
+        except orjson.JSONDecodeError:
+            raise SimError(400, "invalid_parameters", "Request body is not valid JSON") from None
+
+    def list_markets(self, request):
+        params = request.url.params
+        limit = max(1, min(_int_param(params.get("limit", 100), "limit"), 1000))
+        start = _int_param(params.get("cursor") or 0, "cursor")
+        tickers = list(self.exchange.books)[start:start + limit]
+        end = start + len(tickers)
+        return 200, {
+            "markets": [self.exchange.market(t) for t in tickers],
+            "cursor": str(end) if end < len(self.exchange.books) else "",
+        }
+
+    def get_market(self, request, ticker):
+        if ticker not in self.exchange.books:
+            raise SimError(404, "not_found", f"No market {ticker}")
+        return 200, {"market": self.exchange.market(ticker)}
+
+    def get_orderbook(self, request, ticker):
+        book = self.exchange.books.get(ticker)
+        if book is None:
+            raise SimError(404, "not_found", f"No market {ticker}")
+        return 200, {"orderbook": book.depth()}
+
+    def create_order(self, request):
+        return 201, {"order": self.exchange.place(self._json(request)).to_dict()}
+
+    def create_orders(self, request):
+        outcomes = []
+        for payload in self._json(request).get("orders", []):
+            try:
+                outcomes.append({"order": self.exchange.place(payload).to_dict(), "error": None})
+            except SimError as e:
+                outcomes.append({"order": None, **e.to_dict()})
+        return 201, {"orders": outcomes}
+
+    def cancel_order(self, request, order_id):
+        order, reduced = self.exchange.cancel(order_id)
+        return 200, {"order": order.to_dict(), "reduced_by": reduced}
+
+    def cancel_orders(self, request):
+        outcomes = []
+        for order_id in self._json(request).get("ids", []):
+            try:
+                order, reduced = self.exchange.cancel(order_id)
+                outcomes.append({"order_id": order_id, "order": order.to_dict(), "reduced_by": reduced})
+            except SimError as e:
+                outcomes.append({"order_id": order_id, **e.to_dict()})
+        return 200, {"orders": outcomes}
+
+    def list_orders(self, request):
+        status = request.url.params.get("status")
+        orders = list(self.exchange.orders.values())
+        if status != "resting":
+            orders += list(self.exchange.finished.values())[-1000:]
+        if status:
+            orders = [o for o in orders if o.status == status]
+        return 200, {"orders": [o.to_dict() for o in orders], "cursor": ""}
+
+    def get_order(self, request, order_id):
+        order = self.exchange.orders.get(order_id) or self.exchange.finished.get(order_id)
+        if order is None:
+            raise SimError(404, "not_found", f"No order {order_id}")
+        return 200, {"order": order.to_dict()}
+
+    def get_positions(self, request):
+        return 200, {"market_positions": self.exchange.positions(), "event_positions": [], "cursor": ""}
+
+    def get_fills(self, request):
+        limit = max(1, min(_int_param(request.url.params.get("limit", 100), "limit"), 1000))
+        return 200, {"fills": self.exchange.recent_fills(limit), "cursor": ""}
+
+    def get_balance(self, request):
+        return 200, {"balance": self.exchange.balance()}
+
+    def log_in(self, request):
+        return 200, {"token": "sim-token", "member_id": "sim-member"}
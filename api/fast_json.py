@@ -0,0 +1,135 @@
+import gzip
+import os
+from collections import OrderedDict
+
+import orjson
+from starlette.responses import Response
+
+from api.metrics import stage
+
+try:  # brotli is optional; without it clients get gzip
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this go out uncompressed; the headers would cost more than the saving
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", 5))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", 4))
+
+
+def encode(content) -> bytes:
+    """JSON bytes via orjson; bytes are assumed to be JSON already and returned as is."""
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        return bytes(content)
+    with stage("serialize"):
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def negotiate(accept_encoding: str) -> str:
+    """Best encoding the client accepts: "br", "gzip" or None."""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.partition(";")
+        params = params.strip().replace(" ", "")
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 0.0
+        if q > 0:
+            accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    with stage("compress"):
+        if encoding == "br":
+            return brotli.compress(body, quality=BROTLI_QUALITY)
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class FastJSONResponse(Response):
+    """JSON response that skips `jsonable_encoder` and the stdlib encoder.
+
+    Content is serialised with orjson, or sent as is when it is already JSON
+    bytes (e.g. an untouched upstream body). Given the `request`, bodies of
+    at least COMPRESS_MIN_BYTES are compressed with brotli or gzip according
+    to its Accept-Encoding. Opt-in per endpoint: return one from the handler.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content=None, status_code: int = 200, headers: dict = None, request=None,
+                 content_encoding: str = None):
+        headers = dict(headers or {})
+        if content_encoding is not None:
+            body = content  # already encoded ("" = not compressed), e.g. from an EncodedBodyCache
+        else:
+            body = encode(content)
+            encoding = negotiate(request.headers.get("accept-encoding")) if request is not None else None
+            if encoding and len(body) >= COMPRESS_MIN_BYTES:
+                body = compress(body, encoding)
+                content_encoding = encoding
+        if request is not None:
+            headers["Vary"] = "Accept-Encoding"
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
+        super().__init__(body, status_code, headers, self.media_type)
+
+    def render(self, content) -> bytes:
+        return content
+
+    @classmethod
+    def cached(cls, cache, key, build, request=None, status_code: int = 200, headers: dict = None):
+        """Response for a versioned payload; `build()` only runs when `key` isn't cached yet."""
+        encoding = negotiate(request.headers.get("accept-encoding")) if request is not None else None
+        body, applied = cache.get(key, encoding, lambda: encode(build()))
+        return cls(body, status_code, headers, request=request, content_encoding=applied or "")
+
+
+class EncodedBodyCache:
+    """Encoded (and compressed) bodies of versioned payloads, e.g. one market snapshot.
+
+    Every client polling the same snapshot version gets the same bytes, so
+    the payload is serialised once and compressed once per encoding.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._bodies = OrderedDict()   # (key, encoding) -> (body, encoding applied)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, encoding: str, build) -> tuple:
+        """(body, encoding actually applied) for `key`; `build()` gives the JSON bytes on a miss."""
+        cached = self._bodies.get((key, encoding))
+        if cached is not None:
+            self._bodies.move_to_end((key, encoding))
+            self.hits += 1
+            return cached
+        self.misses += 1
+        raw = self._bodies.get((key, None))
+        body = raw[0] if raw is not None else build()
+        if raw is None:
+            self._put((key, None), (body, None))
+        entry = (compress(body, encoding), encoding) if encoding and len(body) >= COMPRESS_MIN_BYTES else (body, None)
+        self._put((key, encoding), entry)
+        return entry
+
+    def _put(self, key, entry):
+        self._bodies[key] = entry
+        self._bodies.move_to_end(key)
+        while len(self._bodies) > self.max_entries:
+            self._bodies.popitem(last=False)
+
+
+def upstream_json(upstream, request=None, status_code: int = 200) -> FastJSONResponse:
+    """Relay an upstream JSON body without parsing and re-encoding it."""
+    content_type = upstream.headers.get("content-type", "")
+    if "json" not in content_type:
+        raise ValueError(f"Upstream returned {upstream.status_code} with {content_type or 'no content type'}")
+    return FastJSONResponse(upstream.content, status_code, request=request)
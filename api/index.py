@@ -1,16 +1,30 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
-from datetime import datetime
+from typing import List, Optional, Union
 from uuid import uuid4
-import requests
-import httpx
 import os
-import base64
-from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.backends import default_backend
-
-app = FastAPI()
+import json
+import asyncio
+import httpx
+import orjson
+from api.kalshi_client import KalshiClient, client_lifespan
+from api.market_cache import MarketCache
+from api.backtest import BacktestPool, PanelTooLarge, run_backtest
+from api.market_history import MarketHistory, to_columns
+from api.market_crawler import crawl_markets, fetch_all_markets
+from api.market_store import InvalidTime, MarketStore, SORT_FIELDS, parse_time
+from api.orderbook import OrderBookManager
+from api.portfolio import Portfolio, store_prices
+from api.orderbook_scan import MAX_SCAN_TICKERS, scan_orderbooks
+from api.rate_limit import UpstreamScheduler
+from api.risk import RiskEngine, RiskRejected, RiskSync
+from api.batch_orders import MAX_BATCH_LEGS, order_payload, run_bounded
+from api.warmup import WarmUp, preload
+from api.exchange_sim import Exchange, ExchangeTransport
+from api.deltas import DeltaLog, conditional_headers, etag_matches, not_modified
+from api.fast_json import EncodedBodyCache, FastJSONResponse, upstream_json
+from api.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, expose_stats
 
 # Environment variables
 KALSHI_API_KEY = os.getenv("KALSHI_API_KEY")
@@ -20,7 +34,40 @@ KALSHI_API_SECRET = os.getenv("KALSHI_API_SECRET")
 IS_DEMO = os.getenv("IS_DEMO", "false").lower() in ["true", "1", "yes"]
 
 base_domain = "https://demo-api.kalshi.co" if IS_DEMO else "https://trading-api.kalshi.com"
-KALSHI_API_BASE = f"{base_domain}/trade-api/v2"
+# KALSHI_API_BASE overrides the host, e.g. to point at a local fake or simulator
+KALSHI_API_BASE = os.getenv("KALSHI_API_BASE") or f"{base_domain}/trade-api/v2"
+
+# Rate limits and write-before-read priority for every upstream call
+scheduler = UpstreamScheduler.from_env()
+
+# Shared connection pool for every upstream call, opened/closed with the app
+kalshi = KalshiClient(KALSHI_API_BASE, KALSHI_API_KEY, KALSHI_API_SECRET, scheduler=scheduler)
+
+# KALSHI_SIMULATOR serves every upstream call from an in-process exchange (paper trading, load tests)
+KALSHI_SIMULATOR = os.getenv("KALSHI_SIMULATOR", "false").lower() in ["true", "1", "yes"]
+exchange = Exchange.from_env() if KALSHI_SIMULATOR else None
+if exchange is not None:
+    kalshi.transport = ExchangeTransport(exchange)
+    kalshi.http2 = False
+
+# Cold-start costs paid ahead of the first request when WARMUP_ON_STARTUP is set
+warmup = WarmUp(kalshi.warm, preload("numpy"))
+
+# Append-only per-day history of every market cache refresh; off unless MARKET_HISTORY_DIR is set
+MARKET_HISTORY_DIR = os.getenv("MARKET_HISTORY_DIR")
+history = MarketHistory(MARKET_HISTORY_DIR) if MARKET_HISTORY_DIR else None
+
+# Worker processes for /api/backtest, spawned on first use and shut down with the app
+backtest_pool = BacktestPool()
+
+# Settles risk reservations against upstream resting orders and positions every RISK_SYNC_SECONDS;
+# without credentials or the simulator the portfolio endpoints would only answer 401
+risk_sync = RiskSync(lambda: risk, kalshi) if KALSHI_API_KEY or exchange is not None else None
+
+app = FastAPI(lifespan=client_lifespan(kalshi, warmup, backtest_pool, *[s for s in (exchange, history, risk_sync) if s is not None]))
+
+# Request counts and latency per route; scraped from /api/metrics
+app.add_middleware(MetricsMiddleware)
 
 class TradeRequest(BaseModel):
     ticker: str
@@ -29,116 +76,469 @@ class TradeRequest(BaseModel):
     price: int            # price in cents (0–100)
     action: str = "buy"   # "buy" or "sell"
     order_type: str = Field("limit", alias="type")
+    client_order_id: Optional[str] = None   # generated when not given
 
+class BatchTradeRequest(BaseModel):
+    orders: List[TradeRequest]
+
+class BatchCancelRequest(BaseModel):
+    order_ids: List[str]
+
+class BacktestParams(BaseModel):
+    side: str = "yes"             # contract bought: "yes" or "no"
+    entry_below: int = 40         # buy when the ask (cents) is at or below this...
+    entry_above: int = 1          # ...and at or above this
+    target: int = 10              # take profit this many cents above the entry
+    stop_loss: int = 5            # exit this many cents below the entry
+    max_hold: Optional[int] = None  # seconds
+    contracts: int = 1
+
+class BacktestRequest(BaseModel):
+    params: List[BacktestParams] = [BacktestParams()]
+    tickers: Optional[List[str]] = None   # all recorded tickers when not given
+    start: Optional[Union[str, float]] = None   # epoch seconds or ISO-8601
+    end: Optional[Union[str, float]] = None
+    step_seconds: int = 60                # replay resolution
+    slippage: int = 0                     # cents per fill
+    fee: int = 0                          # cents per contract per fill
+
+# Legs of one batch sent upstream at the same time over the shared pool
+ORDER_BATCH_CONCURRENCY = int(os.getenv("ORDER_BATCH_CONCURRENCY", 5))
+# Use Kalshi's /portfolio/orders/batched endpoints (advanced API tier only)
+KALSHI_BATCH_ENDPOINTS = os.getenv("KALSHI_BATCH_ENDPOINTS", "false").lower() in ["true", "1", "yes"]
 
-def auth_headers(method="GET", path="/markets"):
-    ts_ms = int(datetime.now().timestamp() * 1000)
-    message = f"{ts_ms}{method}{path}"
-    key_data = KALSHI_API_SECRET.replace("\\n", "\n")
-    private_key = serialization.load_pem_private_key(
-        key_data.encode(), password=None, backend=default_backend()
-    )
-    signature = private_key.sign(
-        message.encode("utf-8"),
-        padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
-        hashes.SHA256()
-    )
-    signature_b64 = base64.b64encode(signature).decode("utf-8")
-    return {
-        "KALSHI-ACCESS-KEY": KALSHI_API_KEY,
-        "KALSHI-ACCESS-TIMESTAMP": str(ts_ms),
-        "KALSHI-ACCESS-SIGNATURE": signature_b64,
-        "Accept": "application/json",
-        "User-Agent": "kalshi-fastapi-client/1.0"
-    }
 
 @app.get("/api/health")
-def health():
+async def health():
     return {"status": "ok"}
 
+@app.get("/api/warmup")
+async def run_warmup():
+    """Build lazily-created clients now, e.g. from a scheduled ping before traffic."""
+    await warmup.run()
+    return warmup.stats()
+
+async def fetch_markets():
+    return await fetch_all_markets(kalshi)
+
+# Shared by every client polling the feed; see MARKET_CACHE_TTL / MARKET_CACHE_MAX_STALE
+market_cache = MarketCache(fetch_markets)
+
+# Indexed copy of the latest snapshot, rebuilt on every cache refresh
+market_store = MarketStore()
+
+@market_cache.subscribe
+def rebuild_market_store(snapshot):
+    global market_store
+    market_store = MarketStore.from_snapshot(snapshot)
+
+# Positions as typed state in cents; re-marked incrementally on every cache refresh
+portfolio = Portfolio()
+
+@market_cache.subscribe
+def mark_portfolio(snapshot):
+    portfolio.mark_from(store_prices(market_store))
+
+def market_lookup(ticker: str):
+    """(event_ticker, yes_bid, yes_ask) from the cached market store, blanks if unknown."""
+    store = market_store
+    row = store.by_ticker.get(ticker)
+    if row is None:
+        return "", 0, 0
+    return store.event_tickers[row], store.columns["yes_bid"][row], store.columns["yes_ask"][row]
+
+# Pre-trade limits on every order; see RISK_* for the limits
+risk = RiskEngine(lookup=market_lookup)
+
+# Content version of the market list (bumped only when a market changes), for ETags and ?since= deltas
+feed_deltas = DeltaLog("ticker")
+
+@market_cache.subscribe
+def record_feed_version(snapshot):
+    feed_deltas.update(snapshot.markets)
+
+if history is not None:
+    market_cache.subscribe(history.subscriber)
+
+# Serialised (and compressed) feed bodies per content version and query
+feed_bodies = EncodedBodyCache()
+
 @app.get("/api/feed")
-def get_feed():
+async def get_feed(request: Request, sort: str = None, limit: int = None, category: str = None, min_volume: int = None,
+                   since: int = None):
+    """Market feed with ETag / If-None-Match (304) support.
+
+    `?since=<version>` on the unfiltered feed returns only the markets added
+    or changed (`changed`) and the tickers removed (`removed`) since that
+    version; if the version is too old, the full `markets` list comes back.
+    """
+    if sort is not None and sort not in SORT_FIELDS:
+        return {"error": f"Unsupported sort field: {sort}", "sort_fields": list(SORT_FIELDS)}
     try:
-        headers = auth_headers()
-        url = f"{KALSHI_API_BASE}/markets"
-        with httpx.Client(http2=True, headers=headers) as client:
-            response = client.get(url)
-        if response.status_code == 200:
-            return {"status_code": response.status_code, "markets": response.json().get("markets", []), "source": "kalshi"}
-        else:
-            return {"status_code": response.status_code, "text": response.text, "source": "kalshi"}
+        snapshot = await market_cache.get()
+        version = feed_deltas.version
+        if etag_matches(request, feed_deltas.etag):
+            return not_modified(feed_deltas.etag)
+        headers = {**conditional_headers(feed_deltas.etag), "X-Version": str(version)}
+
+        if sort is None and limit is None and category is None and min_volume is None:
+            delta = feed_deltas.diff(since) if since is not None else None
+            if delta is not None:
+                return FastJSONResponse({"status_code": 200, "source": "kalshi", **delta}, headers=headers, request=request)
+            return FastJSONResponse.cached(feed_bodies, ("snapshot", version), lambda: {
+                "status_code": 200, "markets": snapshot.markets, "source": "kalshi", "version": version
+            }, request, headers=headers)
+
+        # Ranked view, e.g. ?sort=volume&limit=20 (most active) or ?sort=spread (tightest)
+        store = market_store
+
+        def ranked():
+            rows = store.select(category=category, min_volume=min_volume)
+            top = store.top(rows, limit if limit is not None else len(rows), sort or "volume")
+            markets = [store.row(i) for i in top]
+            return {"status_code": 200, "markets": markets, "total": len(rows), "source": "kalshi", "version": version}
+
+        key = ("ranked", version, sort, limit, category, min_volume)
+        return FastJSONResponse.cached(feed_bodies, key, ranked, request, headers=headers)
+    except httpx.HTTPStatusError as e:
+        return {"status_code": e.response.status_code, "text": e.response.text, "source": "kalshi"}
     except Exception as e:
         import traceback
         return {"error": str(e), "trace": traceback.format_exc(), "source": "error"}
 
+@app.get("/api/feed/stats")
+async def get_feed_stats():
+    return market_cache.stats()
+
+expose_stats("api", market_cache=market_cache, scheduler=scheduler, risk=risk)
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Prometheus text exposition: request/stage latency histograms, upstream status codes, cache counters."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/api/markets/stream")
+async def stream_markets(request: Request, limit: int = None):
+    # Any other query params (status, event_ticker, series_ticker, ...) go upstream as filters
+    params = {k: v for k, v in request.query_params.items() if k not in ("limit", "cursor")}
+
+    async def ndjson():
+        try:
+            async for page in crawl_markets(kalshi, limit=limit, params=params):
+                yield "".join(json.dumps(m) + "\n" for m in page)
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@app.get("/api/markets/query")
+async def query_markets(
+    request: Request,
+    category: str = None,
+    status: str = None,
+    event_ticker: str = None,
+    close_after: str = None,    # ISO-8601 or epoch seconds
+    close_before: str = None,
+    sort: str = "volume",
+    order: str = None,          # "asc" / "desc"; defaults to the field's natural order
+    limit: int = 50,
+    offset: int = 0,
+):
+    if sort not in SORT_FIELDS:
+        return {"error": f"Unsupported sort field: {sort}", "sort_fields": list(SORT_FIELDS)}
+    try:
+        await market_cache.get()
+        store = market_store
+        total, markets = store.query(
+            sort=sort,
+            descending=None if order is None else order != "asc",
+            limit=max(0, min(limit, 1000)),
+            offset=max(0, offset),
+            category=category,
+            status=status,
+            event_ticker=event_ticker,
+            close_after=parse_time(close_after) if close_after else None,
+            close_before=parse_time(close_before) if close_before else None,
+        )
+        return FastJSONResponse({"markets": markets, "total": total, "offset": offset, "version": store.version}, request=request)
+    except InvalidTime as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+@app.get("/api/upstream/stats")
+async def get_upstream_stats():
+    return scheduler.stats()
+
 @app.post("/api/execute")
-def execute_trade(req: TradeRequest, request: Request = None):
+async def execute_trade(req: TradeRequest, request: Request = None):
+    client_order_id = req.client_order_id or str(uuid4())
     try:
-        headers = auth_headers(method="POST", path="/portfolio/orders")
-        client_order_id = str(uuid4())
-        order_payload = {
-            "ticker": req.ticker,
-            "side": req.side,
-            "count": req.count,
-            "type": req.order_type,
-            "action": req.action,
-            "yes_price": req.price,
-            "client_order_id": client_order_id
-        }
-        url = f"{KALSHI_API_BASE}/portfolio/orders"
-        response = httpx.post(url, json=order_payload, headers=headers)
+        risk.check(req, client_order_id)
+    except RiskRejected as e:
+        return {**e.to_dict(), "trade_id": client_order_id}
+    try:
+        response = await kalshi.post("/portfolio/orders", json=order_payload(req, client_order_id))
         response.raise_for_status()
+        risk.submitted(client_order_id)
         return {
             "status": "submitted",
             "trade_id": client_order_id,
             "kalshi_response": response.json()
         }
     except Exception as e:
+        risk.release(client_order_id)
         import traceback
         return {"status": "error", "error": str(e), "trace": traceback.format_exc()}
 
+@app.get("/api/risk")
+async def get_risk():
+    """Risk limits, current filled + pending exposure and rejection counts by reason."""
+    return {**risk.stats(), "sync": risk_sync.stats() if risk_sync is not None else {"enabled": False}}
+
+@app.get("/api/simulator")
+async def get_simulator():
+    """Exchange simulator balance, order and fill counters (KALSHI_SIMULATOR)."""
+    return exchange.stats() if exchange else {"enabled": False}
+
+@app.post("/api/execute/batch")
+async def execute_batch(batch: BatchTradeRequest):
+    if not batch.orders or len(batch.orders) > MAX_BATCH_LEGS:
+        return {"status": "error", "error": f"A batch needs 1 to {MAX_BATCH_LEGS} orders"}
+
+    # Results are keyed by client_order_id, so those must be unique within the batch
+    ids = [req.client_order_id for req in batch.orders if req.client_order_id]
+    if len(ids) != len(set(ids)):
+        return {"status": "error", "error": "client_order_id values must be unique within a batch"}
+
+    # Validate and risk-check every leg before anything is sent; bad legs are rejected on their own.
+    # Legs are checked in order, so earlier legs count against later legs' limits.
+    results = {}
+    legs = []
+    for req in batch.orders:
+        client_order_id = req.client_order_id or str(uuid4())
+        try:
+            risk.check(req, client_order_id)
+        except RiskRejected as e:
+            results[client_order_id] = {**e.to_dict(), "ticker": req.ticker}
+        else:
+            results[client_order_id] = None
+            legs.append((client_order_id, order_payload(req, client_order_id)))
+
+    try:
+        if KALSHI_BATCH_ENDPOINTS and legs:
+            response = await kalshi.post("/portfolio/orders/batched", json={"orders": [p for _, p in legs]})
+            response.raise_for_status()
+            outcomes = response.json().get("orders", [])
+            # Outcomes come back in request order; legs past the end of a short response get an error
+            for i, (client_order_id, payload) in enumerate(legs):
+                outcome = outcomes[i] if i < len(outcomes) else None
+                if not outcome:
+                    results[client_order_id] = {"status": "error", "ticker": payload["ticker"],
+                                                "error": "missing from upstream response"}
+                elif outcome.get("error"):
+                    results[client_order_id] = {"status": "error", "ticker": payload["ticker"], "error": outcome["error"]}
+                else:
+                    results[client_order_id] = {"status": "submitted", "ticker": payload["ticker"], "kalshi_response": outcome}
+        else:
+            async def submit(leg):
+                response = await kalshi.post("/portfolio/orders", json=leg[1])
+                response.raise_for_status()
+                return response.json()
+
+            outcomes = await run_bounded(legs, submit, ORDER_BATCH_CONCURRENCY)
+            for (client_order_id, payload), outcome in zip(legs, outcomes):
+                if isinstance(outcome, Exception):
+                    results[client_order_id] = {"status": "error", "ticker": payload["ticker"], "error": str(outcome)}
+                else:
+                    results[client_order_id] = {"status": "submitted", "ticker": payload["ticker"], "kalshi_response": outcome}
+    except Exception as e:
+        for client_order_id, payload in legs:
+            results[client_order_id] = results[client_order_id] or {"status": "error", "ticker": payload["ticker"], "error": str(e)}
+
+    for client_order_id, _ in legs:
+        if not results[client_order_id] or results[client_order_id]["status"] != "submitted":
+            risk.release(client_order_id)
+        else:
+            risk.submitted(client_order_id)
+    submitted = sum(1 for r in results.values() if r and r["status"] == "submitted")
+    return {"status": "completed", "submitted": submitted, "failed": len(results) - submitted, "results": results}
+
+# Content version of the computed positions, for ETags and ?since= deltas
+position_deltas = DeltaLog("ticker")
+
 @app.get("/api/positions")
-def get_positions():
+async def get_positions(request: Request, since: int = None):
+    """Positions with exposure, mark-to-market and realised P&L and allocation, in integer cents.
+
+    Upstream positions are synced into the portfolio engine (only changed
+    markets are re-totalled) and marked at the cached market prices.
+    Supports ETag / 304; `?since=<version>` returns only changed positions,
+    with the version to pass next time in the X-Version header.
+    """
     try:
-        headers = auth_headers(path="/portfolio/positions")
-        url = f"{KALSHI_API_BASE}/portfolio/positions"
-        response = httpx.get(url, headers=headers)
-        return response.json()
+        response = await kalshi.get("/portfolio/positions")
+        if response.status_code != 200:
+            return upstream_json(response, request)
+        data = orjson.loads(response.content)
+        portfolio.sync(data.get("market_positions") or [], store_prices(market_store))
+        risk.sync_filled((h.ticker, h.exposure) for h in portfolio.holdings.values() if h.position)
+        rows, totals, allocation = portfolio.positions(), portfolio.totals(), portfolio.allocation()
+        event_positions = data.get("event_positions") or []
+        summary = {"totals": totals, "allocation_bps": allocation, "event_positions": event_positions}
+        version = position_deltas.update(rows, extra=summary)
+        if etag_matches(request, position_deltas.etag):
+            return not_modified(position_deltas.etag)
+        headers = {**conditional_headers(position_deltas.etag), "X-Version": str(version)}
+        delta = position_deltas.diff(since) if since is not None else None
+        if delta is not None:
+            return FastJSONResponse({**delta, **summary}, headers=headers, request=request)
+        return FastJSONResponse({"positions": rows, **summary, "version": version}, headers=headers, request=request)
     except Exception as e:
         import traceback
         return {"error": str(e), "trace": traceback.format_exc()}
 
 @app.get("/api/orders")
-def get_orders():
+async def get_orders(request: Request):
     try:
-        headers = auth_headers(path="/portfolio/orders")
-        url = f"{KALSHI_API_BASE}/portfolio/orders"
-        response = httpx.get(url, headers=headers)
-        return response.json()
+        response = await kalshi.get("/portfolio/orders")
+        return upstream_json(response, request)
     except Exception as e:
         import traceback
         return {"error": str(e), "trace": traceback.format_exc()}
 
+async def fetch_orderbook(ticker: str):
+    response = await kalshi.get(f"/markets/{ticker}/orderbook")
+    response.raise_for_status()
+    return response.json()
+
+# Local books per ticker; deltas can be fed in via order_books.run(feed)
+order_books = OrderBookManager(fetch_orderbook)
+
 @app.get("/api/markets/{ticker}/orderbook")
-def get_orderbook(ticker: str):
+async def get_orderbook(ticker: str, request: Request):
     try:
-        headers = auth_headers(path=f"/markets/{ticker}/orderbook")
-        url = f"{KALSHI_API_BASE}/markets/{ticker}/orderbook"
-        response = httpx.get(url, headers=headers)
-        return response.json()
+        book = await order_books.get(ticker)
+        return FastJSONResponse(book.to_dict(), request=request)
     except Exception as e:
         import traceback
         return {"error": str(e), "trace": traceback.format_exc()}
 
+@app.get("/api/markets/{ticker}/history")
+async def get_market_history(ticker: str, request: Request, start: str = None, end: str = None, limit: int = 2000):
+    """Recorded yes bid/ask, last price and volume of one market in [start, end), as columns.
+
+    `start`/`end` are epoch seconds or ISO-8601; the most recent `limit`
+    points in the range are returned. Points are only recorded when a value
+    changed, so each one holds until the next.
+    """
+    if history is None:
+        return {"error": "Market history is disabled; set MARKET_HISTORY_DIR"}
+    try:
+        rows = history.query(ticker, start, end, max(1, min(limit, 100_000)))
+        return FastJSONResponse({"ticker": ticker, "count": len(rows), **to_columns(rows)}, request=request)
+    except InvalidTime as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+@app.get("/api/markets/history/stats")
+async def get_market_history_stats():
+    return history.stats() if history else {"enabled": False}
+
+@app.post("/api/backtest")
+async def post_backtest(req: BacktestRequest, request: Request):
+    """Replay recorded market history with each parameter set; sets run in parallel on a process pool."""
+    if history is None:
+        return {"error": "Market history is disabled; set MARKET_HISTORY_DIR"}
+    try:
+        result = await asyncio.to_thread(
+            run_backtest, history, [p.model_dump() for p in req.params], req.start, req.end, max(1, req.step_seconds),
+            req.tickers, req.slippage, req.fee, pool=backtest_pool,
+        )
+        return FastJSONResponse(result, request=request)
+    except (PanelTooLarge, InvalidTime) as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+@app.get("/api/orderbooks/scan")
+async def scan_orderbooks_endpoint(
+    tickers: str = None,        # comma-separated; otherwise top markets by volume from the cache
+    category: str = None,
+    status: str = None,
+    min_volume: int = None,
+    limit: int = 100,
+    concurrency: int = None,    # clamped to 1..ORDERBOOK_SCAN_MAX_CONCURRENCY
+):
+    if concurrency is not None and concurrency < 1:
+        return FastJSONResponse({"error": "concurrency must be at least 1"}, status_code=400)
+    try:
+        if tickers:
+            ticker_list = list(dict.fromkeys(t.strip() for t in tickers.split(",") if t.strip()))
+            if len(ticker_list) > MAX_SCAN_TICKERS:
+                return FastJSONResponse({"error": f"At most {MAX_SCAN_TICKERS} tickers per scan"}, status_code=400)
+        else:
+            if not 1 <= limit <= MAX_SCAN_TICKERS:
+                return FastJSONResponse({"error": f"limit must be 1 to {MAX_SCAN_TICKERS}"}, status_code=400)
+            await market_cache.get()
+            store = market_store
+            rows = store.select(category=category, status=status, min_volume=min_volume)
+            ticker_list = [store.tickers[i] for i in store.top(rows, limit, "volume")]
+    except Exception as e:
+        import traceback
+        return {"error": str(e), "trace": traceback.format_exc()}
+
+    async def ndjson():
+        async for batch in scan_orderbooks(order_books, ticker_list, concurrency):
+            yield "".join(json.dumps(r) + "\n" for r in batch)
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
 @app.delete("/api/orders/{order_id}")
-def cancel_order(order_id: str):
+async def cancel_order(order_id: str):
     try:
-        headers = auth_headers(method="DELETE", path=f"/portfolio/orders/{order_id}")
-        url = f"{KALSHI_API_BASE}/portfolio/orders/{order_id}"
-        response = httpx.delete(url, headers=headers)
+        response = await kalshi.delete(f"/portfolio/orders/{order_id}")
         return {"status_code": response.status_code, "result": response.json() if response.text else "No content"}
     except Exception as e:
         import traceback
         return {"error": str(e), "trace": traceback.format_exc()}
 
+@app.post("/api/orders/cancel/batch")
+async def cancel_orders_batch(batch: BatchCancelRequest):
+    order_ids = list(dict.fromkeys(batch.order_ids))
+    if not order_ids or len(order_ids) > MAX_BATCH_LEGS:
+        return {"status": "error", "error": f"A batch needs 1 to {MAX_BATCH_LEGS} order ids"}
+
+    if KALSHI_BATCH_ENDPOINTS:
+        try:
+            response = await kalshi.request("DELETE", "/portfolio/orders/batched", json={"ids": order_ids})
+            response.raise_for_status()
+            by_id = {o.get("order_id"): o for o in response.json().get("orders", [])}
+            outcomes = [
+                Exception(str(by_id[i]["error"])) if by_id.get(i, {}).get("error")
+                else by_id.get(i) or Exception("missing from upstream response")
+                for i in order_ids
+            ]
+        except Exception as e:
+            outcomes = [e] * len(order_ids)
+    else:
+        async def cancel(order_id):
+            response = await kalshi.delete(f"/portfolio/orders/{order_id}")
+            response.raise_for_status()
+            return response.json() if response.text else "No content"
+
+        outcomes = await run_bounded(order_ids, cancel, ORDER_BATCH_CONCURRENCY)
+    results = {}
+    for order_id, outcome in zip(order_ids, outcomes):
+        if isinstance(outcome, Exception):
+            results[order_id] = {"status": "error", "error": str(outcome)}
+        else:
+            results[order_id] = {"status": "canceled", "result": outcome}
+    canceled = sum(1 for r in results.values() if r["status"] == "canceled")
+    return {"status": "completed", "canceled": canceled, "failed": len(results) - canceled, "results": results}
+
 app_handler = app 
\ No newline at end of file
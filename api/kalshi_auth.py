@@ -0,0 +1,64 @@
+import base64
+import time
+from functools import lru_cache
+
+from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.backends import default_backend
+
+# Kalshi signs the full request path, including the API prefix
+KALSHI_PATH_PREFIX = "/trade-api/v2"
+USER_AGENT = "kalshi-fastapi-client/1.0"
+
+
+def load_private_key(secret: str):
+    """Parse a PEM private key, accepting escaped newlines from env vars."""
+    key_data = secret.replace("\\n", "\n")
+    return serialization.load_pem_private_key(
+        key_data.encode(), password=None, backend=default_backend()
+    )
+
+
+class KalshiSigner:
+    """Signs Kalshi API requests with a private key that is parsed only once.
+
+    The parsed key is immutable and `sign()` keeps no shared state, so one
+    signer can be used from any number of threads or tasks at the same time.
+    """
+
+    def __init__(self, api_key: str, secret: str, path_prefix: str = KALSHI_PATH_PREFIX):
+        self.api_key = api_key
+        self.path_prefix = path_prefix
+        self._private_key = load_private_key(secret)
+        self._padding = padding.PSS(
+            mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH
+        )
+
+    def full_path(self, path: str) -> str:
+        """Path as Kalshi expects it in the signature: prefixed, without query."""
+        path = path.split("?", 1)[0]
+        if not path.startswith(self.path_prefix):
+            path = f"{self.path_prefix}{path}"
+        return path
+
+    def sign(self, method: str, path: str, ts_ms: int) -> str:
+        message = f"{ts_ms}{method.upper()}{self.full_path(path)}"
+        signature = self._private_key.sign(message.encode("utf-8"), self._padding, hashes.SHA256())
+        return base64.b64encode(signature).decode("utf-8")
+
+    def headers(self, method: str = "GET", path: str = "/markets") -> dict:
+        """Auth headers for one request; `path` is relative to the API base."""
+        ts_ms = int(time.time() * 1000)
+        return {
+            "KALSHI-ACCESS-KEY": self.api_key,
+            "KALSHI-ACCESS-TIMESTAMP": str(ts_ms),
+            "KALSHI-ACCESS-SIGNATURE": self.sign(method, path, ts_ms),
+            "Accept": "application/json",
+            "User-Agent": USER_AGENT,
+        }
+
+
+@lru_cache(maxsize=4)
+def get_signer(api_key: str, secret: str) -> KalshiSigner:
+    """Process-wide signer for a key pair, built on first use."""
+    return KalshiSigner(api_key, secret)
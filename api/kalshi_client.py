@@ -0,0 +1,159 @@
+import os
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+from api.metrics import STAGE_LATENCY, UPSTREAM_ERRORS, UPSTREAM_RESPONSES, stage
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ["true", "1", "yes"]
+
+
+class KalshiClient:
+    """One pooled `httpx.AsyncClient` shared by every Kalshi call in the process.
+
+    Connections are kept alive between requests, so only the first call to the
+    upstream pays for the TCP + TLS handshake. Requests are signed with the
+    cached `KalshiSigner` when an API key and secret are configured, and go
+    through the optional `UpstreamScheduler` for rate limiting and priority.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = None,
+        api_secret: str = None,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        keepalive_expiry: float = None,
+        http2: bool = None,
+        timeout: float = None,
+        transport: httpx.AsyncBaseTransport = None,
+        scheduler=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.limits = httpx.Limits(
+            max_connections=max_connections or _env_int("KALSHI_HTTP_MAX_CONNECTIONS", 200),
+            max_keepalive_connections=max_keepalive_connections or _env_int("KALSHI_HTTP_MAX_KEEPALIVE", 50),
+            keepalive_expiry=keepalive_expiry or _env_float("KALSHI_HTTP_KEEPALIVE_EXPIRY", 30.0),
+        )
+        self.http2 = _env_bool("KALSHI_HTTP2", True) if http2 is None else http2
+        self.timeout = timeout or _env_float("KALSHI_HTTP_TIMEOUT", 10.0)
+        self.transport = transport
+        self.scheduler = scheduler
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Built lazily so handlers still work where lifespan hooks don't run
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout,
+                transport=self.transport,
+                headers={"Accept": "application/json"},
+            )
+        return self._client
+
+    async def start(self):
+        self.client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def warm(self):
+        """Open the pool and parse the signing key ahead of the first request."""
+        self.client
+        if self.api_key and self.api_secret:
+            self.signer()
+
+    def signer(self):
+        # cryptography is only imported once something is actually signed
+        from api.kalshi_auth import get_signer
+
+        return get_signer(self.api_key, self.api_secret)
+
+    def auth_headers(self, method: str, path: str) -> dict:
+        if self.api_key and self.api_secret:
+            with stage("kalshi_sign"):
+                return self.signer().headers(method, path)
+        return {}
+
+    async def request(self, method: str, path: str, headers: dict = None, **kwargs) -> httpx.Response:
+        """Send a request to `path` (relative to the API base).
+
+        Signed headers are added unless the caller passes its own `headers`.
+        With a scheduler, the request first waits for admission; it is signed
+        only after that so the timestamp is fresh when it reaches Kalshi.
+        """
+        if self.scheduler is None:
+            return await self._send(method, path, headers, **kwargs)
+        kind = self.scheduler.classify(method)
+        queued = time.perf_counter()
+        async with self.scheduler.slot(kind):
+            STAGE_LATENCY.observe(time.perf_counter() - queued, "kalshi_queue")
+            response = await self._send(method, path, headers, **kwargs)
+        self.scheduler.record_response(kind, response.status_code, response.headers.get("Retry-After"))
+        return response
+
+    async def _send(self, method: str, path: str, headers: dict, **kwargs) -> httpx.Response:
+        if headers is None:
+            headers = self.auth_headers(method, path)
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            UPSTREAM_ERRORS.inc("kalshi", method)
+            raise
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - start, "kalshi_request")
+        UPSTREAM_RESPONSES.inc("kalshi", method, str(response.status_code))
+        return response
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", path, **kwargs)
+
+
+def client_lifespan(kalshi: KalshiClient, *services):
+    """FastAPI lifespan that opens the shared client and closes it on shutdown.
+
+    Extra `services` (anything with async `start()` / `aclose()`) are started
+    after the client and closed before it.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await kalshi.start()
+        app.state.kalshi = kalshi
+        for service in services:
+            await service.start()
+        try:
+            yield
+        finally:
+            for service in reversed(services):
+                await service.aclose()
+            await kalshi.aclose()
+
+    return lifespan
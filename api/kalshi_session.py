@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class LoginError(Exception):
+    pass
+
+
+class KalshiSession:
+    """Bearer token for the email/password login path, shared by every request.
+
+    `POST /log_in` runs once and the token is cached for `ttl` seconds
+    (KALSHI_SESSION_TTL; Kalshi sessions last 30 minutes). Within
+    `refresh_margin` of expiry the current token is still handed out while
+    one background login replaces it. Concurrent callers share a single
+    in-flight login, and `request()` / `call()` log in again once and retry
+    when the upstream answers 401.
+    """
+
+    def __init__(self, kalshi, email: str, password: str, ttl: float = None, refresh_margin: float = None,
+                 clock=time.monotonic):
+        self.kalshi = kalshi
+        self.email = email
+        self.password = password
+        self.ttl = ttl if ttl is not None else float(os.getenv("KALSHI_SESSION_TTL", 1500))
+        self.refresh_margin = (
+            refresh_margin if refresh_margin is not None else float(os.getenv("KALSHI_SESSION_REFRESH_MARGIN", 120))
+        )
+        self.clock = clock
+        self._token = None
+        self._expires_at = 0.0
+        self._inflight = None
+
+        # Counters
+        self.logins = 0
+        self.login_failures = 0
+        self.reused = 0
+        self.background_refreshes = 0
+        self.relogins = 0
+
+    async def token(self) -> str:
+        remaining = self._expires_at - self.clock()
+        if self._token is not None and remaining > 0:
+            self.reused += 1
+            if remaining < self.refresh_margin and (self._inflight is None or self._inflight.done()):
+                self.background_refreshes += 1
+                self._start_login()
+            return self._token
+        return await self.login()
+
+    async def headers(self) -> dict:
+        return {"Authorization": f"Bearer {await self.token()}"}
+
+    async def login(self) -> str:
+        """Log in now, joining the in-flight login if there is one."""
+        # Shielded so a disconnecting client doesn't cancel everyone's login
+        return await asyncio.shield(self._start_login())
+
+    def _start_login(self) -> asyncio.Task:
+        task = self._inflight
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            return task
+        task = asyncio.ensure_future(self._login())
+        # Background failures are counted; the next caller retries
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight = task
+        return task
+
+    async def _login(self) -> str:
+        # ✅ Must be /log_in, NOT /login
+        response = await self.kalshi.post("/log_in", headers={}, json={"email": self.email, "password": self.password})
+        if response.status_code != 200:
+            self.login_failures += 1
+            raise LoginError(f"Login failed: {response.text}")
+        self.logins += 1
+        self._token = response.json().get("token")
+        self._expires_at = self.clock() + self.ttl
+        return self._token
+
+    def invalidate(self, token: str):
+        """Forget `token` after the upstream rejected it (a newer token is kept)."""
+        if token is not None and token == self._token:
+            self._token = None
+            self._expires_at = 0.0
+
+    async def call(self, fn):
+        """`await fn(headers)` with the session token.
+
+        A 401, returned or raised as `httpx.HTTPStatusError`, triggers one
+        re-login and one retry; concurrent 401s for the same token share it.
+        """
+        token = await self.token()
+        try:
+            result = await fn({"Authorization": f"Bearer {token}"})
+            if getattr(result, "status_code", None) != 401:
+                return result
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 401:
+                raise
+        logger.warning("Kalshi session rejected (401); logging in again")
+        self.relogins += 1
+        self.invalidate(token)
+        return await fn(await self.headers())
+
+    async def request(self, method: str, path: str, **kwargs):
+        return await self.call(lambda headers: self.kalshi.request(method, path, headers=headers, **kwargs))
+
+    async def start(self):
+        pass
+
+    async def aclose(self):
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
+        self._inflight = None
+
+    def stats(self) -> dict:
+        return {
+            "logged_in": self._token is not None and self._expires_at > self.clock(),
+            "expires_in_seconds": max(self._expires_at - self.clock(), 0.0) if self._token else None,
+            "logins": self.logins,
+            "login_failures": self.login_failures,
+            "reused": self.reused,
+            "background_refreshes": self.background_refreshes,
+            "relogins_on_401": self.relogins,
+        }
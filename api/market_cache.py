@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MarketSnapshot:
+    """One immutable result of an upstream `/markets` fetch."""
+
+    __slots__ = ("markets", "fetched_at", "version")
+
+    def __init__(self, markets: list, fetched_at: float, version: int):
+        self.markets = markets
+        self.fetched_at = fetched_at
+        self.version = version
+
+
+class MarketCache:
+    """In-process market snapshot with TTL, stale-while-revalidate and singleflight.
+
+    - younger than `ttl`: served straight from memory
+    - younger than `max_stale`: served as is while one background refresh runs
+    - missing or older: callers wait for a refresh, and concurrent callers
+      share the same in-flight upstream request
+
+    A failed refresh keeps the previous snapshot, so the feed degrades to
+    stale data instead of erroring while the upstream is unhealthy.
+    """
+
+    def __init__(self, fetch, ttl: float = None, max_stale: float = None, clock=time.monotonic):
+        self.fetch = fetch
+        self.ttl = ttl if ttl is not None else float(os.getenv("MARKET_CACHE_TTL", 5))
+        self.max_stale = max_stale if max_stale is not None else float(os.getenv("MARKET_CACHE_MAX_STALE", 60))
+        self.clock = clock
+        self.snapshot = None
+        self._inflight = None
+        self._version = 0
+        self._listeners = []
+
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.listener_errors = 0
+        self.refresh_ms_total = 0.0
+        self.last_refresh_ms = None
+        self.last_error = None
+
+    def subscribe(self, listener):
+        """Call `listener(snapshot)` after every successful refresh.
+
+        Listeners run before the snapshot is published, so anything derived
+        from it is consistent by the time `get()` returns the new snapshot.
+        A listener that raises is logged and counted; it does not fail the
+        refresh or stop the other listeners.
+        """
+        self._listeners.append(listener)
+        return listener
+
+    async def get(self) -> MarketSnapshot:
+        snapshot = self.snapshot
+        if snapshot is not None:
+            age = self.clock() - snapshot.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return snapshot
+            if age < self.max_stale:
+                self.stale_hits += 1
+                self._start_refresh()
+                return snapshot
+        self.misses += 1
+        return await self.refresh()
+
+    async def refresh(self) -> MarketSnapshot:
+        """Refresh now, joining the in-flight refresh if there is one."""
+        # Shielded so a disconnecting client doesn't cancel everyone's refresh
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Task:
+        task = self._inflight
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            return task
+        task = asyncio.ensure_future(self._refresh())
+        # Mark background failures as retrieved; they are recorded in the counters
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight = task
+        return task
+
+    async def _refresh(self) -> MarketSnapshot:
+        start = time.perf_counter()
+        try:
+            markets = await self.fetch()
+            snapshot = MarketSnapshot(markets, self.clock(), self._version + 1)
+            for listener in self._listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    self.listener_errors += 1
+                    logger.exception("Market cache listener %s failed: %s", getattr(listener, "__name__", listener), e)
+        except Exception as e:
+            self.refresh_errors += 1
+            self.last_error = str(e)
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.refreshes += 1
+            self.refresh_ms_total += elapsed_ms
+            self.last_refresh_ms = elapsed_ms
+        self._version = snapshot.version
+        self.snapshot = snapshot
+        return snapshot
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "listener_errors": self.listener_errors,
+            "last_refresh_ms": self.last_refresh_ms,
+            "avg_refresh_ms": self.refresh_ms_total / self.refreshes if self.refreshes else None,
+            "last_error": self.last_error,
+            "version": snapshot.version if snapshot else None,
+            "age_seconds": self.clock() - snapshot.fetched_at if snapshot else None,
+            "market_count": len(snapshot.markets) if snapshot else 0,
+        }
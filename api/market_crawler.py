@@ -0,0 +1,66 @@
+import asyncio
+import os
+
+from api.metrics import stage
+
+# Kalshi caps /markets at 1000 results per page
+MAX_PAGE_SIZE = 1000
+
+
+class CursorLoop(RuntimeError):
+    """Upstream handed back a cursor it had already returned; following it would never end."""
+
+
+async def fetch_market_page(kalshi, cursor: str = None, limit: int = MAX_PAGE_SIZE, params: dict = None, headers: dict = None):
+    """Fetch one page of /markets. Returns (markets, next_cursor)."""
+    query = {"limit": limit, **(params or {})}
+    if cursor:
+        query["cursor"] = cursor
+    response = await kalshi.get("/markets", params=query, headers=headers)
+    response.raise_for_status()
+    with stage("kalshi_decode"):
+        data = response.json()
+    return data.get("markets", []), data.get("cursor") or None
+
+
+async def crawl_markets(kalshi, limit: int = None, params: dict = None, headers: dict = None, prefetch: bool = True):
+    """Follow Kalshi's cursor pagination, yielding markets one page at a time.
+
+    With `prefetch`, the request for the next page is already in flight while
+    the caller processes the current one. At most two pages are held in
+    memory, whatever the total number of markets. A cursor seen before
+    raises `CursorLoop` instead of paging forever.
+    """
+    limit = min(limit or int(os.getenv("MARKET_CRAWL_PAGE_SIZE", MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+    cursor = None
+    seen = set()
+    next_page = None
+    try:
+        while True:
+            if next_page is None:
+                markets, cursor = await fetch_market_page(kalshi, cursor, limit, params, headers)
+            else:
+                markets, cursor = await next_page
+                next_page = None
+            if cursor in seen:
+                raise CursorLoop(f"/markets returned cursor {cursor!r} twice after {len(seen)} pages")
+            seen.add(cursor)
+            if cursor and prefetch:
+                next_page = asyncio.ensure_future(fetch_market_page(kalshi, cursor, limit, params, headers))
+            if markets:
+                yield markets
+            if not cursor:
+                return
+    finally:
+        # Consumer stopped early (or failed): drop the prefetched page
+        if next_page is not None:
+            next_page.cancel()
+            next_page.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def fetch_all_markets(kalshi, **kwargs) -> list:
+    """The full market universe as one list."""
+    markets = []
+    async for page in crawl_markets(kalshi, **kwargs):
+        markets.extend(page)
+    return markets
@@ -0,0 +1,324 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from api.market_store import _int, epoch_seconds
+from api.metrics import stage
+
+# One fixed-width little-endian record per (market, change): 32 bytes, 8-byte aligned
+FIELDS = (
+    ("ts_ms", "<i8"),
+    ("volume", "<i8"),
+    ("ticker_id", "<u4"),
+    ("yes_bid", "<i4"),
+    ("yes_ask", "<i4"),
+    ("last_price", "<i4"),
+)
+RECORD_SIZE = 32
+TICKERS_FILE = "tickers.txt"
+
+logger = logging.getLogger(__name__)
+
+
+def record_dtype():
+    import numpy as np  # deferred: only history reads/writes need it, and it is slow to import
+
+    return np.dtype(list(FIELDS))
+
+
+def day_of(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).strftime("%Y-%m-%d")
+
+
+def to_ms(value):
+    """Epoch milliseconds from epoch seconds or an ISO-8601 string; None stays None."""
+    if value is None or value == "":
+        return None
+    return int(epoch_seconds(value) * 1000)
+
+
+class HistoryDay:
+    """Memory-mapped reader over one day file with a per-ticker row index.
+
+    Rows of a ticker are appended in time order, so the index is just the
+    row numbers per ticker id; a time range is two binary searches over
+    those rows' timestamps. The index is extended incrementally as the file
+    grows and nothing but the selected rows is ever copied out of the map.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0       # rows covered by the ticker index
+        self.mapped = 0     # rows covered by `data`
+        self.data = None
+        self._chunks = {}   # ticker id -> [row number arrays], merged on first use
+
+    def _map(self) -> int:
+        import numpy as np
+
+        rows = os.path.getsize(self.path) // RECORD_SIZE  # a torn trailing record is ignored
+        if rows != self.mapped:
+            self.data = np.memmap(self.path, dtype=record_dtype(), mode="r", shape=(rows,))
+            self.mapped = rows
+        return rows
+
+    def refresh(self):
+        import numpy as np
+
+        rows = self._map()
+        if rows == self.rows:
+            return
+        ids = self.data["ticker_id"][self.rows:rows]
+        order = np.argsort(ids, kind="stable")
+        unique, starts = np.unique(ids[order], return_index=True)
+        for ticker_id, part in zip(unique.tolist(), np.split(order + self.rows, starts[1:])):
+            self._chunks.setdefault(ticker_id, []).append(part)
+        self.rows = rows
+
+    def offsets(self, ticker_id: int):
+        import numpy as np
+
+        chunks = self._chunks.get(ticker_id)
+        if not chunks:
+            return np.empty(0, dtype=np.int64)
+        if len(chunks) > 1:
+            chunks[:] = [np.concatenate(chunks)]
+        return chunks[0]
+
+    def slice(self, ticker_id: int, start_ms: int = None, end_ms: int = None):
+        """Records of one ticker with start_ms <= ts_ms < end_ms."""
+        self.refresh()
+        rows = self.offsets(ticker_id)
+        if not len(rows):
+            return self.data[:0] if self.data is not None else None
+        ts = self.data["ts_ms"][rows]
+        lo = int(ts.searchsorted(start_ms, "left")) if start_ms is not None else 0
+        hi = int(ts.searchsorted(end_ms, "left")) if end_ms is not None else len(rows)
+        return self.data[rows[lo:hi]]
+
+    def range(self, start_ms: int = None, end_ms: int = None):
+        """Every record with start_ms <= ts_ms < end_ms, as a view into the map (no copy).
+
+        Needs only the map, not the ticker index.
+        """
+        rows = self._map()
+        if self.data is None:
+            return None
+        ts = self.data["ts_ms"]  # non-decreasing: the file is appended in time order
+        lo = int(ts.searchsorted(start_ms, "left")) if start_ms is not None else 0
+        hi = int(ts.searchsorted(end_ms, "left")) if end_ms is not None else rows
+        return self.data[lo:hi]
+
+
+class MarketHistory:
+    """Append-only columnar history of the market cache, one binary file per UTC day.
+
+    `record(markets)` (subscribed to the market cache) appends one
+    fixed-width record per market whose bid, ask, last price or volume
+    changed since it was last recorded; each day file starts with a full
+    snapshot so it stands on its own. Ticker ids index into the shared,
+    append-only `tickers.txt`. Reads memory-map the day files, so a query
+    touches only the rows it returns, however large the file.
+
+    One writer per directory; any number of processes can read.
+    """
+
+    def __init__(self, path: str, clock=time.time, open_days: int = None):
+        self.path = path
+        self.clock = clock
+        self.open_days = open_days or int(os.getenv("MARKET_HISTORY_OPEN_DAYS", 8))
+        os.makedirs(path, exist_ok=True)
+        self.tickers = []
+        self.ticker_ids = {}
+        self._tickers_size = 0
+        self._load_tickers()
+        self._day = None
+        self._file = None
+        self._last = {}     # ticker id -> last recorded (yes_bid, yes_ask, last_price, volume)
+        self._days = OrderedDict()
+
+        # Counters
+        self.snapshots = 0
+        self.rows_written = 0
+        self.rows_skipped = 0
+        self.errors = 0
+
+    def _load_tickers(self):
+        """Read tickers appended since the last load; a torn last line is left for later."""
+        path = os.path.join(self.path, TICKERS_FILE)
+        if not os.path.exists(path) or os.path.getsize(path) == self._tickers_size:
+            return
+        with open(path, "rb") as f:
+            f.seek(self._tickers_size)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].decode().splitlines():
+            self.ticker_ids[line] = len(self.tickers)
+            self.tickers.append(line)
+        self._tickers_size += complete
+
+    def _open_day(self, day: str):
+        if self._file is not None:
+            self._file.close()
+        else:
+            # First write from this process: drop a torn ticker line left by a crash
+            tickers = os.path.join(self.path, TICKERS_FILE)
+            if os.path.exists(tickers) and os.path.getsize(tickers) > self._tickers_size:
+                os.truncate(tickers, self._tickers_size)
+        path = os.path.join(self.path, f"{day}.bin")
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._file = open(path, "ab")
+        if size % RECORD_SIZE:
+            self._file.truncate(size - size % RECORD_SIZE)
+        self._day = day
+        self._last = {}
+
+    def record(self, markets, ts_ms: int = None) -> int:
+        """Append the markets that changed; returns the number of rows written."""
+        import numpy as np
+
+        with stage("history_record"):
+            ts_ms = ts_ms if ts_ms is not None else int(self.clock() * 1000)
+            day = day_of(ts_ms)
+            if day != self._day:
+                self._open_day(day)
+            # Built in locals and committed to memory only once on disk, so a bad
+            # market (or a failed write) leaves the ticker index and _last as they were
+            new_tickers = {}
+            changed = {}
+            rows = []
+            for m in markets:
+                ticker = m.get("ticker")
+                if not ticker:
+                    continue
+                ticker_id = self.ticker_ids.get(ticker)
+                if ticker_id is None:
+                    ticker_id = new_tickers.get(ticker)
+                    if ticker_id is None:
+                        ticker_id = new_tickers[ticker] = len(self.tickers) + len(new_tickers)
+                values = (_int(m.get("yes_bid")), _int(m.get("yes_ask")), _int(m.get("last_price")), _int(m.get("volume")))
+                if changed.get(ticker_id, self._last.get(ticker_id)) == values:
+                    self.rows_skipped += 1
+                    continue
+                changed[ticker_id] = values
+                rows.append((ts_ms, values[3], ticker_id, values[0], values[1], values[2]))
+
+            if new_tickers:
+                # Ticker ids are on disk before any record that refers to them
+                data = "".join(f"{t}\n" for t in new_tickers).encode()
+                with open(os.path.join(self.path, TICKERS_FILE), "ab") as f:
+                    f.write(data)
+                self._tickers_size += len(data)
+                for ticker, ticker_id in new_tickers.items():
+                    self.ticker_ids[ticker] = ticker_id
+                    self.tickers.append(ticker)
+            if rows:
+                self._file.write(np.array(rows, dtype=record_dtype()).tobytes())
+                self._file.flush()
+                self._last.update(changed)
+            self.snapshots += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+    def subscriber(self, snapshot):
+        """MarketCache listener: record every refreshed snapshot.
+
+        A failing disk must not fail the cache refresh, so errors are logged
+        and counted instead of raised.
+        """
+        try:
+            self.record(snapshot.markets)
+        except Exception as e:
+            self.errors += 1
+            logger.exception("Market history write failed: %s", e)
+
+    def days(self) -> list:
+        return sorted(name[:-4] for name in os.listdir(self.path) if name.endswith(".bin"))
+
+    def _reader(self, day: str) -> HistoryDay:
+        reader = self._days.get(day)
+        if reader is None:
+            reader = self._days[day] = HistoryDay(os.path.join(self.path, f"{day}.bin"))
+            while len(self._days) > self.open_days:
+                self._days.popitem(last=False)
+        self._days.move_to_end(day)
+        return reader
+
+    def query(self, ticker: str, start=None, end=None, limit: int = None):
+        """Records of `ticker` in [start, end) (epoch seconds or ISO-8601), the most recent `limit`."""
+        import numpy as np
+
+        with stage("history_query"):
+            empty = np.empty(0, dtype=record_dtype())
+            ticker_id = self.ticker_ids.get(ticker)
+            if ticker_id is None:
+                self._load_tickers()  # another process may be the writer
+                ticker_id = self.ticker_ids.get(ticker)
+                if ticker_id is None:
+                    return empty
+            start_ms, end_ms = to_ms(start), to_ms(end)
+            first = day_of(start_ms) if start_ms is not None else None
+            last = day_of(end_ms) if end_ms is not None else None
+            parts = []
+            for day in reversed(self.days()):
+                if (last is not None and day > last) or (first is not None and day < first):
+                    continue
+                part = self._reader(day).slice(ticker_id, start_ms, end_ms)
+                if part is not None and len(part):
+                    parts.append(part if limit is None else part[-limit:])
+                    if limit is not None and sum(map(len, parts)) >= limit:
+                        break
+            if not parts:
+                return empty
+            rows = np.concatenate(parts[::-1])
+            return rows[-limit:] if limit is not None else rows
+
+    def scan(self, start=None, end=None):
+        """All records in [start, end) across day files, oldest first (one copy of the selected rows).
+
+        Safe to call from a worker thread (backtests): it maps each day with
+        its own reader and never touches the cached readers `query` uses.
+        """
+        import numpy as np
+
+        with stage("history_query"):
+            start_ms, end_ms = to_ms(start), to_ms(end)
+            first = day_of(start_ms) if start_ms is not None else None
+            last = day_of(end_ms) if end_ms is not None else None
+            parts = []
+            for day in self.days():
+                if (last is not None and day > last) or (first is not None and day < first):
+                    continue
+                part = HistoryDay(os.path.join(self.path, f"{day}.bin")).range(start_ms, end_ms)
+                if part is not None and len(part):
+                    parts.append(part)
+            return np.concatenate(parts) if parts else np.empty(0, dtype=record_dtype())
+
+    async def start(self):
+        pass
+
+    async def aclose(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._day = None
+
+    def stats(self) -> dict:
+        days = self.days()
+        return {
+            "path": self.path,
+            "days": days,
+            "tickers": len(self.tickers),
+            "snapshots": self.snapshots,
+            "rows_written": self.rows_written,
+            "rows_skipped_unchanged": self.rows_skipped,
+            "write_errors": self.errors,
+            "bytes_on_disk": sum(os.path.getsize(os.path.join(self.path, f"{d}.bin")) for d in days),
+        }
+
+
+def to_columns(rows) -> dict:
+    """Column lists for JSON (one list per field) from an array of records."""
+    return {name: rows[name].tolist() for name, _ in FIELDS if name != "ticker_id"}
@@ -0,0 +1,227 @@
+import heapq
+import math
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+# Integer (cents / contracts) columns kept per market
+NUMERIC_FIELDS = (
+    "yes_bid", "yes_ask", "no_bid", "no_ask", "last_price",
+    "volume", "volume_24h", "open_interest", "liquidity",
+)
+# Computed once per refresh: yes spread in cents and yes mid-price
+DERIVED_FIELDS = ("spread", "mid")
+SORT_FIELDS = NUMERIC_FIELDS + DERIVED_FIELDS + ("close_time",)
+
+# Natural direction per field: "tightest" spread and "soonest" close first
+ASCENDING_FIELDS = ("spread", "close_time")
+
+# Spread reported for markets without both a bid and an ask
+NO_SPREAD = 100
+
+# Markets without a close time sort after every real one
+NO_CLOSE_TIME = 2 ** 62
+
+
+class InvalidTime(ValueError):
+    """A time that is neither epoch seconds nor ISO-8601 (a client error, not a server one)."""
+
+
+def epoch_seconds(value) -> float:
+    """Epoch seconds, fractions kept, from a number, a numeric string or an ISO-8601 string."""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        try:
+            seconds = datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except (AttributeError, ValueError):
+            raise InvalidTime(f"Invalid time: {value!r} (expected epoch seconds or ISO-8601)") from None
+    if not math.isfinite(seconds):
+        raise InvalidTime(f"Invalid time: {value!r} (expected epoch seconds or ISO-8601)")
+    return seconds
+
+
+def parse_time(value) -> int:
+    """Epoch seconds from an ISO-8601 string or a number; NO_CLOSE_TIME if missing."""
+    if value is None or value == "":
+        return NO_CLOSE_TIME
+    return int(epoch_seconds(value))
+
+
+def close_time(value) -> int:
+    """`parse_time` for upstream data: an unparseable close time sorts like a missing one."""
+    try:
+        return parse_time(value)
+    except InvalidTime:
+        return NO_CLOSE_TIME
+
+
+def format_time(ts: int):
+    if ts == NO_CLOSE_TIME:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _int(value) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class MarketStore:
+    """Compact, column-oriented copy of the market universe.
+
+    Strings live in per-field lists and numbers in typed `array` columns, so a
+    market costs a few machine words instead of a full dict. Secondary indexes
+    map category, status and event ticker to row ids, and close times are kept
+    sorted for range lookups, so queries only touch the rows they match.
+    """
+
+    def __init__(self, markets=(), version: int = None):
+        self.version = version
+        self.tickers = []
+        self.titles = []
+        self.event_tickers = []
+        self.categories = []
+        self.statuses = []
+        self.columns = {field: array("q") for field in NUMERIC_FIELDS}
+        self.close_ts = array("q")
+        self.spread = array("q")
+        self.mid = array("d")
+
+        self.by_ticker = {}
+        self.by_category = {}
+        self.by_status = {}
+        self.by_event = {}
+
+        for m in markets:
+            self._append(m)
+
+        # Row ids ordered by close time, with the matching timestamps for bisect
+        order = sorted(range(len(self.tickers)), key=self.close_ts.__getitem__)
+        self.close_order = array("l", order)
+        self.close_sorted = array("q", (self.close_ts[i] for i in order))
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls(snapshot.markets, snapshot.version)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def _append(self, m: dict):
+        row = len(self.tickers)
+        ticker = m.get("ticker") or m.get("id") or ""
+        event_ticker = sys.intern(m.get("event_ticker") or "")
+        category = sys.intern(m.get("category") or "unknown")
+        status = sys.intern(m.get("status") or "unknown")
+
+        self.tickers.append(ticker)
+        self.titles.append(m.get("title") or ticker)
+        self.event_tickers.append(event_ticker)
+        self.categories.append(category)
+        self.statuses.append(status)
+        for field, column in self.columns.items():
+            column.append(_int(m.get(field)))
+        self.close_ts.append(close_time(m.get("close_time")))
+
+        bid = self.columns["yes_bid"][row]
+        ask = self.columns["yes_ask"][row]
+        if bid > 0 and ask > 0:
+            self.spread.append(ask - bid)
+            self.mid.append((bid + ask) / 2)
+        else:
+            self.spread.append(NO_SPREAD)
+            self.mid.append(float(bid or ask or self.columns["last_price"][row]))
+
+        self.by_ticker[ticker] = row
+        self.by_category.setdefault(category, array("l")).append(row)
+        self.by_status.setdefault(status, array("l")).append(row)
+        self.by_event.setdefault(event_ticker, array("l")).append(row)
+
+    def row(self, i: int) -> dict:
+        market = {
+            "ticker": self.tickers[i],
+            "event_ticker": self.event_tickers[i],
+            "title": self.titles[i],
+            "category": self.categories[i],
+            "status": self.statuses[i],
+            "close_time": format_time(self.close_ts[i]),
+        }
+        for field, column in self.columns.items():
+            market[field] = column[i]
+        market["spread"] = self.spread[i]
+        market["mid"] = self.mid[i]
+        return market
+
+    def get(self, ticker: str):
+        i = self.by_ticker.get(ticker)
+        return None if i is None else self.row(i)
+
+    def sort_key(self, field: str):
+        if field == "close_time":
+            return self.close_ts.__getitem__
+        if field in DERIVED_FIELDS:
+            return getattr(self, field).__getitem__
+        return self.columns[field].__getitem__
+
+    def select(self, category: str = None, status: str = None, event_ticker: str = None,
+               close_after: int = None, close_before: int = None, min_volume: int = None):
+        """Row ids matching every given filter, found through the indexes.
+
+        The most selective index provides the candidate rows; the remaining
+        filters are checked against the columns for those rows only.
+        """
+        candidates = []
+        checks = []
+        for index, column, value in (
+            (self.by_category, self.categories, category),
+            (self.by_status, self.statuses, status),
+            (self.by_event, self.event_tickers, event_ticker),
+        ):
+            if value is not None:
+                candidates.append(index.get(value, ()))
+                checks.append((column, value))
+        if close_after is not None or close_before is not None:
+            lo = bisect_left(self.close_sorted, close_after) if close_after is not None else 0
+            hi = bisect_right(self.close_sorted, close_before) if close_before is not None else len(self)
+            candidates.append(self.close_order[lo:hi])
+        min_volume = min_volume or 0
+        if not candidates:
+            if not min_volume:
+                return range(len(self))
+            candidates.append(range(len(self)))
+
+        rows = min(candidates, key=len)
+        lo = close_after if close_after is not None else -NO_CLOSE_TIME
+        hi = close_before if close_before is not None else NO_CLOSE_TIME
+        close_ts = self.close_ts
+        volume = self.columns["volume"]
+        return [
+            i for i in rows
+            if all(column[i] == value for column, value in checks)
+            and lo <= close_ts[i] <= hi
+            and volume[i] >= min_volume
+        ]
+
+    def top(self, rows, k: int, sort: str = "volume", descending: bool = None) -> list:
+        """The first `k` of `rows` in sort order.
+
+        Uses heap selection, O(n log k), when only a small prefix is needed,
+        and a full sort otherwise.
+        """
+        if descending is None:
+            descending = sort not in ASCENDING_FIELDS
+        key = self.sort_key(sort)
+        if k >= len(rows):
+            return sorted(rows, key=key, reverse=descending)
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(k, rows, key=key)
+
+    def query(self, sort: str = "volume", descending: bool = None, limit: int = 50, offset: int = 0, **filters):
+        """Filter, sort and paginate. Returns (total_matches, markets)."""
+        rows = self.select(**filters)
+        ordered = self.top(rows, offset + limit, sort, descending)
+        return len(rows), [self.row(i) for i in ordered[offset:offset + limit]]
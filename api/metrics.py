@@ -0,0 +1,287 @@
+import math
+import time
+from bisect import bisect_left
+
+# Upper bounds (seconds) shared by every latency histogram: 1 ms .. 30 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set.
+
+    `observe()` is a bisect over ~15 bounds and two list updates, so it is
+    cheap enough to call on every request and upstream call. Counts are kept
+    per bucket and made cumulative only when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}   # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels) -> "Timer":
+        return Timer(self, labels)
+
+    def samples(self):
+        names = self.labelnames + ("le",)
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                yield f"{self.name}_bucket", _labels(names, labels + (_number(bound),)), cumulative
+            yield f"{self.name}_sum", _labels(self.labelnames, labels), series[-1]
+            yield f"{self.name}_count", _labels(self.labelnames, labels), cumulative
+
+
+class Timer:
+    """`with histogram.time(*labels):` without the overhead of a generator-based context manager."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Collected:
+    """Values read from existing `stats()` at scrape time instead of on every event.
+
+    Each app in the process adds its own `collect` function under an `app`
+    label, so two apps sharing the registry both show up on one scrape.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: tuple):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = ("app",) + tuple(labelnames)
+        self.sources = {}   # app -> collect()
+
+    def add(self, app: str, collect):
+        if app in self.sources:
+            raise ValueError(f"metric {self.name} already collected for app {app}")
+        self.sources[app] = collect
+
+    def samples(self):
+        for app, collect in self.sources.items():
+            for labels, value in collect():
+                if value is not None:
+                    yield self.name, _labels(self.labelnames, (app,) + tuple(labels)), value
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collect(self, name: str, help: str, kind: str = "gauge", labelnames: tuple = (), *, app: str):
+        """Decorator registering `fn() -> [(label values, value), ...]` read on every scrape.
+
+        The metric is created once; each `app` adds its samples under its own
+        `app` label, and registering the same app twice raises.
+        """
+
+        def register(fn):
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self._add(Collected(name, help, kind, labelnames))
+            elif not isinstance(metric, Collected) or metric.kind != kind or metric.labelnames[1:] != tuple(labelnames):
+                raise ValueError(f"metric {name} already registered with a different type or labels")
+            metric.add(app, fn)
+            return fn
+
+        return register
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "Requests served", ("method", "route", "status"))
+HTTP_ERRORS = REGISTRY.counter("http_request_errors_total", "Requests that raised or returned 5xx", ("method", "route"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time from request to last body byte", ("method", "route")
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "stage_duration_seconds",
+    "Time spent per processing stage (kalshi_sign, kalshi_request, kalshi_decode, openai, persistence_write, ...)",
+    ("stage",),
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "upstream_responses_total", "Upstream responses by status code", ("upstream", "method", "status")
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "upstream_errors_total", "Upstream calls that failed without a response", ("upstream", "method")
+)
+RISK_CHECKS = REGISTRY.counter(
+    "risk_checks_total", "Pre-trade risk checks by result and rejection reason", ("result", "reason")
+)
+
+
+def stage(name: str):
+    """`with stage("openai"): ...` records the block in stage_duration_seconds."""
+    return STAGE_LATENCY.time(name)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them until the body is sent.
+
+    Requests are labelled by route template (`/api/markets/{ticker}/orderbook`),
+    not raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, path)
+            HTTP_REQUESTS.inc(method, path, str(status))
+            if status >= 500:
+                HTTP_ERRORS.inc(method, path)
+
+
+def expose_stats(app: str, market_cache=None, reco_cache=None, scheduler=None, persistence=None, risk=None):
+    """Publish the counters these components already keep in `stats()`, read at scrape time.
+
+    Samples carry an `app` label; calling this twice for the same app raises.
+    """
+
+    @REGISTRY.collect("cache_requests_total", "Cache lookups by result", "counter", ("cache", "result"), app=app)
+    def cache_requests():
+        samples = []
+        if market_cache is not None:
+            s = market_cache.stats()
+            samples += [(("market", result), s[key]) for result, key in
+                        (("hit", "hits"), ("stale_hit", "stale_hits"), ("miss", "misses"), ("coalesced", "coalesced"))]
+        if reco_cache is not None:
+            s = reco_cache.stats()
+            samples += [(("recommendation", "hit"), s["hits"]), (("recommendation", "miss"), s["misses"])]
+        return samples
+
+    if scheduler is not None:
+        @REGISTRY.collect("upstream_in_flight", "Upstream requests currently in flight", app=app)
+        def in_flight():
+            return [((), scheduler.in_flight)]
+
+        @REGISTRY.collect("upstream_queue_depth", "Upstream requests waiting for admission", labelnames=("class",),
+                          app=app)
+        def queue_depth():
+            return [((kind,), c["queue_depth"]) for kind, c in scheduler.stats()["classes"].items()]
+
+        @REGISTRY.collect("upstream_rejected_total", "Reads shed because the queue was full", "counter", ("class",),
+                          app=app)
+        def rejected():
+            return [((kind,), n) for kind, n in scheduler.rejected.items()]
+
+    if persistence is not None:
+        @REGISTRY.collect("write_behind_pending", "Rows buffered for the next bulk insert", app=app)
+        def pending():
+            return [((), persistence.pending())]
+
+        @REGISTRY.collect("write_behind_rows_total", "Rows by outcome", "counter", ("result",), app=app)
+        def rows():
+            s = persistence.stats()
+            return [((result,), s[result]) for result in ("written", "spilled", "replayed", "dropped")]
+
+    if risk is not None:
+        @REGISTRY.collect("risk_account_exposure_cents", "Filled plus pending buy exposure counted by the risk checks",
+                          app=app)
+        def account_exposure():
+            return [((), risk.account_exposure)]
+
+        @REGISTRY.collect("risk_pending_orders", "Accepted orders whose exposure is still reserved", app=app)
+        def pending_orders():
+            return [((), len(risk.pending))]
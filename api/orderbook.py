@@ -0,0 +1,212 @@
+import asyncio
+import os
+import time
+from array import array
+
+# Kalshi prices are whole cents from 1 to 99
+MIN_PRICE = 1
+MAX_PRICE = 99
+
+
+def _level(price, qty):
+    """(price, quantity) as ints, or None unless the price is a whole cent from 1 to 99."""
+    try:
+        price, qty = int(price), int(qty)
+    except (TypeError, ValueError):
+        return None
+    return (price, qty) if MIN_PRICE <= price <= MAX_PRICE else None
+
+
+class OrderBook:
+    """Price-indexed yes/no book for one market.
+
+    Kalshi books hold bids only: a yes bid at p is the same as a no ask at
+    100 - p. Each side is a fixed 100-slot array of resting quantity, and the
+    best level is tracked as updates arrive, so best bid/ask are O(1) and
+    depth walks at most 99 slots. Levels priced outside 1-99 are dropped
+    from snapshots; such a delta is refused and marks the book stale.
+    """
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.levels = {"yes": array("q", [0] * (MAX_PRICE + 1)), "no": array("q", [0] * (MAX_PRICE + 1))}
+        self.best = {"yes": 0, "no": 0}
+        self.seq = None
+        self.updated_at = None
+        self.stale = True
+
+    def apply_snapshot(self, yes=(), no=(), seq: int = None):
+        for side, levels in (("yes", yes), ("no", no)):
+            book = self.levels[side]
+            for p in range(len(book)):
+                book[p] = 0
+            for price, qty in levels or ():
+                level = _level(price, qty)
+                if level is not None:
+                    book[level[0]] = max(0, level[1])
+            self.best[side] = self._scan_best(side, MAX_PRICE)
+        self.seq = seq
+        self.updated_at = time.time()
+        self.stale = False
+
+    def apply_delta(self, side: str, price: int, delta: int, seq: int = None) -> bool:
+        """Apply one level change.
+
+        Returns False (and marks the book stale) on a sequence gap or an
+        invalid side, price or delta.
+        """
+        if seq is not None and self.seq is not None and seq != self.seq + 1:
+            self.stale = True
+            return False
+        book = self.levels.get(side)
+        level = _level(price, delta)
+        if book is None or level is None:
+            self.stale = True
+            return False
+        price, delta = level
+        book[price] = max(0, book[price] + delta)
+        best = self.best[side]
+        if book[price] > 0 and price > best:
+            self.best[side] = price
+        elif price == best and book[price] == 0:
+            self.best[side] = self._scan_best(side, price - 1)
+        if seq is not None:
+            self.seq = seq
+        self.updated_at = time.time()
+        return True
+
+    def _scan_best(self, side: str, start: int) -> int:
+        book = self.levels[side]
+        for p in range(start, MIN_PRICE - 1, -1):
+            if book[p] > 0:
+                return p
+        return 0
+
+    def best_bid(self, side: str = "yes"):
+        return self.best[side] or None
+
+    def best_ask(self, side: str = "yes"):
+        # Asking on one side means bidding on the other at 100 - p
+        other = self.best["no" if side == "yes" else "yes"]
+        return 100 - other if other else None
+
+    def spread(self, side: str = "yes"):
+        bid, ask = self.best_bid(side), self.best_ask(side)
+        return ask - bid if bid and ask else None
+
+    def depth(self, side: str = "yes", levels: int = 3) -> list:
+        """Top `levels` bid levels as [price, quantity], best first."""
+        book = self.levels[side]
+        out = []
+        for p in range(self.best[side], MIN_PRICE - 1, -1):
+            if book[p] > 0:
+                out.append([p, book[p]])
+                if len(out) == levels:
+                    break
+        return out
+
+    def side_levels(self, side: str) -> list:
+        """All levels as [price, quantity], ascending like the Kalshi API."""
+        book = self.levels[side]
+        return [[p, book[p]] for p in range(MIN_PRICE, MAX_PRICE + 1) if book[p] > 0]
+
+    def to_dict(self) -> dict:
+        return {
+            "orderbook": {"yes": self.side_levels("yes"), "no": self.side_levels("no")},
+            "ticker": self.ticker,
+            "seq": self.seq,
+            "updated_at": self.updated_at,
+            "age_ms": (time.time() - self.updated_at) * 1000 if self.updated_at else None,
+            "best_yes_bid": self.best_bid("yes"),
+            "best_yes_ask": self.best_ask("yes"),
+            "spread": self.spread("yes"),
+        }
+
+
+class QueueFeed:
+    """In-process delta feed: anything can `put()` messages for a book manager.
+
+    Messages use the Kalshi websocket shapes, e.g.
+    {"type": "orderbook_delta", "seq": 7, "msg": {"market_ticker": "X", "side": "yes", "price": 40, "delta": -5}}
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    def put(self, message: dict):
+        self.queue.put_nowait(message)
+
+    def close(self):
+        self.queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.queue.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+class OrderBookManager:
+    """Local order books per ticker, bootstrapped from snapshots and kept up by deltas.
+
+    `load_snapshot(ticker)` is an async callable returning the upstream
+    orderbook JSON. Deltas come from any async iterable of Kalshi-style
+    messages passed to `run()` or fed one by one to `ingest()`. Without a
+    live feed, books are re-snapshotted once older than `max_age` seconds.
+    """
+
+    def __init__(self, load_snapshot, max_age: float = None):
+        self.load_snapshot = load_snapshot
+        self.max_age = max_age if max_age is not None else float(os.getenv("ORDERBOOK_MAX_AGE", 2))
+        self.books = {}
+        self.live = set()
+        self._loading = {}
+
+    def book(self, ticker: str) -> OrderBook:
+        book = self.books.get(ticker)
+        if book is None:
+            book = self.books[ticker] = OrderBook(ticker)
+        return book
+
+    def ingest(self, message: dict):
+        kind = message.get("type")
+        msg = message.get("msg", {})
+        ticker = msg.get("market_ticker")
+        if not ticker:
+            return
+        book = self.book(ticker)
+        if kind == "orderbook_snapshot":
+            book.apply_snapshot(msg.get("yes"), msg.get("no"), message.get("seq"))
+            self.live.add(ticker)
+        elif kind == "orderbook_delta":
+            if not book.apply_delta(msg.get("side"), msg.get("price"), msg.get("delta"), message.get("seq")):
+                # Missed or malformed update: stop trusting the feed until a fresh snapshot
+                self.live.discard(ticker)
+
+    async def run(self, feed):
+        async for message in feed:
+            self.ingest(message)
+
+    def is_fresh(self, book: OrderBook) -> bool:
+        if book.stale or book.updated_at is None:
+            return False
+        return book.ticker in self.live or time.time() - book.updated_at < self.max_age
+
+    async def get(self, ticker: str) -> OrderBook:
+        book = self.book(ticker)
+        if self.is_fresh(book):
+            return book
+        # One snapshot request per ticker, shared by concurrent readers
+        task = self._loading.get(ticker)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._loading[ticker] = asyncio.ensure_future(self._snapshot(book))
+        return await asyncio.shield(task)
+
+    async def _snapshot(self, book: OrderBook) -> OrderBook:
+        data = await self.load_snapshot(book.ticker)
+        levels = data.get("orderbook") or {}
+        book.apply_snapshot(levels.get("yes"), levels.get("no"))
+        return book
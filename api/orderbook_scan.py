@@ -0,0 +1,93 @@
+import asyncio
+import os
+
+from api.orderbook import MAX_PRICE
+
+TOP_LEVELS = 3
+
+# Upper bounds on one scan request: parallel loads and books scanned
+MAX_SCAN_CONCURRENCY = int(os.getenv("ORDERBOOK_SCAN_MAX_CONCURRENCY", 50))
+MAX_SCAN_TICKERS = int(os.getenv("ORDERBOOK_SCAN_MAX_TICKERS", 1000))
+
+
+def book_stats(books: list, levels: int = TOP_LEVELS) -> list:
+    """Spread, top-of-book depth and imbalance for many books in one NumPy pass.
+
+    Every book's yes/no arrays are stacked into an (n, 2, 100) matrix without
+    copying per-level Python objects; all statistics are computed on that
+    matrix at once.
+    """
+    if not books:
+        return []
+    import numpy as np  # deferred: only scans need it, and it is slow to import
+
+    qty = np.stack([
+        np.stack([np.frombuffer(b.levels["yes"], dtype=np.int64), np.frombuffer(b.levels["no"], dtype=np.int64)])
+        for b in books
+    ])
+    prices = np.arange(MAX_PRICE + 1)
+    present = qty > 0
+    best = np.where(present, prices, 0).max(axis=-1)         # (n, 2) best bid per side
+
+    # Walk from the top of the book down: rank each resting level and keep the first `levels`
+    from_top = present[..., ::-1]
+    rank = np.cumsum(from_top, axis=-1)
+    depth = np.where(from_top & (rank <= levels), qty[..., ::-1], 0).sum(axis=-1)  # (n, 2)
+
+    yes_bid, no_bid = best[:, 0], best[:, 1]
+    has_spread = (yes_bid > 0) & (no_bid > 0)
+    spread = np.where(has_spread, 100 - no_bid - yes_bid, -1)
+    total = depth.sum(axis=-1)
+    imbalance = np.divide(depth[:, 0] - depth[:, 1], total, out=np.zeros(len(books)), where=total > 0)
+
+    return [
+        {
+            "ticker": b.ticker,
+            "best_yes_bid": int(yes_bid[i]) or None,
+            "best_yes_ask": int(100 - no_bid[i]) if no_bid[i] else None,
+            "spread": int(spread[i]) if has_spread[i] else None,
+            "yes_depth": int(depth[i, 0]),
+            "no_depth": int(depth[i, 1]),
+            "imbalance": round(float(imbalance[i]), 4),
+            "seq": b.seq,
+            "updated_at": b.updated_at,
+        }
+        for i, b in enumerate(books)
+    ]
+
+
+async def scan_orderbooks(manager, tickers: list, concurrency: int = None, limiter=None):
+    """Load many books concurrently and yield stats in batches as they complete.
+
+    At most `concurrency` loads run at once, and every upstream snapshot
+    waits for a token from `limiter`. Books the manager already holds fresh
+    are served locally without spending a token. `concurrency` is clamped
+    to 1..MAX_SCAN_CONCURRENCY.
+    """
+    concurrency = max(1, min(concurrency or int(os.getenv("ORDERBOOK_SCAN_CONCURRENCY", 10)), MAX_SCAN_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Queue()
+
+    async def load(ticker):
+        async with semaphore:
+            try:
+                if limiter is not None and not manager.is_fresh(manager.book(ticker)):
+                    await limiter.acquire()
+                done.put_nowait((ticker, await manager.get(ticker), None))
+            except Exception as e:
+                done.put_nowait((ticker, None, str(e)))
+
+    tasks = [asyncio.ensure_future(load(t)) for t in dict.fromkeys(tickers)]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            batch = [await done.get()]
+            while not done.empty():
+                batch.append(done.get_nowait())
+            remaining -= len(batch)
+            results = book_stats([book for _, book, _ in batch if book is not None])
+            results.extend({"ticker": ticker, "error": error} for ticker, _, error in batch if error)
+            yield results
+    finally:
+        for task in tasks:
+            task.cancel()
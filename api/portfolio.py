@@ -0,0 +1,237 @@
+import re
+
+from api.market_store import _int
+
+# Contracts settle at 100 cents
+PAYOUT = 100
+
+
+def cents(value) -> int:
+    """Integer cents from "$1,234.50", "1234.5", 12.5 or None (0)."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return round(value * 100)
+    match = re.search(r"-?\d[\d,]*(?:\.\d+)?", str(value))
+    if not match:
+        return 0
+    return round(float(match.group().replace(",", "")) * 100)
+
+
+def dollars(amount: int) -> str:
+    """"$1,234.50" from integer cents."""
+    sign = "-" if amount < 0 else ""
+    return f"{sign}${abs(amount) // 100:,}.{abs(amount) % 100:02d}"
+
+
+class Holding:
+    """One market's position, all in integer cents.
+
+    `position` is signed the way Kalshi reports it: YES contracts positive,
+    NO contracts negative. `cost` is the signed cost basis in YES terms
+    (sum of contracts x YES price), so one formula covers both sides:
+    unrealised P&L = position x YES mark - cost.
+    """
+
+    __slots__ = ("ticker", "position", "cost", "realized", "fees", "price", "exposure", "value")
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.position = 0
+        self.cost = 0
+        self.realized = 0
+        self.fees = 0
+        self.price = None     # held side's bid in cents, None until a market price is known
+        self.exposure = 0     # cost basis of the held side, what Kalshi reports as market_exposure
+        self.value = 0        # contracts x price, or the exposure while unpriced
+
+    @property
+    def contracts(self) -> int:
+        return abs(self.position)
+
+    @property
+    def side(self) -> str:
+        return "yes" if self.position >= 0 else "no"
+
+
+class Portfolio:
+    """Positions and fills as typed state, with running totals updated incrementally.
+
+    Every change to one holding (a fill, an upstream sync, a new mark)
+    subtracts its old exposure/value from the totals and adds the new ones,
+    so a price tick costs O(1) however many positions are open; nothing is
+    recomputed from scratch. Marks are the held side's bid: the YES bid for
+    YES positions, 100 - YES ask for NO positions.
+    """
+
+    def __init__(self):
+        self.holdings = {}
+        self.exposure = 0
+        self.value = 0
+        self.realized = 0
+        self.fees = 0
+        self.open = 0       # holdings with a non-zero position
+        self.marks = 0      # price ticks that changed a holding's value
+
+    def _remove(self, h: Holding):
+        self.exposure -= h.exposure
+        self.value -= h.value
+        self.realized -= h.realized
+        self.fees -= h.fees
+        self.open -= h.position != 0
+
+    def _add(self, h: Holding):
+        self.exposure += h.exposure
+        self.value += h.value
+        self.realized += h.realized
+        self.fees += h.fees
+        self.open += h.position != 0
+
+    @staticmethod
+    def _revalue(h: Holding):
+        contracts = h.contracts
+        h.exposure = h.cost if h.position >= 0 else contracts * PAYOUT + h.cost
+        h.value = contracts * h.price if h.price is not None else h.exposure
+
+    def holding(self, ticker: str) -> Holding:
+        h = self.holdings.get(ticker)
+        if h is None:
+            h = self.holdings[ticker] = Holding(ticker)
+        return h
+
+    def apply_fill(self, ticker: str, side: str, action: str, count: int, price: int, fee: int = 0):
+        """Book one fill at `price` cents for the side bought or sold (average-cost accounting)."""
+        h = self.holding(ticker)
+        self._remove(h)
+        # Everything in YES terms: buying NO at p is selling YES at 100 - p
+        delta = count if (side == "yes") == (action == "buy") else -count
+        yes_price = price if side == "yes" else PAYOUT - price
+        held = h.position
+        if held and (held > 0) != (delta > 0):
+            closed = min(abs(delta), abs(held))
+            sign = 1 if held > 0 else -1
+            removed = h.cost * closed // abs(held) if h.cost >= 0 else -(-h.cost * closed // abs(held))
+            h.realized += sign * closed * yes_price - removed
+            h.cost -= removed
+            h.position -= sign * closed
+            delta += sign * closed
+        h.position += delta
+        h.cost += delta * yes_price
+        h.fees += fee
+        if h.position == 0:
+            h.cost = 0
+        if (h.position > 0) != (held > 0) and h.position and held:
+            h.price = None  # flipped sides: the old mark is the other side's price
+        self._revalue(h)
+        self._add(h)
+        return h
+
+    def sync(self, market_positions: list, prices=None):
+        """Replace state with upstream `market_positions`; only holdings that changed are re-totalled."""
+        seen = set()
+        for p in market_positions:
+            ticker = p.get("ticker")
+            if not ticker:
+                continue
+            seen.add(ticker)
+            position = _int(p.get("position"))
+            exposure = _int(p.get("market_exposure"))
+            cost = exposure if position >= 0 else exposure - abs(position) * PAYOUT
+            realized, fees = _int(p.get("realized_pnl")), _int(p.get("fees_paid"))
+            h = self.holdings.get(ticker)
+            if h is not None and (h.position, h.cost, h.realized, h.fees) == (position, cost, realized, fees):
+                continue
+            h = h or self.holding(ticker)
+            self._remove(h)
+            if (position >= 0) != (h.position >= 0):
+                h.price = None
+            h.position, h.cost, h.realized, h.fees = position, cost, realized, fees
+            if prices is not None:
+                h.price = self._held_price(h, *prices(ticker)) or h.price
+            self._revalue(h)
+            self._add(h)
+        for ticker in [t for t in self.holdings if t not in seen]:
+            self._remove(self.holdings.pop(ticker))
+
+    @staticmethod
+    def _held_price(h: Holding, yes_bid: int, yes_ask: int, last_price: int = 0):
+        if h.position >= 0:
+            return yes_bid or last_price or None
+        return PAYOUT - yes_ask if 0 < yes_ask < PAYOUT else (PAYOUT - last_price if last_price else None)
+
+    def mark(self, ticker: str, yes_bid: int, yes_ask: int, last_price: int = 0) -> bool:
+        """Apply one price tick; True when it changed the holding's value."""
+        h = self.holdings.get(ticker)
+        if h is None or h.position == 0:
+            return False
+        price = self._held_price(h, yes_bid, yes_ask, last_price)
+        if price is None or price == h.price:  # no quote: keep the last mark
+            return False
+        old = h.value
+        h.price = price
+        h.value = h.contracts * price
+        self.value += h.value - old
+        self.marks += 1
+        return True
+
+    def mark_from(self, prices) -> int:
+        """Re-mark every holding from `prices(ticker) -> (yes_bid, yes_ask, last_price)`."""
+        changed = 0
+        for ticker in self.holdings:
+            changed += self.mark(ticker, *prices(ticker))
+        return changed
+
+    def positions(self) -> list:
+        rows = []
+        for h in self.holdings.values():
+            if h.position == 0 and not h.realized:
+                continue
+            contracts = h.contracts
+            rows.append({
+                "ticker": h.ticker,
+                "side": h.side,
+                "position": h.position,
+                "contracts_held": contracts,
+                "average_open_price_cents": h.exposure // contracts if contracts else None,
+                "current_price_cents": h.price,
+                "exposure_cents": h.exposure,
+                "market_value_cents": h.value,
+                "unrealized_pnl_cents": h.value - h.exposure,
+                "realized_pnl_cents": h.realized,
+                "fees_paid_cents": h.fees,
+            })
+        return rows
+
+    def allocation(self) -> dict:
+        """Share of total exposure per open market, in basis points.
+
+        Kept out of `positions()` rows: it moves for every market whenever
+        one position changes, which would defeat per-position deltas.
+        """
+        exposure = self.exposure
+        return {t: h.exposure * 10_000 // exposure if exposure else 0 for t, h in self.holdings.items() if h.position}
+
+    def totals(self) -> dict:
+        return {
+            "positions": self.open,
+            "exposure_cents": self.exposure,
+            "market_value_cents": self.value,
+            "unrealized_pnl_cents": self.value - self.exposure,
+            "realized_pnl_cents": self.realized,
+            "fees_paid_cents": self.fees,
+            "net_pnl_cents": self.value - self.exposure + self.realized - self.fees,
+        }
+
+
+def store_prices(store):
+    """`prices(ticker)` over a MarketStore: (yes_bid, yes_ask, last_price), zeros when unknown."""
+    by_ticker, columns = store.by_ticker, store.columns
+    bids, asks, lasts = columns["yes_bid"], columns["yes_ask"], columns["last_price"]
+
+    def prices(ticker):
+        row = by_ticker.get(ticker)
+        if row is None:
+            return 0, 0, 0
+        return bids[row], asks[row], lasts[row]
+
+    return prices
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class TokenBucket:
+    """Token bucket for pacing upstream calls: `rate` tokens/s, bursts up to `capacity`.
+
+    Meant for a single event loop; no locking is needed between awaits.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, n: float = 1) -> bool:
+        self._refill()
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+    def wait_time(self, n: float = 1) -> float:
+        """Seconds until `n` tokens are available."""
+        self._refill()
+        return max(0.0, (n - self.tokens) / self.rate)
+
+    async def acquire(self, n: float = 1):
+        while not self.try_acquire(n):
+            await asyncio.sleep(self.wait_time(n))
+
+
+READ = "read"
+WRITE = "write"
+# Admission order when both kinds are waiting for a connection slot
+PRIORITY = (WRITE, READ)
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when a request class already has too many callers queued."""
+
+
+class UpstreamScheduler:
+    """Admission control in front of every Kalshi call.
+
+    Reads and writes draw from separate token buckets, matching Kalshi's
+    separate read/write limits, and share `max_in_flight` connection slots.
+    Whenever a slot frees up, queued writes (order submit/cancel) are admitted
+    before queued reads. A 429 pauses only the class that was throttled, so
+    order traffic keeps flowing while reads queue up and, past `max_queue`,
+    are shed with `SchedulerOverloaded`.
+    """
+
+    def __init__(self, read_rate: float = 20, write_rate: float = 10, max_in_flight: int = 50,
+                 max_queue: dict = None, clock=time.monotonic):
+        self.clock = clock
+        self.buckets = {READ: TokenBucket(read_rate, clock=clock), WRITE: TokenBucket(write_rate, clock=clock)}
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue or {}
+        self.in_flight = 0
+        self._queues = {kind: deque() for kind in PRIORITY}
+        self._paused_until = {kind: 0.0 for kind in PRIORITY}
+        self._timer = None
+        self._timer_loop = None
+
+        # Counters
+        self.admitted = {kind: 0 for kind in PRIORITY}
+        self.rejected = {kind: 0 for kind in PRIORITY}
+        self.throttled = {kind: 0 for kind in PRIORITY}
+        self.wait_ms_total = {kind: 0.0 for kind in PRIORITY}
+        self.wait_ms_max = {kind: 0.0 for kind in PRIORITY}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            read_rate=float(os.getenv("KALSHI_READ_RATE", 20)),
+            write_rate=float(os.getenv("KALSHI_WRITE_RATE", 10)),
+            max_in_flight=int(os.getenv("KALSHI_MAX_IN_FLIGHT", 50)),
+            max_queue={READ: int(os.getenv("KALSHI_READ_QUEUE_LIMIT", 500))},
+        )
+
+    @staticmethod
+    def classify(method: str) -> str:
+        return READ if method.upper() in ("GET", "HEAD") else WRITE
+
+    async def acquire(self, kind: str):
+        queue = self._queues[kind]
+        limit = self.max_queue.get(kind)
+        if limit is not None and len(queue) >= limit:
+            self.rejected[kind] += 1
+            raise SchedulerOverloaded(f"{len(queue)} {kind} requests already queued")
+
+        start = self.clock()
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Granted a slot but the caller went away: hand it back
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        wait_ms = (self.clock() - start) * 1000
+        self.admitted[kind] += 1
+        self.wait_ms_total[kind] += wait_ms
+        self.wait_ms_max[kind] = max(self.wait_ms_max[kind], wait_ms)
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, kind: str):
+        await self.acquire(kind)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record_response(self, kind: str, status_code: int, retry_after: str = None):
+        """Feed back an upstream status; a 429 pauses this class of requests."""
+        if status_code != 429:
+            return
+        self.throttled[kind] += 1
+        try:
+            delay = float(retry_after) if retry_after else 1.0
+        except ValueError:
+            delay = 1.0
+        self._paused_until[kind] = max(self._paused_until[kind], self.clock() + delay)
+
+    def _dispatch(self):
+        now = self.clock()
+        next_wake = None
+        for kind in PRIORITY:
+            queue = self._queues[kind]
+            while queue and self.in_flight < self.max_in_flight:
+                if queue[0].done():  # caller cancelled while queued
+                    queue.popleft()
+                    continue
+                delay = max(self._paused_until[kind] - now, 0.0)
+                if not delay and not self.buckets[kind].try_acquire():
+                    delay = self.buckets[kind].wait_time()
+                if delay:
+                    next_wake = delay if next_wake is None else min(next_wake, delay)
+                    break
+                self.in_flight += 1
+                queue.popleft().set_result(None)
+        if next_wake is not None:
+            self._schedule(next_wake)
+
+    def _schedule(self, delay: float):
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        timer = self._timer
+        if timer is not None and self._timer_loop is loop and not timer.cancelled() and timer.when() <= when:
+            return
+        if timer is not None:
+            timer.cancel()
+        self._timer = loop.call_at(when, self._on_timer)
+        self._timer_loop = loop
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def stats(self) -> dict:
+        now = self.clock()
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "classes": {
+                kind: {
+                    "queue_depth": sum(1 for w in self._queues[kind] if not w.done()),
+                    "admitted": self.admitted[kind],
+                    "rejected": self.rejected[kind],
+                    "throttled": self.throttled[kind],
+                    "avg_wait_ms": self.wait_ms_total[kind] / self.admitted[kind] if self.admitted[kind] else 0.0,
+                    "max_wait_ms": self.wait_ms_max[kind],
+                    "paused_for_s": max(self._paused_until[kind] - now, 0.0),
+                    "tokens": round(self.buckets[kind].tokens, 2),
+                }
+                for kind in PRIORITY
+            },
+        }
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_strategy(text: str) -> str:
+    """Case, whitespace and trailing punctuation don't change what a strategy asks for."""
+    return re.sub(r"\s+", " ", text or "").strip().strip(".!?").strip().lower()
+
+
+def _cents(value) -> int:
+    value = float(value or 0)
+    # Accept dollar prices (0.55) as well as Kalshi's integer cents (55)
+    return int(round(value * 100 if 0 < value < 1 else value))
+
+
+def market_fingerprint(markets, price_bucket: int = None) -> str:
+    """Stable hash of the market snapshot a recommendation was generated against.
+
+    Prices are bucketed (RECO_CACHE_PRICE_BUCKET cents, default 5) so a one
+    cent tick doesn't throw every cached recommendation away. Pass only the
+    markets the prompt actually includes: over a whole universe some price
+    crosses a bucket on nearly every refresh, and nothing would ever hit.
+    """
+    bucket = price_bucket or int(os.getenv("RECO_CACHE_PRICE_BUCKET", 5))
+    digest = hashlib.blake2b(digest_size=16)
+    for m in sorted(markets, key=lambda m: m.get("ticker") or m.get("id") or ""):
+        prices = tuple(_cents(m.get(f)) // bucket for f in ("yes_bid", "yes_ask", "last_price"))
+        digest.update(f"{m.get('ticker') or m.get('id')}:{prices}|".encode())
+    return digest.hexdigest()
+
+
+class RecommendationCache:
+    """LRU + TTL cache of LLM recommendations, keyed by strategy and market snapshot.
+
+    Entries are tied to the market fingerprint they were generated against;
+    when `set_fingerprint()` sees a new snapshot, older entries are dropped
+    from memory. With `path` (or RECO_CACHE_PATH) entries are also written to
+    a SQLite file so they survive restarts; on disk they are only pruned by
+    TTL, since a restarted process may see the same snapshot again. From
+    async code use `aget` and `aput`, which do the SQLite work (lookups,
+    expiry deletes, writes and the startup prune) in a worker thread.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None, path: str = None, clock=time.time):
+        self.max_entries = max_entries or int(os.getenv("RECO_CACHE_MAX_ENTRIES", 256))
+        self.ttl = ttl if ttl is not None else float(os.getenv("RECO_CACHE_TTL", 900))
+        self.clock = clock
+        self.fingerprint = None
+        self._entries = OrderedDict()   # key -> (created_at, fingerprint, value, cost_ms)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_ms = 0.0
+
+        path = path or os.getenv("RECO_CACHE_PATH")
+        self._db = None
+        self._db_lock = threading.Lock()  # the connection is shared with `aput`'s worker threads
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS recommendations "
+                "(key TEXT PRIMARY KEY, created_at REAL, fingerprint TEXT, value TEXT, cost_ms REAL)"
+            )
+        self._prune_due = self._db is not None   # expired rows go on the first disk access, not at import
+
+    @staticmethod
+    def key(strategy: str, fingerprint: str, variant: str = "") -> str:
+        raw = f"{variant}\x00{normalize_strategy(strategy)}\x00{fingerprint}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def set_fingerprint(self, fingerprint: str):
+        """Record the current market snapshot, invalidating entries from older ones."""
+        if fingerprint == self.fingerprint:
+            return
+        self.fingerprint = fingerprint
+        stale = [k for k, entry in self._entries.items() if entry[1] != fingerprint]
+        for k in stale:
+            del self._entries[k]
+        self.invalidations += len(stale)
+        if self._db is not None:
+            self._prune_disk()
+
+    def _read_disk(self, key: str):
+        with self._db_lock:
+            if self._prune_due:
+                self._prune_due = False
+                self._db.execute("DELETE FROM recommendations WHERE created_at < ?", (self.clock() - self.ttl,))
+                self._db.commit()
+            row = self._db.execute(
+                "SELECT created_at, fingerprint, value, cost_ms FROM recommendations WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1], json.loads(row[2]), row[3]) if row else None
+
+    def _lookup(self, key: str, entry):
+        """Count and return a lookup's value; True when an expired entry must be dropped from disk."""
+        if entry is None or self.clock() - entry[0] > self.ttl:
+            self.misses += 1
+            if entry is None:
+                return None, False
+            self._entries.pop(key, None)
+            return None, self._db is not None
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.saved_ms += entry[3]
+        return entry[2], False
+
+    def get(self, strategy: str, variant: str = ""):
+        key = self.key(strategy, self.fingerprint, variant)
+        entry = self._entries.get(key)
+        if entry is None and self._db is not None:
+            entry = self._read_disk(key)
+        value, expired = self._lookup(key, entry)
+        if expired:
+            self._delete_disk(key)
+        return value
+
+    async def aget(self, strategy: str, variant: str = ""):
+        """`get` without blocking the event loop on the SQLite lookup or the expiry delete."""
+        key = self.key(strategy, self.fingerprint, variant)
+        entry = self._entries.get(key)
+        if entry is None and self._db is not None:
+            entry = await asyncio.to_thread(self._read_disk, key)
+        value, expired = self._lookup(key, entry)
+        if expired:
+            await asyncio.to_thread(self._delete_disk, key)
+        return value
+
+    def _put_memory(self, strategy: str, value, cost_ms: float, variant: str):
+        """Store in memory; returns the disk write to make, if any: (key, entry, evicted keys)."""
+        key = self.key(strategy, self.fingerprint, variant)
+        entry = (self.clock(), self.fingerprint, value, cost_ms)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False)[0])
+            self.evictions += 1
+        return (key, entry, evicted) if self._db is not None else None
+
+    def _write_disk(self, key: str, entry: tuple, evicted: list):
+        with self._db_lock:
+            self._db.executemany("DELETE FROM recommendations WHERE key = ?", [(k,) for k in evicted])
+            self._db.execute(
+                "INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?, ?)",
+                (key, entry[0], entry[1], json.dumps(entry[2]), entry[3]),
+            )
+            self._db.commit()
+
+    def put(self, strategy: str, value, cost_ms: float = 0.0, variant: str = ""):
+        write = self._put_memory(strategy, value, cost_ms, variant)
+        if write is not None:
+            self._write_disk(*write)
+
+    async def aput(self, strategy: str, value, cost_ms: float = 0.0, variant: str = ""):
+        """`put` without blocking the event loop on the SQLite write and commit."""
+        write = self._put_memory(strategy, value, cost_ms, variant)
+        if write is not None:
+            await asyncio.to_thread(self._write_disk, *write)
+
+    def _prune_disk(self):
+        with self._db_lock:
+            self._db.execute("DELETE FROM recommendations WHERE created_at < ?", (self.clock() - self.ttl,))
+            self._db.commit()
+
+    def _delete_disk(self, key: str):
+        with self._db_lock:
+            self._db.execute("DELETE FROM recommendations WHERE key = ?", (key,))
+            self._db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_ms": round(self.saved_ms, 1),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "fingerprint": self.fingerprint,
+            "persistent": self._db is not None,
+        }
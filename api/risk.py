@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import os
+import time
+
+from api.batch_orders import validate_order
+from api.market_store import _int
+from api.metrics import RISK_CHECKS, stage
+
+# Reason codes returned with every rejection (and used as the metric label)
+INVALID_ORDER = "invalid_order"
+ORDER_CONTRACTS = "max_order_contracts"
+ORDER_NOTIONAL = "max_order_notional"
+PRICE_COLLAR = "price_collar"
+MARKET_EXPOSURE = "market_exposure"
+EVENT_EXPOSURE = "event_exposure"
+ACCOUNT_EXPOSURE = "account_exposure"
+
+logger = logging.getLogger(__name__)
+
+
+class RiskRejected(Exception):
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+    def to_dict(self) -> dict:
+        return {"status": "rejected", "reason": self.reason, "error": str(self)}
+
+
+class RiskLimits:
+    """Pre-trade limits, all money in cents. A limit of 0 disables that check."""
+
+    def __init__(self, max_order_contracts: int = 1000, max_order_notional: int = 100_000,
+                 max_market_exposure: int = 250_000, max_event_exposure: int = 500_000,
+                 max_account_exposure: int = 1_000_000, price_collar: int = 25):
+        self.max_order_contracts = max_order_contracts
+        self.max_order_notional = max_order_notional
+        self.max_market_exposure = max_market_exposure
+        self.max_event_exposure = max_event_exposure
+        self.max_account_exposure = max_account_exposure
+        self.price_collar = price_collar
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_order_contracts=int(os.getenv("RISK_MAX_ORDER_CONTRACTS", 1000)),
+            max_order_notional=int(os.getenv("RISK_MAX_ORDER_NOTIONAL_CENTS", 100_000)),
+            max_market_exposure=int(os.getenv("RISK_MAX_MARKET_EXPOSURE_CENTS", 250_000)),
+            max_event_exposure=int(os.getenv("RISK_MAX_EVENT_EXPOSURE_CENTS", 500_000)),
+            # Defaults to the $10,000 balance the allocation summary assumes
+            max_account_exposure=int(os.getenv("RISK_MAX_ACCOUNT_EXPOSURE_CENTS", 1_000_000)),
+            price_collar=int(os.getenv("RISK_PRICE_COLLAR_CENTS", 25)),
+        )
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class RiskEngine:
+    """Pre-trade checks against running exposure counters per ticker, event and account.
+
+    Exposure is the worst-case cost of buys: contracts x the price of the
+    side bought. It is made of filled positions (`sync_filled`, e.g. from
+    the portfolio engine) plus accepted orders not yet reflected there
+    (reserved by `check`). A reservation is released when the upstream
+    refuses the order, and otherwise only by `reconcile` with upstream
+    state (see `RiskSync`): it shrinks to the unfilled part while the order
+    rests and goes once the order is done and its fills are in positions.
+    Until then a fill counts twice, which errs on the safe side. Every
+    check is a few dict lookups and integer comparisons, with no upstream
+    call. Sells only reduce risk and are checked for size alone.
+
+    `lookup(ticker) -> (event_ticker, yes_bid, yes_ask)` supplies the event
+    and quote for the collar check; unknown markets skip it.
+    """
+
+    def __init__(self, limits: RiskLimits = None, lookup=None, clock=time.monotonic):
+        self.limits = limits or RiskLimits.from_env()
+        self.lookup = lookup or (lambda ticker: ("", 0, 0))
+        self.clock = clock
+
+        self.filled = {}            # ticker -> (event, exposure)
+        self.ticker_exposure = {}   # ticker -> cents, filled + pending
+        self.event_exposure = {}    # event -> cents, filled + pending
+        self.account_exposure = 0
+        self.pending = {}           # order id -> (ticker, event, cents, submitted at or None while in flight)
+
+        # Counters
+        self.accepted = 0
+        self.rejected = {}
+
+    def _adjust(self, ticker: str, event: str, amount: int):
+        self.ticker_exposure[ticker] = self.ticker_exposure.get(ticker, 0) + amount
+        self.event_exposure[event] = self.event_exposure.get(event, 0) + amount
+        self.account_exposure += amount
+
+    def _reject(self, reason: str, message: str):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        RISK_CHECKS.inc("rejected", reason)
+        raise RiskRejected(reason, message)
+
+    def check(self, req, order_id: str) -> int:
+        """Accept `req` and reserve its exposure under `order_id`, or raise RiskRejected."""
+        with stage("risk_check"):
+            limits = self.limits
+            error = validate_order(req)
+            if error:
+                self._reject(INVALID_ORDER, error)
+            if limits.max_order_contracts and req.count > limits.max_order_contracts:
+                self._reject(ORDER_CONTRACTS, f"{req.count} contracts exceeds the {limits.max_order_contracts} per order limit")
+
+            event, yes_bid, yes_ask = self.lookup(req.ticker)
+            if req.action == "sell":
+                self.accepted += 1
+                RISK_CHECKS.inc("accepted", "")
+                return 0
+
+            # The order payload carries the price as the YES price
+            cost = req.count * (req.price if req.side == "yes" else 100 - req.price)
+            if limits.max_order_notional and cost > limits.max_order_notional:
+                self._reject(ORDER_NOTIONAL, f"Order cost {cost}c exceeds the {limits.max_order_notional}c per order limit")
+            if limits.price_collar and yes_bid and yes_ask:
+                mid = (yes_bid + yes_ask) / 2
+                if abs(req.price - mid) > limits.price_collar:
+                    self._reject(PRICE_COLLAR, f"Price {req.price}c is more than {limits.price_collar}c from the market mid {mid:g}c")
+            if limits.max_market_exposure and self.ticker_exposure.get(req.ticker, 0) + cost > limits.max_market_exposure:
+                self._reject(MARKET_EXPOSURE, f"{req.ticker} exposure would exceed {limits.max_market_exposure}c")
+            if limits.max_event_exposure and event and self.event_exposure.get(event, 0) + cost > limits.max_event_exposure:
+                self._reject(EVENT_EXPOSURE, f"Event {event} exposure would exceed {limits.max_event_exposure}c")
+            if limits.max_account_exposure and self.account_exposure + cost > limits.max_account_exposure:
+                self._reject(ACCOUNT_EXPOSURE, f"Account exposure would exceed {limits.max_account_exposure}c")
+
+            self.pending[order_id] = (req.ticker, event, cost, None)
+            self._adjust(req.ticker, event, cost)
+            self.accepted += 1
+            RISK_CHECKS.inc("accepted", "")
+            return cost
+
+    def release(self, order_id: str):
+        """Drop a reservation, e.g. when the upstream refused or failed the order."""
+        entry = self.pending.pop(order_id, None)
+        if entry is not None:
+            ticker, event, cost, _ = entry
+            self._adjust(ticker, event, -cost)
+
+    def submitted(self, order_id: str):
+        """Mark a reserved order as accepted upstream; from now on `reconcile` may settle it."""
+        entry = self.pending.get(order_id)
+        if entry is not None:
+            self.pending[order_id] = (*entry[:3], self.clock())
+
+    def reconcile(self, resting: dict, exposures, as_of: float):
+        """Settle reservations against upstream state fetched from `as_of` (this engine's clock) on.
+
+        `resting` maps the client order id of each resting buy to the cost
+        of its unfilled contracts; `exposures` are filled `(ticker, cents)`
+        pairs. Orders submitted before `as_of` that no longer rest are done
+        and their fills are in `exposures`, so their reservation goes; those
+        still resting keep only their unfilled cost. Orders in flight or
+        submitted since `as_of` are left alone.
+        """
+        self.sync_filled(exposures)
+        for order_id, (ticker, event, cost, at) in list(self.pending.items()):
+            if at is None or at >= as_of:
+                continue
+            left = resting.get(order_id)
+            if left is None:
+                self.release(order_id)
+            elif left < cost:
+                self.pending[order_id] = (ticker, event, left, at)
+                self._adjust(ticker, event, left - cost)
+
+    def sync_filled(self, exposures):
+        """Replace filled exposure with `(ticker, cents)` pairs; only changed tickers move the counters."""
+        seen = set()
+        for ticker, exposure in exposures:
+            seen.add(ticker)
+            event, old = self.filled.get(ticker, (None, 0))
+            if event is None:
+                event = self.lookup(ticker)[0]
+            if exposure != old:
+                self._adjust(ticker, event, exposure - old)
+                self.filled[ticker] = (event, exposure)
+        for ticker in [t for t in self.filled if t not in seen]:
+            event, old = self.filled.pop(ticker)
+            self._adjust(ticker, event, -old)
+
+    def stats(self) -> dict:
+        return {
+            "limits": self.limits.to_dict(),
+            "account_exposure_cents": self.account_exposure,
+            "pending_orders": len(self.pending),
+            "filled_markets": len(self.filled),
+            "accepted": self.accepted,
+            "rejected": dict(self.rejected),
+        }
+
+
+def resting_cost(order: dict) -> int:
+    """Cost in cents of a resting upstream order's unfilled contracts (0 for sells)."""
+    if order.get("action", "buy") != "buy":
+        return 0
+    price = order.get("yes_price") if order.get("side") == "yes" else order.get("no_price")
+    return _int(order.get("remaining_count")) * _int(price)
+
+
+class RiskSync:
+    """Background service reconciling a RiskEngine with upstream orders and positions.
+
+    Every `interval` seconds fetches resting orders and positions and calls
+    `RiskEngine.reconcile`, so reservations follow orders to a terminal
+    state whether or not anyone polls /api/positions. A failed sync keeps
+    every reservation and is retried on the next tick. `engine()` returns
+    the RiskEngine to reconcile, looked up on every sync.
+    """
+
+    def __init__(self, engine, client, interval: float = None):
+        self.engine = engine
+        self.client = client    # KalshiClient or KalshiSession: anything with async request(method, path)
+        self.interval = interval if interval is not None else float(os.getenv("RISK_SYNC_SECONDS", 10))
+        self._task = None
+
+        # Counters
+        self.syncs = 0
+        self.errors = 0
+
+    async def _get_all(self, path: str, key: str, params: dict = None) -> list:
+        items, cursor = [], None
+        while True:
+            response = await self.client.request("GET", path, params={**(params or {}), **({"cursor": cursor} if cursor else {})})
+            response.raise_for_status()
+            data = response.json()
+            items += data.get(key) or []
+            cursor = data.get("cursor")
+            if not cursor:
+                return items
+
+    async def sync(self):
+        risk = self.engine()
+        as_of = risk.clock()
+        orders = await self._get_all("/portfolio/orders", "orders", {"status": "resting"})
+        positions = await self._get_all("/portfolio/positions", "market_positions")
+        resting = {o["client_order_id"]: resting_cost(o) for o in orders if o.get("client_order_id")}
+        exposures = [(p["ticker"], _int(p.get("market_exposure"))) for p in positions
+                     if p.get("ticker") and _int(p.get("position"))]
+        risk.reconcile(resting, exposures, as_of)
+        self.syncs += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Risk sync failed: %s", e)
+
+    async def start(self):
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._run())
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"interval": self.interval, "syncs": self.syncs, "errors": self.errors}
@@ -0,0 +1,67 @@
+import importlib
+import inspect
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def preload(*modules):
+    """Hook that imports `modules` so the first request doesn't pay for them."""
+
+    def load():
+        for name in modules:
+            importlib.import_module(name)
+
+    load.__name__ = load.__qualname__ = f"import {', '.join(modules)}"
+    return load
+
+
+class WarmUp:
+    """Optional start-up hook for cold-start-sensitive deployments.
+
+    Heavy modules and clients are built lazily on first use; hooks registered
+    here pay those costs ahead of time instead. They run from the app lifespan
+    when WARMUP_ON_STARTUP is set, or on demand via `run()` (e.g. from an
+    endpoint hit by a scheduled ping). A failing hook is logged, never raised.
+    """
+
+    def __init__(self, *hooks, enabled: bool = None):
+        self.hooks = list(hooks)
+        if enabled is None:
+            enabled = os.getenv("WARMUP_ON_STARTUP", "false").lower() in ["true", "1", "yes"]
+        self.enabled = enabled
+        self.timings = {}
+        self.runs = 0
+
+    def hook(self, fn):
+        self.hooks.append(fn)
+        return fn
+
+    async def run(self) -> dict:
+        """Run every hook once; returns milliseconds spent per hook."""
+        timings = {}
+        for fn in self.hooks:
+            name = getattr(fn, "__qualname__", None) or getattr(fn, "__name__", repr(fn))
+            start = time.perf_counter()
+            try:
+                result = fn()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning("Warm-up hook %s failed: %s", name, e)
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+        self.timings = timings
+        self.runs += 1
+        return timings
+
+    async def start(self):
+        if self.enabled:
+            await self.run()
+
+    async def aclose(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "runs": self.runs, "timings_ms": self.timings}
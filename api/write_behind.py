@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+import httpx
+
+from api.metrics import STAGE_LATENCY, UPSTREAM_ERRORS, UPSTREAM_RESPONSES
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Buffers rows off the request path and bulk-inserts them in the background.
+
+    Rows are grouped per table and flushed as one POST with a JSON array body
+    (PostgREST / Supabase bulk insert) once `max_batch` rows are waiting or
+    every `flush_interval` seconds. Failed flushes are retried with
+    exponential backoff; if the sink stays down the rows are appended to a
+    local JSONL spill file and replayed after the next successful flush.
+    `aclose()` lets a write in progress finish rather than cancelling it,
+    and cuts retry backoff short by spilling instead. The spill file lives
+    in the temp dir by default (the working directory is read-only on
+    Vercel); if it can't be written either, the rows are logged and counted
+    as dropped and the background task keeps running.
+    """
+
+    def __init__(self, base_url: str, headers: dict = None, max_batch: int = None, flush_interval: float = None,
+                 max_retries: int = 3, backoff: float = 0.5, spill_path: str = None,
+                 transport: httpx.AsyncBaseTransport = None):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers or {}
+        self.max_batch = max_batch or int(os.getenv("WRITE_BEHIND_MAX_BATCH", 50))
+        self.flush_interval = flush_interval or float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", 2))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.spill_path = spill_path or os.getenv("WRITE_BEHIND_SPILL_PATH") or os.path.join(
+            tempfile.gettempdir(), "write_behind_spill.jsonl")
+        self.transport = transport
+        self._buffers = {}
+        self._client = None
+        self._task = None
+        self._wake = None
+        self._stop = None
+        self._closing = False
+
+        # Counters
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Content-Type": "application/json", "Prefer": "return=minimal", **self.headers},
+                timeout=10,
+                transport=self.transport,
+            )
+        return self._client
+
+    def pending(self) -> int:
+        return sum(len(rows) for rows in self._buffers.values())
+
+    def enqueue(self, table: str, record: dict):
+        """Buffer one row; never blocks or touches the network."""
+        rows = self._buffers.setdefault(table, [])
+        rows.append(record)
+        self.enqueued += 1
+        self._ensure_running()
+        if len(rows) >= self.max_batch and self._wake is not None:
+            self._wake.set()
+
+    async def start(self):
+        self._ensure_running()
+        await self.replay_spill()
+
+    def _ensure_running(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet; rows wait for start() or the next enqueue inside one
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._stop = asyncio.Event()
+            self._closing = False
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Write-behind flush failed")
+
+    async def flush(self):
+        """Write everything buffered so far, one bulk insert per table."""
+        for table in list(self._buffers):
+            rows = self._buffers.pop(table, [])
+            for i in range(0, len(rows), self.max_batch):
+                try:
+                    await self._write(table, rows[i:i + self.max_batch])
+                except asyncio.CancelledError:
+                    # Cancelled mid-write or mid-backoff (e.g. by aclose): keep the unwritten rows on disk.
+                    # Written inline: awaiting a thread here could itself be cancelled
+                    self._spill_rows(table, rows[i:])
+                    raise
+
+    async def _write(self, table: str, rows: list) -> bool:
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = await self.client.post(f"/{table}", json=rows)
+                STAGE_LATENCY.observe(time.perf_counter() - start, "persistence_write")
+                UPSTREAM_RESPONSES.inc("supabase", "POST", str(response.status_code))
+                if response.status_code < 300:
+                    self.batches += 1
+                    self.written += len(rows)
+                    await self.replay_spill()
+                    return True
+                if response.status_code != 429 and response.status_code < 500:
+                    # The sink rejected the rows themselves; retrying won't help
+                    logger.error("Write-behind insert into %s rejected: %s %s", table, response.status_code, response.text)
+                    self.dropped += len(rows)
+                    return False
+                error = f"{response.status_code} {response.text}"
+            except httpx.HTTPError as e:
+                STAGE_LATENCY.observe(time.perf_counter() - start, "persistence_write")
+                UPSTREAM_ERRORS.inc("supabase", "POST")
+                error = str(e)
+            if attempt < self.max_retries and not self._closing:
+                self.retries += 1
+                await self._backoff(self.backoff * 2 ** attempt)
+        logger.error("Write-behind sink unavailable (%s); spilling %d rows to %s", error, len(rows), self.spill_path)
+        await asyncio.to_thread(self._spill_rows, table, rows)
+        return False
+
+    async def _backoff(self, delay: float):
+        """Sleep before a retry; returns early when aclose() is called."""
+        if self._stop is None:
+            await asyncio.sleep(delay)
+            return
+        try:
+            await asyncio.wait_for(self._stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _spill_rows(self, table: str, rows: list):
+        try:
+            with open(self.spill_path, "a") as f:
+                for row in rows:
+                    f.write(json.dumps({"table": table, "record": row}) + "\n")
+        except OSError as e:
+            logger.error("Write-behind spill to %s failed (%s); dropping %d rows", self.spill_path, e, len(rows))
+            self.dropped += len(rows)
+            return
+        self.spilled += len(rows)
+
+    def _take_spill(self) -> list:
+        """Spilled items, removing the file; [] when there is none or it can't be read."""
+        if not os.path.exists(self.spill_path):
+            return []
+        # Move the file aside first so a failing replay spills into a fresh one
+        replay_path = f"{self.spill_path}.{int(time.time() * 1000)}.replay"
+        try:
+            os.replace(self.spill_path, replay_path)
+            with open(replay_path) as f:
+                items = [json.loads(line) for line in f if line.strip()]
+            os.remove(replay_path)
+        except (OSError, ValueError) as e:
+            logger.error("Write-behind spill replay from %s failed: %s", self.spill_path, e)
+            return []
+        return items
+
+    async def replay_spill(self):
+        """Re-queue rows spilled while the sink was down (file I/O off the event loop)."""
+        if not os.path.exists(self.spill_path):
+            return
+        items = await asyncio.to_thread(self._take_spill)
+        for item in items:
+            self._buffers.setdefault(item["table"], []).append(item["record"])
+        self.replayed += len(items)
+        if items and self._wake is not None:
+            self._wake.set()
+
+    async def aclose(self):
+        """Stop the background task once its current flush is done, then flush what is left.
+
+        While closing, failed writes are spilled at once instead of retried.
+        """
+        self._closing = True
+        if self._task is not None:
+            if self._task.get_loop() is asyncio.get_running_loop():
+                self._stop.set()
+                self._wake.set()
+                await self._task
+            else:
+                self._task.cancel()  # left over from a loop that is gone
+            self._task = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+        }
@@ -3,14 +3,18 @@
 import { useEffect, useState } from "react";
 import RequireAuth from "../../components/require-auth";
 
+// Computed server-side by the portfolio engine; money in integer cents
 type Position = {
   ticker: string;
+  side: "yes" | "no";
   contracts_held: number;
-  average_open_price: number;
-  current_price: number;
-  pnl: number;
+  average_open_price_cents: number | null;
+  current_price_cents: number | null;
+  unrealized_pnl_cents: number;
 };
 
+const dollars = (cents: number | null) => (cents == null ? "—" : `$${(cents / 100).toFixed(2)}`);
+
 export default function PortfolioPage() {
   const [positions, setPositions] = useState<Position[]>([]);
   const [loading, setLoading] = useState(true);
@@ -49,11 +53,11 @@ export default function PortfolioPage() {
                 {positions.map((pos, i) => (
                   <tr key={i} className="border-t">
                     <td className="p-3 font-medium">{pos.ticker}</td>
-                    <td className="p-3">{pos.contracts_held}</td>
-                    <td className="p-3">${pos.average_open_price.toFixed(2)}</td>
-                    <td className="p-3">${pos.current_price.toFixed(2)}</td>
-                    <td className={`p-3 font-medium ${pos.pnl >= 0 ? "text-green-600" : "text-red-600"}`}>
-                      ${pos.pnl.toFixed(2)}
+                    <td className="p-3">{pos.contracts_held} {pos.side.toUpperCase()}</td>
+                    <td className="p-3">{dollars(pos.average_open_price_cents)}</td>
+                    <td className="p-3">{dollars(pos.current_price_cents)}</td>
+                    <td className={`p-3 font-medium ${pos.unrealized_pnl_cents >= 0 ? "text-green-600" : "text-red-600"}`}>
+                      {dollars(pos.unrealized_pnl_cents)}
                     </td>
                   </tr>
                 ))}
@@ -1,42 +1,39 @@
-print("✅ FastAPI main.py is being loaded")
-
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, BackgroundTasks
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import os
-import requests
 import json
-from dotenv import load_dotenv
 import traceback
-from openai import OpenAI
 import re
 from datetime import datetime
 import logging
-from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.backends import default_backend
-import base64
+import time
+from api.kalshi_client import KalshiClient, client_lifespan
+from api.exchange_sim import Exchange, ExchangeTransport
+from api.kalshi_session import KalshiSession
+from api.rate_limit import UpstreamScheduler
+from api.market_cache import MarketCache
+from api.market_store import MarketStore, SORT_FIELDS
+from api.market_crawler import fetch_all_markets
+from api.reco_cache import RecommendationCache
+from api.write_behind import WriteBehindQueue
+from api.warmup import WarmUp, preload
+from api.fast_json import FastJSONResponse
+from api.portfolio import cents, dollars
+from api.risk import RiskEngine, RiskRejected, RiskSync
+from api.metrics import CONTENT_TYPE, REGISTRY, STAGE_LATENCY, MetricsMiddleware, expose_stats, stage
+from api.structured_log import RequestIdMiddleware, request_id_var, setup_logging
 from uuid import uuid4
-from concurrent.futures import ThreadPoolExecutor
-
-# Simple debug trace file - accessible to all in the codebase
-def log_to_file(message):
-    with open("kalshi_debug.txt", "a") as f:
-        f.write(f"{datetime.now().isoformat()} - {message}\n")
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("kalshi_api.log"),
-        logging.StreamHandler()
-    ]
-)
+
+# JSON log lines, written to stdout (and LOG_FILE) by a background thread; see LOG_*
+setup_logging()
 logger = logging.getLogger("kalshi_assistant")
 
-# Load environment variables
-load_dotenv()
+# Load environment variables from a local .env (Docker/Vercel pass them in directly)
+if os.path.exists(".env"):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # Kalshi API configuration
 KALSHI_API_KEY = os.getenv("KALSHI_API_KEY")
@@ -47,42 +44,83 @@ IS_DEMO = os.getenv("IS_DEMO", "false").lower() in ["true", "1", "yes"]
 
 # OpenAI API configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Only initialize the client if we have a valid API key
-# For environment placeholders, we treat them as not having a key
-if OPENAI_API_KEY and "your_" not in OPENAI_API_KEY and len(OPENAI_API_KEY) > 30:
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    print(f"OpenAI API key found and appears valid")
-else:
-    client = None
-    if OPENAI_API_KEY:
-        print(f"OpenAI API key found but appears to be a placeholder or invalid")
-    else:
-        print(f"No OpenAI API key found")
+OPENAI_MODEL = "gpt-4"
+# Built by openai_client() on first use; importing openai alone costs ~0.5s of cold start
+client = None
+
+def openai_client():
+    """The shared AsyncOpenAI client, or None without a valid API key.
+
+    Environment placeholders (e.g. "your_openai_key") count as no key.
+    """
+    global client
+    if client is None and OPENAI_API_KEY and "your_" not in OPENAI_API_KEY and len(OPENAI_API_KEY) > 30:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return client
 
 # Set the appropriate API base URL (demo or production)
 if IS_DEMO:
     KALSHI_API_BASE = "https://demo-api.kalshi.co/trade-api/v2"
-    print("Using DEMO Kalshi API environment")
     # Override IS_DEMO to a string for comparison in the get_trade_feed function
     IS_DEMO = "true"
 else:
     KALSHI_API_BASE = "https://trading-api.kalshi.com/trade-api/v2"
-    print("Using PRODUCTION Kalshi API environment")
+# KALSHI_API_BASE overrides both, e.g. to point at a local fake or simulator
+KALSHI_API_BASE = os.getenv("KALSHI_API_BASE") or KALSHI_API_BASE
+
+logger.info(
+    "API environment: %s | Kalshi key: %s, secret: %s, email/password: %s | OpenAI key: %s",
+    "DEMO" if IS_DEMO else "PRODUCTION",
+    bool(KALSHI_API_KEY), bool(KALSHI_API_SECRET), bool(KALSHI_EMAIL and KALSHI_PASSWORD), bool(OPENAI_API_KEY),
+)
 
-# Print environment variables for debugging (sensitive info will be masked)
-print(f"KALSHI_API_KEY: {'Present' if KALSHI_API_KEY else 'Not set'}")
-print(f"KALSHI_EMAIL: {'Present' if KALSHI_EMAIL else 'Not set'}")
-print(f"KALSHI_PASSWORD: {'Present' if KALSHI_PASSWORD else 'Not set'}")
-print(f"KALSHI_API_SECRET: {'Present' if KALSHI_API_SECRET else 'Not set'}")
-print(f"OpenAI client initialized: {client is not None}")
-print(f"API Environment: {'DEMO' if IS_DEMO else 'PRODUCTION'}")
+# Rate limits and write-before-read priority for every Kalshi call
+scheduler = UpstreamScheduler.from_env()
 
-# Add diagnostic info for Vercel deployment
-print("🧪 DEBUG - KALSHI_API_KEY loaded?", bool(KALSHI_API_KEY))
-print("🧪 DEBUG - KALSHI_EMAIL/PASSWORD loaded?", bool(KALSHI_EMAIL and KALSHI_PASSWORD))
-print("🧪 DEBUG - OPENAI_API_KEY loaded?", bool(OPENAI_API_KEY))
+# Shared connection pool for every Kalshi call, opened/closed with the app
+kalshi = KalshiClient(KALSHI_API_BASE, KALSHI_API_KEY, KALSHI_API_SECRET, scheduler=scheduler)
 
-app = FastAPI()
+# KALSHI_SIMULATOR serves every Kalshi call from an in-process exchange, no credentials needed
+KALSHI_SIMULATOR = os.getenv("KALSHI_SIMULATOR", "false").lower() in ["true", "1", "yes"]
+exchange = Exchange.from_env() if KALSHI_SIMULATOR else None
+if exchange is not None:
+    kalshi.transport = ExchangeTransport(exchange)
+    kalshi.http2 = False
+
+# Email/password auth: one cached session token instead of a login per request
+if KALSHI_EMAIL and KALSHI_PASSWORD and not KALSHI_API_KEY:
+    session = KalshiSession(kalshi, KALSHI_EMAIL, KALSHI_PASSWORD)
+else:
+    session = None
+
+# Supabase writes are buffered and bulk-inserted off the request path
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+if SUPABASE_URL and SUPABASE_SERVICE_KEY:
+    persistence = WriteBehindQueue(
+        f"{SUPABASE_URL.rstrip('/')}/rest/v1",
+        {"apikey": SUPABASE_SERVICE_KEY, "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}"},
+    )
+else:
+    persistence = None
+
+# Cold-start costs paid ahead of the first request when WARMUP_ON_STARTUP is set
+warmup = WarmUp(kalshi.warm, preload("openai"), openai_client)
+
+# Settles risk reservations against upstream resting orders and positions every RISK_SYNC_SECONDS
+if KALSHI_API_KEY or session is not None or exchange is not None:
+    risk_sync = RiskSync(lambda: risk, session or kalshi)
+else:
+    risk_sync = None  # orders are only simulated and never reserve exposure
+
+app = FastAPI(lifespan=client_lifespan(kalshi, warmup, *[s for s in (exchange, session, risk_sync, persistence) if s is not None]))
+
+# Request counts and latency per route; scraped from /api/metrics
+app.add_middleware(MetricsMiddleware)
+
+# Request id on every log line and on the X-Request-ID response header
+app.add_middleware(RequestIdMiddleware)
 
 # Add CORS middleware to allow frontend requests
 app.add_middleware(
@@ -163,29 +201,26 @@ dummy_recommendations = [
     }
 ]
 
+# Assumed account balance, 40% of it held back as a base
+STARTING_BALANCE_CENTS = 1_000_000
+RESERVED_BASE_CENTS = STARTING_BALANCE_CENTS * 40 // 100
+
+def allocation_for(recommendations):
+    """Allocation summary from the recommendations' "cost" strings, summed in integer cents."""
+    total = sum(cents(rec.get("cost")) for rec in recommendations if isinstance(rec, dict))
+    return {
+        "total_allocated": dollars(total),
+        "remaining_balance": dollars(STARTING_BALANCE_CENTS - total),
+        "reserved_base": dollars(RESERVED_BASE_CENTS)
+    }
+
 # Add allocation data to the dummy response
 def add_allocation_to_recommendations(recommendations, strategy=None):
     """Add allocation data to recommendations response."""
-    # Calculate total cost based on recommendations
-    total_cost = sum(float(rec.get("cost", "0").replace("$", "").replace(",", "")) 
-                     for rec in recommendations if isinstance(rec, dict))
-    
-    # Format as currency
-    total_cost_formatted = f"${total_cost:,.2f}"
-    
-    # Assuming starting balance of $10,000
-    starting_balance = 10000
-    remaining = starting_balance - total_cost
-    reserved = starting_balance * 0.4  # 40% reserved as base
-    
     return {
         "strategy": strategy,
         "recommendations": recommendations,
-        "allocation": {
-            "total_allocated": total_cost_formatted,
-            "remaining_balance": f"${remaining:,.2f}",
-            "reserved_base": f"${reserved:,.2f}"
-        },
+        "allocation": allocation_for(recommendations),
         "source": "dummy"
     }
 
@@ -205,95 +240,248 @@ async def health_check():
     """Health check endpoint to verify the API is working"""
     return {"status": "ok", "message": "Kalshi Trading Assistant API is running"}
 
+@app.get("/api/warmup")
+async def run_warmup():
+    """Import heavy modules and build lazily-created clients now instead of on first use"""
+    await warmup.run()
+    return warmup.stats()
+
+async def fetch_markets():
+    """Fetch every page of /markets upstream; only runs when the market cache refreshes."""
+    headers = None  # signed per page by the shared client
+    if KALSHI_API_KEY and not KALSHI_API_SECRET:
+        headers = {"Authorization": f"Bearer {KALSHI_API_KEY}"}
+
+    start = time.perf_counter()
+    if session is not None:
+        # Re-crawls once with a fresh token if the session expired upstream
+        markets = await session.call(lambda auth: fetch_all_markets(kalshi, headers=auth))
+    else:
+        markets = await fetch_all_markets(kalshi, headers=headers)
+    logger.info("Fetched markets", extra={"count": len(markets), "ms": round((time.perf_counter() - start) * 1000, 1)})
+    return markets
+
+# Shared by every client polling the feed; see MARKET_CACHE_TTL / MARKET_CACHE_MAX_STALE
+market_cache = MarketCache(fetch_markets)
+
+# Indexed copy of the latest snapshot (with spread/mid), rebuilt on every refresh
+market_store = MarketStore()
+
+@market_cache.subscribe
+def rebuild_market_store(snapshot):
+    global market_store
+    market_store = MarketStore.from_snapshot(snapshot)
+
+def market_lookup(ticker: str):
+    """(event_ticker, yes_bid, yes_ask) from the cached market store, blanks if unknown."""
+    store = market_store
+    row = store.by_ticker.get(ticker)
+    if row is None:
+        return "", 0, 0
+    return store.event_tickers[row], store.columns["yes_bid"][row], store.columns["yes_ask"][row]
+
+# Pre-trade limits on every order; see RISK_* for the limits
+risk = RiskEngine(lookup=market_lookup)
+
+# LLM recommendations keyed by normalised strategy; see RECO_CACHE_*. The prompt carries no
+# market data, so entries aren't tied to a market snapshot: RECO_CACHE_TTL bounds their age.
+reco_cache = RecommendationCache()
+
 @app.get("/feed")
 @app.get("/api/feed")
-def get_trade_feed():
-    print("🚦 Feed endpoint called.")
-    print("🔍 IS_DEMO:", IS_DEMO)
-    print("🔍 API Key present:", "✅" if KALSHI_API_KEY else "❌", "| Secret present:", "✅" if KALSHI_API_SECRET else "❌")
-    print("🔍 Email/Password present:", "✅" if KALSHI_EMAIL and KALSHI_PASSWORD else "❌")
+async def get_trade_feed(request: Request, sort: str = "volume", limit: int = 10, category: str = None, min_volume: int = None):
+    logger.debug("Feed requested", extra={"sort": sort, "limit": limit, "category": category})
 
-    base_domain = "https://demo-api.kalshi.co" if IS_DEMO else "https://trading-api.kalshi.com"
-    api_base = f"{base_domain}/trade-api/v2"
+    if exchange is None and not KALSHI_API_KEY and not (KALSHI_EMAIL and KALSHI_PASSWORD):
+        logger.debug("No Kalshi credentials, returning dummy feed")
+        return {"markets": dummy_markets, "source": "dummy"}
 
-    headers = {}
-    
     try:
-        if KALSHI_API_KEY and KALSHI_API_SECRET:
-            print("🔐 Using Kalshi API Key + Secret")
-            key_data = KALSHI_API_SECRET.replace("\\n", "\n")
-
-            private_key = serialization.load_pem_private_key(
-                key_data.encode(), password=None, backend=default_backend()
-            )
-
-            ts_ms = int(datetime.now().timestamp() * 1000)
-            message = f"{ts_ms}GET/trade-api/v2/markets"
-
-            signature = private_key.sign(
-                message.encode("utf-8"),
-                padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
-                hashes.SHA256()
-            )
-            signature_b64 = __import__("base64").b64encode(signature).decode("utf-8")
-
-            headers.update({
-                "KALSHI-ACCESS-KEY": KALSHI_API_KEY,
-                "KALSHI-ACCESS-TIMESTAMP": str(ts_ms),
-                "KALSHI-ACCESS-SIGNATURE": signature_b64
-            })
-        elif KALSHI_API_KEY and not KALSHI_API_SECRET:
-            print("⚠️ Using Bearer token (API key only)")
-            headers["Authorization"] = f"Bearer {KALSHI_API_KEY}"
-
-        elif KALSHI_EMAIL and KALSHI_PASSWORD:
-            print("🔑 Using email/password login")
-            login_url = f"{api_base}/log_in"  # ✅ Must be /log_in, NOT /login
-            resp = requests.post(login_url, json={"email": KALSHI_EMAIL, "password": KALSHI_PASSWORD})
-            if resp.status_code != 200:
-                raise Exception(f"Login failed: {resp.text}")
-            token = resp.json().get("token")
-            headers["Authorization"] = f"Bearer {token}"
-        else:
-            print("❌ No Kalshi credentials — returning dummy data")
-            return {"markets": dummy_markets, "source": "dummy"}
-
-        url = f"{api_base}/markets"
-        print(f"📡 Requesting {url}")
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        markets = data.get("markets", data)
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unsupported sort field: {sort}")
+        await market_cache.get()
+        store = market_store
 
-        print(f"✅ Fetched {len(markets)} markets")
+        # Heap selection over the cached set, e.g. sort=volume (most active), sort=spread (tightest)
+        rows = store.select(category=category, min_volume=min_volume)
         formatted = []
-        for m in markets[:10]:
-            yes_price = m.get("yes_bid") or m.get("last_price") or 0
+        for i in store.top(rows, limit, sort):
+            m = store.row(i)
+            yes_price = m["yes_bid"] or m["last_price"] or 0
             formatted.append({
-                "title": m.get("title") or m.get("ticker", "Unknown Market"),
-                "category": m.get("category", "unknown"),
+                "ticker": m["ticker"],
+                "title": m["title"],
+                "category": m["category"],
                 "yes_price": yes_price,
-                "volume": m.get("volume", 0)
+                "volume": m["volume"],
+                "spread": m["spread"],
+                "mid": m["mid"]
             })
 
-        return {"markets": formatted, "source": "kalshi"}
+        return FastJSONResponse({"markets": formatted, "source": "kalshi"}, request=request)
 
     except Exception as e:
-        print("❌ Error fetching markets:", e)
+        logger.error("Error fetching markets: %s", e)
         return {
             "markets": dummy_markets,
             "source": "error",
             "error": str(e)
         }
 
+@app.get("/api/feed/stats")
+async def get_feed_stats():
+    """Market cache hit/miss and refresh latency counters"""
+    return market_cache.stats()
+
+@app.get("/api/simulator")
+async def get_simulator():
+    """Exchange simulator balance, order and fill counters (KALSHI_SIMULATOR)"""
+    return exchange.stats() if exchange else {"enabled": False}
+
+@app.get("/api/session/stats")
+async def get_session_stats():
+    """Email/password session: logins, token reuse and 401 re-logins"""
+    return session.stats() if session else {"enabled": False}
+
+@app.get("/api/upstream/stats")
+async def get_upstream_stats():
+    """Upstream scheduler queue depth, wait time and 429 counters"""
+    return scheduler.stats()
+
+def build_openai_prompt(strategy_text):
+    return (
+        "You are a Kalshi trading assistant.\n\n"
+        f"Given this strategy:\n\"\"\"{strategy_text}\"\"\"\n\n"
+        "Scan live Kalshi markets and generate 2–3 trades with the following fields:\n"
+        "- Market\n- Action (Buy YES / NO)\n- Probability\n- Position (price or range)\n- Contracts\n- Cost\n- Target Exit\n- Stop Loss\n- Reason (1 sentence)\n\n"
+        "Then add a fund summary at the bottom:\n- Total Allocated\n- Remaining Balance\n- Reserved Base\n\n"
+        "Respond in Markdown. DO NOT add any extra explanation."
+    )
+
+def openai_messages(prompt):
+    return [
+        {"role": "system", "content": "You are a Kalshi AI trade strategist."},
+        {"role": "user", "content": prompt}
+    ]
+
+async def stream_openai(prompt):
+    """Yield the OpenAI recommendation as it is generated (Markdown text deltas)."""
+    client = openai_client()
+    if not client:
+        raise Exception("OpenAI API key not configured")
+    logger.info("OpenAI generation started", extra={"source": "openai", "model": OPENAI_MODEL})
+    start = time.perf_counter()
+    with stage("openai"):
+        stream = await client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=openai_messages(prompt),
+            temperature=0.3,
+            stream=True,
+        )
+        first = True
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first:
+                    STAGE_LATENCY.observe(time.perf_counter() - start, "openai_first_token")
+                    first = False
+                yield chunk.choices[0].delta.content
+    logger.info("OpenAI generation finished", extra={"source": "openai", "model": OPENAI_MODEL,
+                                                      "ms": round((time.perf_counter() - start) * 1000, 1)})
+
+async def run_openai(prompt):
+    """The full OpenAI recommendation (Markdown string)."""
+    try:
+        return "".join([delta async for delta in stream_openai(prompt)])
+    except Exception as e:
+        logger.error("OpenAI generation failed", extra={"source": "openai", "error": str(e)})
+        raise
+
+def run_agent():
+    """Local agent recommendations (dummy for now)."""
+    logger.debug("Agent generation started", extra={"source": "agent"})
+    # Here we use dummy_recommendations as the agent's output.
+    recos = dummy_recommendations
+    logger.info("Agent recommendations ready", extra={"source": "agent", "count": len(recos)})
+    return {"recommendations": recos, "allocation": allocation_for(recos)}
+
+EMPTY_ALLOCATION = {
+    "total_allocated": "$0.00",
+    "remaining_balance": "$10000.00",
+    "reserved_base": "$4000.00"
+}
+
+def create_unified_response(strategy_text, source, content, allocation, error=None):
+    """Unified response format regardless of source."""
+    content_format = "markdown" if source == "openai" and not error else "json"
+    response = {
+        "strategy": strategy_text,
+        "recommendations": {
+            "format": content_format,
+            "content": content
+        },
+        "allocation": allocation,
+        "source": source
+    }
+    if error:
+        response["error"] = error
+    return response
+
+def save_recommendations(request_id, strategy_text, openai_prompt, openai_output, openai_error, agent_output):
+    """Queue OpenAI and agent results for Supabase (if configured); written in bulk in the background."""
+    if persistence is None:
+        return
+    if openai_output is not None:
+        persistence.enqueue("openai_recommendations", {
+            "request_id": request_id,
+            "strategy": strategy_text,
+            "prompt": openai_prompt,  # Store the full prompt
+            "result": openai_output,
+            "source": "openai" if not openai_error else "fallback_openai",
+            "error": openai_error or None,
+            "created_at": datetime.utcnow().isoformat()
+        })
+    # Save agent output
+    if agent_output is not None:
+        persistence.enqueue("agent_recommendations", {
+            "request_id": request_id,
+            "strategy": strategy_text,
+            "result": agent_output,
+            "source": "agent",
+            "created_at": datetime.utcnow().isoformat()
+        })
+
+@app.get("/api/recommendations/stats")
+async def get_recommendation_cache_stats():
+    """Recommendation cache hit rate and LLM latency saved"""
+    return reco_cache.stats()
+
+@app.get("/api/persistence/stats")
+async def get_persistence_stats():
+    """Write-behind queue depth, batches, retries and spills"""
+    return persistence.stats() if persistence else {"enabled": False}
+
+expose_stats("backup", market_cache=market_cache, reco_cache=reco_cache, scheduler=scheduler, persistence=persistence, risk=risk)
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Prometheus text exposition: request/stage latency histograms, upstream status codes, cache counters"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @app.post("/recommendations")
 @app.post("/api/recommendations")
-def get_recommendations(req: RecommendationRequest, request: Request = None):
-    """Generate trade recommendations using OpenAI and local agent in parallel."""
+async def get_recommendations(req: RecommendationRequest, request: Request = None, background_tasks: BackgroundTasks = None):
+    """Generate trade recommendations using OpenAI and local agent.
+
+    With `Accept: text/event-stream` (or `?stream=true`) the response is a
+    server-sent event stream: the agent result first, then OpenAI tokens as
+    they are generated, then a final `done` event.
+    """
     strategy_text = req.strategy
     mode = request.query_params.get("mode", "agent") if request else "agent"
-    logger.info(f"🧠 STRATEGY: \"{strategy_text}\" (mode={mode})")
+    logger.info("Recommendations requested", extra={"strategy": strategy_text, "mode": mode})
     
     # Validate strategy text
     if not strategy_text or len(strategy_text.strip()) < 5:
@@ -306,266 +494,133 @@ def get_recommendations(req: RecommendationRequest, request: Request = None):
     # Clean strategy text (optional)
     strategy_text = strategy_text.strip()
     
-    # Unique ID to correlate OpenAI and agent outputs
-    request_id = str(uuid4())
-
-    # Prepare placeholders for results
-    openai_output = None
-    agent_output = None
-    openai_error = None
-    openai_prompt = None
-
-    # Define a function to call OpenAI API
-    def run_openai():
-        logger.info("💡 [OpenAI] Running OpenAI recommendation generation...")
-        # Build the prompt for OpenAI
-        prompt = (
-            "You are a Kalshi trading assistant.\n\n"
-            f"Given this strategy:\n\"\"\"{strategy_text}\"\"\"\n\n"
-            "Scan live Kalshi markets and generate 2–3 trades with the following fields:\n"
-            "- Market\n- Action (Buy YES / NO)\n- Probability\n- Position (price or range)\n- Contracts\n- Cost\n- Target Exit\n- Stop Loss\n- Reason (1 sentence)\n\n"
-            "Then add a fund summary at the bottom:\n- Total Allocated\n- Remaining Balance\n- Reserved Base\n\n"
-            "Respond in Markdown. DO NOT add any extra explanation."
-        )
-        try:
-            if not client:  # OpenAI client was initialized at startup if API key was valid
-                raise Exception("OpenAI API key not configured")
-            
-            # Store the full prompt for later use
-            nonlocal openai_prompt
-            openai_prompt = prompt
-            
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a Kalshi AI trade strategist."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-            )
-            content = response.choices[0].message.content
-            logger.info("✅ [OpenAI] Recommendation received.")
-            return content  # Markdown string
-        except Exception as e:
-            logger.error("❌ [OpenAI] Failed to generate recommendations: %s", str(e))
-            raise e  # will be caught outside
-
-    # Define a function for local agent (dummy for now)
-    def run_agent():
-        logger.info("🤖 [Agent] Generating recommendations using local AI agent...")
-        # Here we use dummy_recommendations as the agent's output.
-        recos = dummy_recommendations  
-        # Calculate allocation based on dummy recos cost
-        total_cost = 0
-        for reco in recos:
-            # Remove '$' and commas to sum costs
-            cost_str = reco.get("cost", "$0").replace("$", "").replace(",", "")
-            try:
-                total_cost += float(cost_str)
-            except ValueError:
-                pass
-        remaining = 10000.00 - total_cost
-        allocation = {
-            "total_allocated": f"${total_cost:,.2f}",
-            "remaining_balance": f"${remaining:,.2f}",
-            "reserved_base": "$4000.00"
-        }
-        logger.info("✅ [Agent] Recommendations ready.")
-        return {"recommendations": recos, "allocation": allocation}
-
-    # Run both tasks in parallel (if OpenAI is available)
-    with ThreadPoolExecutor() as executor:
-        future_agent = executor.submit(run_agent)
-        future_openai = None
-        if OPENAI_API_KEY and client:
-            future_openai = executor.submit(run_openai)
-        else:
-            logger.info("⚠️ [OpenAI] No OpenAI API configured – will use agent output as fallback.")
+    # Correlates OpenAI and agent outputs (and this request's log lines)
+    request_id = request_id_var.get() or str(uuid4())
+
+    openai_prompt = build_openai_prompt(strategy_text)
+    openai_enabled = bool(OPENAI_API_KEY and openai_client())
+    if not openai_enabled:
+        logger.info("OpenAI not configured, agent output is the fallback", extra={"source": "openai"})
+
+    # The local agent is cheap and never waits on the LLM
+    try:
+        agent_result = run_agent()
+        agent_output = agent_result["recommendations"]
+        agent_allocation = agent_result["allocation"]
+    except Exception as e:
+        agent_output = dummy_recommendations
+        agent_allocation = EMPTY_ALLOCATION
+        logger.error("Agent generation failed", extra={"source": "agent", "error": str(e)})
+
+    agent_response = create_unified_response(strategy_text, "custom_agent", agent_output, agent_allocation)
+
+    wants_stream = (
+        "text/event-stream" in (request.headers.get("accept", "") if request else "")
+        or (request is not None and request.query_params.get("stream") in ("1", "true"))
+    )
+    if wants_stream:
+        async def events():
+            yield sse_event("agent", agent_response)
+            openai_output, openai_error = None, None
+            cached = await reco_cache.aget(strategy_text, OPENAI_MODEL) if openai_enabled else None
+            if cached is not None:
+                openai_output = cached
+                yield sse_event("token", {"delta": cached, "cached": True})
+            elif openai_enabled:
+                parts = []
+                try:
+                    start = time.perf_counter()
+                    async for delta in stream_openai(openai_prompt):
+                        parts.append(delta)
+                        yield sse_event("token", {"delta": delta})
+                    openai_output = "".join(parts)
+                    await reco_cache.aput(strategy_text, openai_output, (time.perf_counter() - start) * 1000, OPENAI_MODEL)
+                except Exception as e:
+                    openai_error = str(e)
+                    openai_output = agent_output
+                    logger.error("OpenAI generation failed", extra={"source": "openai", "error": openai_error})
+                    yield sse_event("error", {"source": "openai", "error": openai_error})
+            yield sse_event("done", {
+                "request_id": request_id,
+                "openai": openai_enabled and not openai_error,
+                "cached": cached is not None
+            })
+            save_recommendations(request_id, strategy_text, openai_prompt, openai_output, openai_error, agent_output)
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
-        # Collect agent result
+    async def generate_openai():
+        if not openai_enabled:
+            return None, None
+        cached = await reco_cache.aget(strategy_text, OPENAI_MODEL)
+        if cached is not None:
+            logger.info("Recommendation served from cache", extra={"source": "openai", "model": OPENAI_MODEL})
+            return cached, None
         try:
-            agent_result = future_agent.result()
-            agent_output = agent_result["recommendations"]
-            agent_allocation = agent_result["allocation"]
+            start = time.perf_counter()
+            output = await run_openai(openai_prompt)
+            await reco_cache.aput(strategy_text, output, (time.perf_counter() - start) * 1000, OPENAI_MODEL)
+            return output, None
         except Exception as e:
-            agent_output = dummy_recommendations
-            agent_allocation = {
-                "total_allocated": "$0.00",
-                "remaining_balance": "$10000.00",
-                "reserved_base": "$4000.00"
-            }
-            logger.error("❌ [Agent] Error in agent logic: %s", str(e))
-
-        # Collect OpenAI result (if attempted)
-        if future_openai:
-            try:
-                openai_content = future_openai.result()
-                openai_output = openai_content
-            except Exception as e:
-                openai_error = str(e)
-                # Use agent recommendations as fallback for OpenAI failure
-                openai_output = agent_output
-                logger.warning("⚠️ [OpenAI] Using agent recommendations as fallback for OpenAI.")
-
-    # At this point, we have openai_output and agent_output (or fallbacks) ready.
-    # Write results to Supabase (if configured)
-    if os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_SERVICE_KEY"):
-        supabase_url = os.getenv("SUPABASE_URL").rstrip("/")
-        supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-        headers = {
-            "Content-Type": "application/json",
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}"
-        }
-        # Prepare data for openai and agent tables
-        try:
-            if openai_output is not None:
-                openai_data = {
-                    "request_id": request_id,
-                    "strategy": strategy_text,
-                    "prompt": openai_prompt,  # Store the full prompt
-                    "result": openai_output,
-                    "source": "openai" if not openai_error else "fallback_openai",
-                    "error": openai_error or None,
-                    "created_at": datetime.utcnow().isoformat()
-                }
-                res = requests.post(f"{supabase_url}/rest/v1/openai_recommendations", json=openai_data, headers=headers)
-                if res.status_code < 300:
-                    logger.info("📝 Saved OpenAI recommendation to database.")
-                else:
-                    logger.error(f"❌ Failed to save OpenAI data: {res.status_code}, {res.text}")
-            # Save agent output
-            if agent_output is not None:
-                agent_data = {
-                    "request_id": request_id,
-                    "strategy": strategy_text,
-                    "result": agent_output,
-                    "source": "agent",
-                    "created_at": datetime.utcnow().isoformat()
-                }
-                res = requests.post(f"{supabase_url}/rest/v1/agent_recommendations", json=agent_data, headers=headers)
-                if res.status_code < 300:
-                    logger.info("📝 Saved Agent recommendation to database.")
-                else:
-                    logger.error(f"❌ Failed to save agent data: {res.status_code}, {res.text}")
-        except Exception as db_err:
-            logger.error("❌ Database logging error: %s", str(db_err))
-
-    # Prepare a unified response format regardless of source
-    def create_unified_response(source, content, allocation, error=None):
-        content_format = "markdown" if source == "openai" and not error else "json"
-        response = {
-            "strategy": strategy_text,
-            "recommendations": {
-                "format": content_format,
-                "content": content
-            },
-            "allocation": allocation,
-            "source": source
-        }
-        if error:
-            response["error"] = error
-        return response
+            # Use agent recommendations as fallback for OpenAI failure
+            logger.warning("OpenAI failed, falling back to agent recommendations",
+                           extra={"source": "openai", "error": str(e)})
+            return agent_output, str(e)
 
     # Decide what to return to the user based on requested mode
-    if mode == "openai":
-        if openai_output is None:
-            # No OpenAI output (e.g., not configured) -> fallback response
-            return create_unified_response(
-                "fallback_openai", 
-                agent_output, 
-                {
-                    "total_allocated": "$0.00",
-                    "remaining_balance": "$10000.00",
-                    "reserved_base": "$4000.00"
-                }
-            )
-        elif openai_error:
-            # OpenAI attempted but failed
-            return create_unified_response(
-                "error", 
-                agent_output, 
-                {
-                    "total_allocated": "$0.00",
-                    "remaining_balance": "$10000.00",
-                    "reserved_base": "$4000.00"
-                },
-                openai_error
-            )
-        else:
-            # Successful OpenAI response
-            return create_unified_response(
-                "openai", 
-                openai_output, 
-                {
-                    "total_allocated": "see text",
-                    "remaining_balance": "see text",
-                    "reserved_base": "see text"
-                }
-            )
+    if mode != "openai":
+        # Default or "agent" mode: answer now; OpenAI runs and everything is saved after the response
+        async def openai_then_save():
+            openai_output, openai_error = await generate_openai()
+            save_recommendations(request_id, strategy_text, openai_prompt, openai_output, openai_error, agent_output)
+
+        if background_tasks is not None:
+            background_tasks.add_task(openai_then_save)
+        return agent_response
+
+    openai_output, openai_error = await generate_openai()
+    save_recommendations(request_id, strategy_text, openai_prompt, openai_output, openai_error, agent_output)
+    if openai_output is None:
+        # No OpenAI output (e.g., not configured) -> fallback response
+        return create_unified_response(strategy_text, "fallback_openai", agent_output, EMPTY_ALLOCATION)
+    elif openai_error:
+        # OpenAI attempted but failed
+        return create_unified_response(strategy_text, "error", agent_output, EMPTY_ALLOCATION, openai_error)
     else:
-        # Default or "agent" mode: return agent's recommendations
+        # Successful OpenAI response
         return create_unified_response(
-            "custom_agent", 
-            agent_output, 
-            agent_allocation if agent_output is not None else {
-                "total_allocated": "$0.00",
-                "remaining_balance": "$10000.00",
-                "reserved_base": "$4000.00"
+            strategy_text,
+            "openai", 
+            openai_output, 
+            {
+                "total_allocated": "see text",
+                "remaining_balance": "see text",
+                "reserved_base": "see text"
             }
         )
 
 @app.post("/execute")
 @app.post("/api/execute")
-def execute_trade(req: TradeRequest, request: Request = None):
-    print("🚀 Execute endpoint called.")
-    print("🎯 TradeRequest:", req.dict())
+async def execute_trade(req: TradeRequest, request: Request = None):
+    logger.info("Order requested", extra={"ticker": req.ticker, "side": req.side, "action": req.action,
+                                          "count": req.count, "price": req.price})
 
-    base_domain = "https://demo-api.kalshi.co" if IS_DEMO else "https://trading-api.kalshi.com"
-    api_base = f"{base_domain}/trade-api/v2"
+    client_order_id = str(uuid4())
+    try:
+        risk.check(req, client_order_id)
+    except RiskRejected as e:
+        logger.warning("Order rejected by risk checks", extra={"ticker": req.ticker, "reason": e.reason})
+        return e.to_dict()
+
+    headers = None  # signed by the shared client once the scheduler admits the order
 
-    headers = {}
-    token = None
-    
     try:
-        # Authentication similar to feed
-        if KALSHI_API_KEY and KALSHI_API_SECRET:
-            print("🔐 Using Kalshi API Key + Secret")
-            key_data = KALSHI_API_SECRET.replace("\\n", "\n")
-
-            private_key = serialization.load_pem_private_key(
-                key_data.encode(), password=None, backend=default_backend()
-            )
-
-            ts_ms = int(datetime.now().timestamp() * 1000)
-            message = f"{ts_ms}POST/trade-api/v2/portfolio/orders"
-
-            signature = private_key.sign(
-                message.encode("utf-8"),
-                padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
-                hashes.SHA256()
-            )
-            signature_b64 = __import__("base64").b64encode(signature).decode("utf-8")
-
-            headers.update({
-                "KALSHI-ACCESS-KEY": KALSHI_API_KEY,
-                "KALSHI-ACCESS-TIMESTAMP": str(ts_ms),
-                "KALSHI-ACCESS-SIGNATURE": signature_b64
-            })
-        elif KALSHI_API_KEY and not KALSHI_API_SECRET:
-            print("⚠️ Using Bearer token (API key only)")
-            headers["Authorization"] = f"Bearer {KALSHI_API_KEY}"
-
-        elif KALSHI_EMAIL and KALSHI_PASSWORD:
-            print("🔑 Using email/password login")
-            login_url = f"{api_base}/log_in"  # ✅ Must be /log_in, NOT /login
-            resp = requests.post(login_url, json={"email": KALSHI_EMAIL, "password": KALSHI_PASSWORD})
-            if resp.status_code != 200:
-                raise Exception(f"Login failed: {resp.text}")
-            token = resp.json().get("token")
-            headers["Authorization"] = f"Bearer {token}"
-        else:
-            print("❌ No Kalshi credentials — simulating trade")
+        # Authentication similar to feed: key + secret requests are signed by the client
+        if KALSHI_API_KEY and not KALSHI_API_SECRET:
+            headers = {"Authorization": f"Bearer {KALSHI_API_KEY}"}
+        elif not KALSHI_API_KEY and session is None and exchange is None:
+            logger.info("No Kalshi credentials, simulating trade", extra={"ticker": req.ticker})
+            risk.release(client_order_id)  # nothing was sent
             return {
                 "status": "simulation",
                 "trade_id": req.ticker,
@@ -573,7 +628,6 @@ def execute_trade(req: TradeRequest, request: Request = None):
                 "details": "Trade simulated (no Kalshi credentials)"
             }
 
-        client_order_id = str(uuid4())
         order_payload = {
             "ticker": req.ticker,
             "side": req.side,
@@ -583,16 +637,19 @@ def execute_trade(req: TradeRequest, request: Request = None):
             "yes_price": req.price,  # assumes YES side; use "no_price" if needed
             "client_order_id": client_order_id
         }
-        print("📦 Order payload:", order_payload)
+        logger.debug("Order payload", extra={"payload": order_payload})
 
-        url = f"{api_base}/portfolio/orders"
-        response = requests.post(url, json=order_payload, headers=headers)
+        if session is not None:
+            response = await session.request("POST", "/portfolio/orders", json=order_payload)
+        else:
+            response = await kalshi.post("/portfolio/orders", json=order_payload, headers=headers)
         if response.status_code == 401:
             raise Exception("Unauthorized – check credentials")
 
         response.raise_for_status()
+        risk.submitted(client_order_id)
         order_data = response.json() if response.text else {}
-        print("✅ Order placed successfully.")
+        logger.info("Order placed", extra={"client_order_id": client_order_id, "status": response.status_code})
 
         return {
             "status": "submitted",
@@ -602,7 +659,8 @@ def execute_trade(req: TradeRequest, request: Request = None):
             "kalshi_response": order_data.get("order_id", None)
         }
     except Exception as e:
-        print("❌ Error executing trade:", e)
+        risk.release(client_order_id)
+        logger.error("Error executing trade: %s", e, extra={"ticker": req.ticker})
         return {
             "status": "error",
             "error": str(e),
@@ -0,0 +1,43 @@
+"""Benchmark: vectorised backtest cost per parameter set, serial vs the process pool.
+
+Builds a synthetic random-walk panel of `--tickers` x `--steps` quotes and
+times `backtest` for `--params` parameter sets, inline and through
+`run_many` with `--workers` processes.
+
+    python -m bench.bench_backtest [--tickers 5000] [--steps 1440] [--params 16] [--workers 4]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from api.backtest import Panel, run_many
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--steps", type=int, default=1440, help="e.g. one day at 60 s resolution")
+    parser.add_argument("--params", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    walk = rng.integers(-1, 2, size=(args.steps, args.tickers)).cumsum(axis=0)
+    bids = np.clip(rng.integers(5, 95, size=args.tickers) + walk, 1, 97).astype(np.int32)
+    panel = Panel([f"SYN-{i:06d}" for i in range(args.tickers)], np.arange(args.steps) * 60_000, bids, bids + 2, 60_000)
+    params = [{"entry_below": 20 + i % 40, "target": 5 + i % 7, "stop_loss": 3 + i % 5} for i in range(args.params)]
+
+    print(f"tickers={args.tickers} steps={args.steps} params={args.params}")
+    start = time.perf_counter()
+    run_many(panel, params, workers=1)
+    serial = time.perf_counter() - start
+    print(f"  serial            {serial * 1000:10.1f} ms  ({serial / args.params * 1000:.1f} ms / parameter set)")
+    start = time.perf_counter()
+    run_many(panel, params, workers=args.workers)
+    pooled = time.perf_counter() - start
+    print(f"  {args.workers} workers         {pooled * 1000:10.1f} ms  (x{serial / pooled:.2f}, includes pool start-up)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: exchange simulator order throughput, in the engine and over the Kalshi API transport.
+
+Sends `--orders` random limit orders (a mix that rests, crosses and is
+canceled) from the simulated account across `--markets` books, first
+straight into `Exchange.place`, then as POST /portfolio/orders through a
+KalshiClient on an `ExchangeTransport`, and times one `step()` of the
+synthetic market (random walk, re-quote, taker flow) over every market.
+
+    python -m bench.bench_exchange [--markets 200] [--orders 200000] [--http-orders 20000]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from api.exchange_sim import Exchange, ExchangeTransport, SimError
+from api.kalshi_client import KalshiClient
+
+
+def random_orders(exchange: Exchange, n: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    tickers = list(exchange.books)
+    orders = []
+    for _ in range(n):
+        ticker = rng.choice(tickers)
+        m = exchange.market(ticker)
+        mid = (m["yes_bid"] + m["yes_ask"]) // 2 or 50
+        action = rng.choice(("buy", "sell"))
+        orders.append({
+            "ticker": ticker,
+            "side": rng.choice(("yes", "no")) if action == "buy" else "yes",  # sells draw on the seeded holding
+            "action": action,
+            "count": rng.randint(1, 20),
+            "type": "limit",
+            "yes_price": max(1, min(99, mid + rng.randint(-4, 4))),
+        })
+    return orders
+
+
+def run_engine(exchange: Exchange, orders: list, cancel_every: int = 4) -> int:
+    rejected = 0
+    for i, payload in enumerate(orders):
+        try:
+            order = exchange.place(payload)
+        except SimError:
+            rejected += 1
+            continue
+        if i % cancel_every == 0 and order.order_id in exchange.orders:
+            exchange.cancel(order.order_id)
+    return rejected
+
+
+async def run_transport(exchange: Exchange, orders: list):
+    client = KalshiClient("https://sim.invalid/trade-api/v2", http2=False, transport=ExchangeTransport(exchange))
+    await client.start()
+    try:
+        for payload in orders:
+            await client.post("/portfolio/orders", json=payload)
+    finally:
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--markets", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--http-orders", type=int, default=20_000)
+    parser.add_argument("--steps", type=int, default=50)
+    args = parser.parse_args()
+
+    exchange = Exchange(markets=args.markets, balance=10**12, tick_interval=0, seed=1)
+    for ticker in exchange.books:  # a large YES holding per market, so sells are covered (no short selling)
+        exchange.portfolio.apply_fill(ticker, "yes", "buy", 10**7, 50)
+    orders = random_orders(exchange, args.orders)
+    start = time.perf_counter()
+    rejected = run_engine(exchange, orders)
+    elapsed = time.perf_counter() - start
+    stats = exchange.stats()
+    print(f"engine:    {args.orders / elapsed:>10,.0f} orders/s  ({elapsed / args.orders * 1e6:.2f} us/order; "
+          f"{stats['fills']:,} fills, {stats['orders_canceled']:,} cancels, {rejected} rejected, "
+          f"{stats['open_orders']:,} resting)")
+
+    orders = random_orders(exchange, args.http_orders, seed=12)
+    start = time.perf_counter()
+    asyncio.run(run_transport(exchange, orders))
+    elapsed = time.perf_counter() - start
+    print(f"transport: {args.http_orders / elapsed:>10,.0f} orders/s  ({elapsed / args.http_orders * 1e6:.1f} us/order, "
+          f"httpx request + JSON both ways)")
+
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        exchange.step()
+    elapsed = time.perf_counter() - start
+    print(f"step:      {elapsed / args.steps * 1000:>10.2f} ms for {args.markets} markets")
+
+
+if __name__ == "__main__":
+    main()
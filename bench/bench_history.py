@@ -0,0 +1,64 @@
+"""Benchmark: market history recording cost, size on disk and range-query latency.
+
+Records `--snapshots` refreshes of `--markets` synthetic markets, where
+`--change` is the share of markets that move between refreshes, into a
+temporary directory; then times per-ticker queries against the
+memory-mapped day file, cold (index built on first use) and warm.
+
+    python -m bench.bench_history [--markets 5000] [--snapshots 1000] [--change 0.2]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from api.market_history import MarketHistory
+from bench.bench_ranking import synthetic_markets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--markets", type=int, default=5000)
+    parser.add_argument("--snapshots", type=int, default=1000)
+    parser.add_argument("--change", type=float, default=0.2, help="share of markets changing per refresh")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    markets = synthetic_markets(args.markets)
+    start_ms = 1_760_000_000_000
+
+    with tempfile.TemporaryDirectory() as path:
+        history = MarketHistory(path)
+        record_s = 0.0
+        for i in range(args.snapshots):
+            for m in rng.sample(markets, int(len(markets) * args.change)):
+                m["yes_bid"] = max(1, min(98, m["yes_bid"] + rng.choice((-1, 1))))
+                m["yes_ask"] = m["yes_bid"] + 1
+                m["volume"] += rng.randint(1, 20)
+            t = time.perf_counter()
+            history.record(markets, start_ms + i * 5000)
+            record_s += time.perf_counter() - t
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+        print(f"markets={args.markets} snapshots={args.snapshots} change={args.change}")
+        print(f"  rows written      {history.rows_written:>12,}  ({history.rows_skipped:,} unchanged skipped)")
+        print(f"  on disk           {size / 1e6:>12.1f} MB")
+        print(f"  record            {record_s / args.snapshots * 1000:>12.2f} ms / snapshot")
+
+        tickers = [m["ticker"] for m in rng.sample(markets, args.queries)]
+        mid = (start_ms + args.snapshots * 2500) / 1000
+        for label in ("cold", "warm"):
+            t = time.perf_counter()
+            points = sum(len(history.query(tk, start=mid - 600, end=mid + 600)) for tk in tickers)
+            ms = (time.perf_counter() - t) / len(tickers) * 1000
+            print(f"  query 20 min ({label}) {ms:>9.3f} ms / ticker  ({points / len(tickers):.0f} points)")
+        t = time.perf_counter()
+        for tk in tickers:
+            history.query(tk, limit=2000)
+        print(f"  query last 2000   {(time.perf_counter() - t) / len(tickers) * 1000:>12.3f} ms / ticker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark: bytes and CPU per response for large market payloads.
+
+Compares FastAPI's default path (jsonable_encoder + json.dumps), orjson via
+FastJSONResponse, relaying already-encoded upstream bytes, and a cached
+snapshot body; each with no compression, gzip and (if installed) brotli.
+
+    python -m bench.bench_json [--markets 5000] [--repeat 20]
+"""
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from api.fast_json import EncodedBodyCache, FastJSONResponse, brotli
+from bench.bench_ranking import synthetic_markets
+
+
+class FakeRequest:
+    def __init__(self, accept_encoding: str):
+        self.headers = {"accept-encoding": accept_encoding}
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    """Mean process CPU milliseconds per call."""
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--markets", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = {"status_code": 200, "markets": synthetic_markets(args.markets), "source": "kalshi", "version": 1}
+    upstream = json.dumps(payload).encode()
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+
+    def default_path():
+        return JSONResponse(jsonable_encoder(payload)).body
+
+    ms = cpu_ms(default_path, args.repeat)
+    print(f"markets={args.markets}")
+    print(f"  {'default (jsonable_encoder + json)':<36} identity  {len(default_path()):>10,} B  {ms:8.2f} ms CPU")
+
+    for encoding in encodings:
+        request = FakeRequest(encoding)
+        cache = EncodedBodyCache()
+        cases = {
+            "orjson FastJSONResponse": lambda: FastJSONResponse(payload, request=request).body,
+            "upstream bytes relayed": lambda: FastJSONResponse(upstream, request=request).body,
+            "cached snapshot body": lambda: FastJSONResponse.cached(cache, 1, lambda: payload, request).body,
+        }
+        for name, fn in cases.items():
+            size = len(fn())
+            print(f"  {name:<36} {encoding:<9} {size:>10,} B  {cpu_ms(fn, args.repeat):8.2f} ms CPU")
+    if brotli is None:
+        print("  (brotli not installed; clients asking for br get gzip)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""End-to-end load test: the FastAPI apps against a local fake Kalshi/OpenAI.
+
+Starts bench.fake_kalshi and each app under uvicorn in their own processes,
+then drives every endpoint scenario with `--concurrency` clients for
+`--duration` seconds and reports p50/p95/p99 latency and requests/second.
+
+    python -m bench.bench_load [--app api.index] [--concurrency 32] [--duration 10]
+                               [--latency-ms 20] [--rate-429 0.0] [--markets 5000]
+                               [--json load.json]
+
+The JSON report records the commit, the configuration and per-endpoint
+results so runs can be compared across commits. Upstream rate limits are
+raised by default (--upstream-rate) so the app, not the scheduler's
+budget, is what gets measured; pass the real budget to measure that too.
+Pre-trade risk limits are switched off (RISK_*=0) for the same reason:
+random orders would otherwise pile up exposure and mostly measure the
+rejection path instead of order placement.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench.bench_signer import make_pem
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(target: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+
+
+def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url} exited: {proc.stderr.read().decode()[-2000:]}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def stop(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(p / 100 * len(sorted_values) + 0.5))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def ticker(rng) -> str:
+    return f"SYN-{rng.randrange(500):06d}"
+
+
+def order(rng) -> dict:
+    return {"ticker": ticker(rng), "side": "yes", "count": rng.randint(1, 10), "price": rng.randint(1, 99)}
+
+
+# name -> (method, path or fn(rng) -> path, body or fn(rng) -> body)
+SCENARIOS = {
+    "api.index": {
+        "feed_snapshot": ("GET", "/api/feed", None),
+        "feed_top20": ("GET", "/api/feed?sort=volume&limit=20", None),
+        "markets_query": ("GET", "/api/markets/query?category=Crypto&sort=spread&limit=50", None),
+        "orderbook": ("GET", lambda rng: f"/api/markets/{ticker(rng)}/orderbook", None),
+        "positions": ("GET", "/api/positions", None),
+        "execute": ("POST", "/api/execute", order),
+        "execute_batch": ("POST", "/api/execute/batch", lambda rng: {"orders": [order(rng) for _ in range(5)]}),
+    },
+    "backup.index": {
+        "feed_top10": ("GET", "/api/feed?sort=volume&limit=10", None),
+        "recommendations_cached": ("POST", "/api/recommendations?mode=openai",
+                                   {"strategy": "Buy liquid crypto markets on volume spikes"}),
+        "recommendations_llm": ("POST", "/api/recommendations?mode=openai",
+                                lambda rng: {"strategy": f"Momentum strategy variant {rng.random()}"}),
+        "execute": ("POST", "/api/execute", order),
+    },
+}
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario, concurrency: int, duration: float) -> dict:
+    method, path, body = scenario
+    latencies = []
+    statuses = {}
+    errors = 0
+
+    async def one(rng):
+        nonlocal errors
+        url = path(rng) if callable(path) else path
+        payload = body(rng) if callable(body) else body
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, json=payload)
+            content = response.content
+            status = str(response.status_code)
+            failed = response.status_code >= 400 or b'"error"' in content[:4096]
+        except httpx.HTTPError as e:
+            status, failed = type(e).__name__, True
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+        errors += failed
+
+    await one(random.Random(-1))  # warm caches and connections outside the measurement
+    latencies.clear()
+    statuses.clear()
+    errors = 0
+
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            await one(rng)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_codes": statuses,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "mean_ms": ms(sum(latencies) / len(latencies) if latencies else None),
+    }
+
+
+async def drive(base_url: str, scenarios: dict, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for name, scenario in scenarios.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = await run_scenario(client, scenario, args.concurrency, args.duration)
+            r = results[name]
+            print(
+                f"  {name:<24} {r['rps']:8.1f} req/s  p50={r['p50_ms']:8.2f} ms  p95={r['p95_ms']:8.2f} ms  "
+                f"p99={r['p99_ms']:8.2f} ms  errors={r['errors']}"
+            )
+    return results
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", action="append", choices=sorted(SCENARIOS), help="app module (repeatable)")
+    parser.add_argument("--only", action="append", help="scenario name (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="fake upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of upstream calls answered with 429")
+    parser.add_argument("--markets", type=int, default=5000)
+    parser.add_argument("--upstream-rate", type=float, default=100_000, help="KALSHI_READ_RATE / KALSHI_WRITE_RATE for the app")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    fake_port = free_port()
+    fake_env = {
+        **os.environ,
+        "FAKE_KALSHI_MARKETS": str(args.markets),
+        "FAKE_KALSHI_LATENCY_MS": str(args.latency_ms),
+        "FAKE_KALSHI_JITTER_MS": str(args.jitter_ms),
+        "FAKE_KALSHI_429_RATE": str(args.rate_429),
+    }
+    fake = serve("bench.fake_kalshi:app", fake_port, fake_env)
+    fake_url = f"http://127.0.0.1:{fake_port}"
+
+    app_env = {
+        **os.environ,
+        "KALSHI_API_BASE": f"{fake_url}/trade-api/v2",
+        "KALSHI_API_KEY": "bench-key",
+        "KALSHI_API_SECRET": make_pem(),
+        "KALSHI_HTTP2": "false",
+        "KALSHI_READ_RATE": str(args.upstream_rate),
+        "KALSHI_WRITE_RATE": str(args.upstream_rate),
+        "KALSHI_MAX_IN_FLIGHT": str(max(50, args.concurrency * 5)),
+        "OPENAI_API_KEY": "sk-bench-" + "x" * 40,
+        "OPENAI_BASE_URL": f"{fake_url}/v1",
+        "LOG_LEVEL": "WARNING",
+        # 0 disables a limit; the checks still run, they just never reject
+        "RISK_MAX_ORDER_CONTRACTS": "0",
+        "RISK_MAX_ORDER_NOTIONAL_CENTS": "0",
+        "RISK_MAX_MARKET_EXPOSURE_CENTS": "0",
+        "RISK_MAX_EVENT_EXPOSURE_CENTS": "0",
+        "RISK_MAX_ACCOUNT_EXPOSURE_CENTS": "0",
+        "RISK_PRICE_COLLAR_CENTS": "0",
+    }
+    for name in ("SUPABASE_URL", "SUPABASE_SERVICE_KEY", "KALSHI_EMAIL", "KALSHI_PASSWORD", "RECO_CACHE_PATH"):
+        app_env.pop(name, None)
+
+    report = {
+        "commit": commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {k: v for k, v in vars(args).items() if k != "json"},
+        "results": {},
+    }
+    try:
+        wait_ready(f"{fake_url}/trade-api/v2/portfolio/orders", fake)
+        for app in args.app or sorted(SCENARIOS):
+            port = free_port()
+            proc = serve(f"{app}:app", port, app_env)
+            try:
+                wait_ready(f"http://127.0.0.1:{port}/api/health", proc)
+                print(f"== {app} (concurrency={args.concurrency}, upstream latency={args.latency_ms} ms, 429 rate={args.rate_429})")
+                report["results"][app] = asyncio.run(drive(f"http://127.0.0.1:{port}", SCENARIOS[app], args))
+            finally:
+                stop(proc)
+    finally:
+        stop(fake)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark: portfolio engine update cost per price tick and per market-cache refresh.
+
+Opens `--positions` holdings, then times single `mark()` ticks (incremental
+totals) against recomputing every position's P&L from scratch, and a full
+re-mark from a MarketStore as done on each cache refresh.
+
+    python -m bench.bench_portfolio [--positions 1000] [--ticks 200000] [--markets 5000]
+"""
+import argparse
+import random
+import time
+
+from api.market_store import MarketStore
+from api.portfolio import Portfolio, store_prices
+from bench.bench_ranking import synthetic_markets
+
+
+def per_call_us(fn, n: int) -> float:
+    start = time.perf_counter()
+    fn(n)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--markets", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    markets = synthetic_markets(max(args.markets, args.positions))
+    portfolio = Portfolio()
+    for m in markets[:args.positions]:
+        portfolio.apply_fill(m["ticker"], rng.choice(("yes", "no")), "buy", rng.randint(1, 50), rng.randint(5, 95))
+    tickers = list(portfolio.holdings)
+    ticks = [(rng.choice(tickers), b, b + rng.randint(1, 3)) for b in (rng.randint(1, 95) for _ in range(args.ticks))]
+
+    def incremental(n):
+        mark = portfolio.mark
+        for ticker, bid, ask in ticks[:n]:
+            mark(ticker, bid, ask)
+            portfolio.totals()
+
+    def from_scratch(n):
+        for ticker, bid, ask in ticks[:n]:
+            h = portfolio.holdings[ticker]
+            h.price = bid if h.position >= 0 else 100 - ask
+            sum(abs(x.position) * (x.price or 0) - x.exposure for x in portfolio.holdings.values())
+
+    store = MarketStore(markets)
+    prices = store_prices(store)
+
+    def refresh(n):
+        for _ in range(n):
+            portfolio.mark_from(prices)
+
+    print(f"positions={args.positions}")
+    print(f"  tick, incremental totals   {per_call_us(incremental, args.ticks):10.2f} us")
+    print(f"  tick, recompute all P&L    {per_call_us(from_scratch, max(1, args.ticks // 100)):10.2f} us")
+    print(f"  re-mark on cache refresh   {per_call_us(refresh, 200) / 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: top-N market selection over the cached market set.
+
+Builds a MarketStore from synthetic markets (the once-per-refresh cost,
+including spread/mid), then compares heap selection with a full sort.
+
+    python -m bench.bench_ranking [--markets 10000] [--repeat 200]
+"""
+import argparse
+import random
+import time
+
+from api.market_store import MarketStore
+
+CATEGORIES = ["Crypto", "Economics", "Politics", "Sports", "Weather", "Financials"]
+
+
+def synthetic_markets(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    markets = []
+    for i in range(n):
+        bid = rng.randint(1, 97)
+        markets.append({
+            "ticker": f"SYN-{i:06d}",
+            "event_ticker": f"EVT-{i // 10:05d}",
+            "title": f"Synthetic market {i}",
+            "category": rng.choice(CATEGORIES),
+            "status": "open",
+            "yes_bid": bid,
+            "yes_ask": bid + rng.randint(1, 3),
+            "last_price": bid,
+            "volume": rng.randint(0, 1_000_000),
+            "close_time": f"2025-04-{rng.randint(1, 28):02d}T20:00:00Z",
+        })
+    return markets
+
+
+def timed(fn, repeat: int) -> float:
+    """Mean microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--markets", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    markets = synthetic_markets(args.markets)
+    build_us = timed(lambda: MarketStore(markets), max(1, args.repeat // 20))
+    store = MarketStore(markets)
+    print(f"markets={args.markets}  store build (per refresh): {build_us / 1000:8.2f} ms")
+
+    for sort in ("volume", "spread"):
+        descending = sort == "volume"
+        key = store.sort_key(sort)
+        for category in (None, "Crypto"):
+            rows = store.select(category=category)
+            for k in (10, 50):
+                heap_us = timed(lambda: store.top(rows, k, sort), args.repeat)
+                sort_us = timed(lambda: sorted(rows, key=key, reverse=descending)[:k], args.repeat)
+                print(
+                    f"sort={sort:<7} category={str(category):<7} n={len(rows):<6} k={k:<3} "
+                    f"heap={heap_us:9.1f} us  full sort={sort_us:9.1f} us"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Micro-benchmark: Kalshi request signing throughput.
+
+Compares re-parsing the PEM on every request (the old `auth_headers()`)
+with the cached `KalshiSigner`, single-threaded and from a thread pool.
+
+    python -m bench.bench_signer [--seconds 2] [--threads 8]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from api.kalshi_auth import KalshiSigner
+
+
+def make_pem() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def run(fn, seconds: float, threads: int) -> float:
+    """Signatures per second for `fn` over `seconds`, across `threads` workers."""
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        n = 0
+        while time.perf_counter() < deadline:
+            fn()
+            n += 1
+        return n
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(lambda _: worker(), range(threads)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    pem = make_pem()
+    signer = KalshiSigner("bench-key", pem)
+
+    def before():
+        # Old behaviour: parse the key on every request
+        KalshiSigner("bench-key", pem).headers("GET", "/markets")
+
+    def after():
+        signer.headers("GET", "/markets")
+
+    for threads in (1, args.threads):
+        b = run(before, args.seconds, threads)
+        a = run(after, args.seconds, threads)
+        print(f"threads={threads:<3} before={b:10.1f} sig/s  after={a:10.1f} sig/s  speedup={a / b:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark: cold start of the API apps.
+
+Each run is a fresh interpreter. Reports the slowest imports from
+`python -X importtime`, the import time of the app module, and the time from
+process start to the first /api/health response (lifespan included, so
+WARMUP_ON_STARTUP shows up here too).
+
+    python -m bench.bench_startup [--app api.index] [--runs 5] [--top 15] [--warmup]
+                                  [--json startup.json] [--max-ms 1500]
+
+With --max-ms the exit status is 1 when the median time to first response
+exceeds the budget, so it can guard against regressions in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_RESPONSE = """
+import json, time
+start = time.perf_counter()
+import {app} as target
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(target.app) as client:
+    ready = time.perf_counter()
+    status = client.get("/api/health").status_code
+done = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - start) * 1000, "ready_ms": (ready - start) * 1000,
+                  "first_response_ms": (done - start) * 1000, "status": status}}))
+"""
+
+
+def child_env(warmup: bool) -> dict:
+    env = dict(os.environ)
+    env["WARMUP_ON_STARTUP"] = "true" if warmup else "false"
+    env.setdefault("LOG_FILE", os.devnull)
+    return env
+
+
+def import_report(app: str, env: dict, top: int) -> list:
+    """Slowest modules by cumulative import time, as (module, self_ms, cumulative_ms)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {app}"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Only modules imported directly by the app or its top-level imports
+        if len(name) - len(name.lstrip()) <= 3:
+            rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+
+
+def first_response(app: str, env: dict) -> dict:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", FIRST_RESPONSE.format(app=app)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    # Includes interpreter start-up, which the in-process timers can't see
+    result["process_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", action="append", help="module exposing `app` (repeatable)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--warmup", action="store_true", help="run with WARMUP_ON_STARTUP=true")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--max-ms", type=float, help="fail if median process start to first response exceeds this")
+    args = parser.parse_args()
+
+    env = child_env(args.warmup)
+    report = {}
+    for app in args.app or ["api.index", "backup.index"]:
+        print(f"== {app} (warmup={'on' if args.warmup else 'off'})")
+        imports = import_report(app, env, args.top)
+        for name, self_ms, cumulative_ms in imports:
+            print(f"  {name:<40} self={self_ms:8.1f} ms  cumulative={cumulative_ms:8.1f} ms")
+
+        runs = [first_response(app, env) for _ in range(args.runs)]
+        summary = {
+            field: round(statistics.median(r[field] for r in runs), 1)
+            for field in ("import_ms", "ready_ms", "first_response_ms", "process_ms")
+        }
+        print(
+            f"  median of {args.runs}: import={summary['import_ms']} ms  ready={summary['ready_ms']} ms  "
+            f"first response={summary['first_response_ms']} ms  process start to response={summary['process_ms']} ms"
+        )
+        report[app] = {"warmup": args.warmup, "imports": imports, "median": summary, "runs": runs}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_ms is not None:
+        slow = [app for app, r in report.items() if r["median"]["process_ms"] > args.max_ms]
+        if slow:
+            print(f"over budget ({args.max_ms} ms): {', '.join(slow)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Local stand-in for the Kalshi trade API and the OpenAI chat endpoint.
+
+Serves the subset of endpoints the apps call, with deterministic synthetic
+data, configurable latency and an optional share of 429 responses:
+
+    /trade-api/v2/markets                  cursor-paginated (limit <= 1000)
+    /trade-api/v2/markets/{ticker}/orderbook
+    /trade-api/v2/portfolio/orders         GET / POST, plus /batched and DELETE /{id}
+    /trade-api/v2/portfolio/positions
+    /trade-api/v2/log_in
+    /v1/chat/completions                   OpenAI-style SSE stream
+
+    FAKE_KALSHI_MARKETS=5000 FAKE_KALSHI_LATENCY_MS=20 FAKE_KALSHI_429_RATE=0.01 \\
+        python -m uvicorn bench.fake_kalshi:app --port 8900
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import zlib
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from bench.bench_ranking import synthetic_markets
+
+PREFIX = "/trade-api/v2"
+
+
+class FakeConfig:
+    def __init__(self):
+        self.markets = int(os.getenv("FAKE_KALSHI_MARKETS", 5000))
+        self.latency_ms = float(os.getenv("FAKE_KALSHI_LATENCY_MS", 20))
+        self.jitter_ms = float(os.getenv("FAKE_KALSHI_JITTER_MS", 10))
+        self.rate_429 = float(os.getenv("FAKE_KALSHI_429_RATE", 0))
+        self.retry_after = os.getenv("FAKE_KALSHI_RETRY_AFTER", "0.2")
+        self.positions = int(os.getenv("FAKE_KALSHI_POSITIONS", 200))
+        self.openai_tokens = int(os.getenv("FAKE_OPENAI_TOKENS", 60))
+        self.openai_token_ms = float(os.getenv("FAKE_OPENAI_TOKEN_MS", 5))
+
+
+config = FakeConfig()
+markets = synthetic_markets(config.markets)
+orders = {}
+app = FastAPI()
+
+
+async def upstream_delay():
+    """Simulated network + exchange latency; returns a 429 response when throttling."""
+    delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+    if config.rate_429 and random.random() < config.rate_429:
+        return JSONResponse({"error": "too many requests"}, status_code=429, headers={"Retry-After": config.retry_after})
+    return None
+
+
+def orderbook(ticker: str) -> dict:
+    rng = random.Random(zlib.crc32(ticker.encode()))
+    bid = rng.randint(5, 90)
+    yes = [[p, rng.randint(1, 500)] for p in range(max(1, bid - 5), bid + 1)]
+    no = [[p, rng.randint(1, 500)] for p in range(max(1, 97 - bid - 5), 97 - bid)]
+    return {"orderbook": {"yes": yes, "no": no}}
+
+
+def place(payload: dict) -> dict:
+    order = {
+        "order_id": str(uuid4()),
+        "client_order_id": payload.get("client_order_id"),
+        "ticker": payload.get("ticker"),
+        "side": payload.get("side"),
+        "action": payload.get("action"),
+        "type": payload.get("type"),
+        "yes_price": payload.get("yes_price"),
+        "count": payload.get("count"),
+        "status": "resting",
+        "created_time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    orders[order["order_id"]] = order
+    return order
+
+
+@app.post(f"{PREFIX}/log_in")
+async def log_in():
+    return {"token": f"fake-{uuid4()}", "member_id": "fake-member"}
+
+
+@app.get(f"{PREFIX}/markets")
+async def get_markets(limit: int = 100, cursor: str = None):
+    throttled = await upstream_delay()
+    if throttled:
+        return throttled
+    start = int(cursor or 0)
+    end = start + max(1, min(limit, 1000))
+    return {"markets": markets[start:end], "cursor": str(end) if end < len(markets) else ""}
+
+
+@app.get(f"{PREFIX}/markets/{{ticker}}/orderbook")
+async def get_orderbook(ticker: str):
+    return await upstream_delay() or orderbook(ticker)
+
+
+@app.post(f"{PREFIX}/portfolio/orders")
+async def create_order(request: Request):
+    throttled = await upstream_delay()
+    if throttled:
+        return throttled
+    return JSONResponse({"order": place(await request.json())}, status_code=201)
+
+
+@app.post(f"{PREFIX}/portfolio/orders/batched")
+async def create_orders(request: Request):
+    throttled = await upstream_delay()
+    if throttled:
+        return throttled
+    body = await request.json()
+    return JSONResponse({"orders": [{"order": place(o)} for o in body.get("orders", [])]}, status_code=201)
+
+
+@app.get(f"{PREFIX}/portfolio/orders")
+async def list_orders():
+    return await upstream_delay() or {"orders": list(orders.values())[-100:], "cursor": ""}
+
+
+@app.delete(f"{PREFIX}/portfolio/orders/{{order_id}}")
+async def cancel_order(order_id: str):
+    throttled = await upstream_delay()
+    if throttled:
+        return throttled
+    order = orders.pop(order_id, None)
+    if order is None:
+        return JSONResponse({"error": "order not found"}, status_code=404)
+    return {"order": {**order, "status": "canceled"}, "reduced_by": order["count"]}
+
+
+@app.get(f"{PREFIX}/portfolio/positions")
+async def get_positions():
+    throttled = await upstream_delay()
+    if throttled:
+        return throttled
+    rng = random.Random(11)
+    positions = []
+    for m in markets[:config.positions]:
+        position = rng.randint(-50, 50) or 1
+        positions.append({
+            "ticker": m["ticker"],
+            "position": position,
+            "market_exposure": abs(position) * m["yes_bid"],
+            "realized_pnl": rng.randint(-500, 500),
+            "total_traded": abs(position) * m["yes_bid"],
+            "resting_orders_count": 0,
+            "fees_paid": rng.randint(0, 50),
+        })
+    return {"market_positions": positions, "event_positions": [], "cursor": ""}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    created = int(time.time())
+
+    def chunk(delta: dict, finish=None) -> str:
+        data = {
+            "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": body.get("model"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+        }
+        return f"data: {json.dumps(data)}\n\n"
+
+    async def stream():
+        yield chunk({"role": "assistant", "content": ""})
+        for i in range(config.openai_tokens):
+            await asyncio.sleep(config.openai_token_ms / 1000)
+            yield chunk({"content": f"| SYN-{i:06d} | Buy YES | " if i % 8 == 0 else "token "})
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
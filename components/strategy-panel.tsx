@@ -5,18 +5,58 @@ import { useState } from "react";
 export function StrategyPanel() {
   const [strategy, setStrategy] = useState("");
   const [recommendations, setRecommendations] = useState<any[]>([]);
+  const [analysis, setAnalysis] = useState("");
   const [loading, setLoading] = useState(false);
 
+  // Server-sent events: "agent" arrives first, then "token" deltas from the LLM, then "done"
+  function handleEvent(event: string, data: any) {
+    if (event === "agent") {
+      const content = data.recommendations?.content;
+      setRecommendations(Array.isArray(content) ? content : []);
+    } else if (event === "token") {
+      setAnalysis((prev) => prev + data.delta);
+    }
+  }
+
   async function submitStrategy() {
     setLoading(true);
-    const res = await fetch("/api/recommendations", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ strategy })
-    });
-    const data = await res.json();
-    setRecommendations(data.recommendations || []);
-    setLoading(false);
+    setRecommendations([]);
+    setAnalysis("");
+    try {
+      const res = await fetch("/api/recommendations", {
+        method: "POST",
+        headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+        body: JSON.stringify({ strategy })
+      });
+      if (!res.body || !res.headers.get("content-type")?.includes("text/event-stream")) {
+        const data = await res.json();
+        const content = data.recommendations?.content ?? data.recommendations;
+        setRecommendations(Array.isArray(content) ? content : []);
+        return;
+      }
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const blocks = buffer.split("\n\n");
+        buffer = blocks.pop() ?? "";
+        for (const block of blocks) {
+          let event = "message";
+          let data = "";
+          for (const line of block.split("\n")) {
+            if (line.startsWith("event: ")) event = line.slice(7);
+            else if (line.startsWith("data: ")) data += line.slice(6);
+          }
+          if (data) handleEvent(event, JSON.parse(data));
+        }
+      }
+    } finally {
+      setLoading(false);
+    }
   }
 
   return (
@@ -50,6 +90,10 @@ export function StrategyPanel() {
           ))}
         </div>
       )}
+
+      {analysis && (
+        <pre className="pt-4 whitespace-pre-wrap text-sm">{analysis}</pre>
+      )}
     </div>
   );
 } 
\ No newline at end of file
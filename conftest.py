@@ -0,0 +1,23 @@
+import httpx
+import pytest
+
+
+@pytest.fixture
+def kalshi_transport(monkeypatch):
+    """Serve a KalshiClient (default: the api app's) from a fake for one test.
+
+    `kalshi_transport(handler)` takes a `request -> response` function or a
+    ready transport (e.g. an `ExchangeTransport`); the client's own
+    transport and HTTP/2 setting come back when the test ends.
+    """
+
+    def install(handler, client=None):
+        if client is None:
+            import api.index as index
+            client = index.kalshi
+        transport = handler if isinstance(handler, httpx.AsyncBaseTransport) else httpx.MockTransport(handler)
+        monkeypatch.setattr(client, "http2", False)
+        monkeypatch.setattr(client, "transport", transport)
+        return client
+
+    return install
@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+import numpy as np
+from fastapi.testclient import TestClient
+
+import api.index as index
+import pytest
+
+from api.backtest import BacktestPool, Panel, PanelTooLarge, backtest, run_backtest, run_many
+from api.market_history import MarketHistory
+
+T0 = 1_760_000_000_000  # 2025-10-09T08:53:20Z, in ms
+
+
+def quote(ticker, bid, ask=None):
+    return {"ticker": ticker, "yes_bid": bid, "yes_ask": ask if ask is not None else bid + 2, "last_price": bid}
+
+
+def record(history, path: dict):
+    """path: ticker -> bids per minute."""
+    for minute in range(max(map(len, path.values()))):
+        history.record([quote(t, bids[minute]) for t, bids in path.items() if minute < len(bids)], T0 + minute * 60_000)
+
+
+def test_panel_forward_fills_change_only_records(tmp_path):
+    history = MarketHistory(str(tmp_path))
+    record(history, {"A": [30, 30, 30, 35], "B": [60, 61]})
+    panel = Panel.from_history(history, step_seconds=60)
+    assert panel.tickers == ["A", "B"]
+    assert panel.yes_bid.tolist() == [[30, 60], [30, 61], [30, 61], [35, 61]]
+    assert panel.yes_ask[:, 0].tolist() == [32, 32, 32, 37]
+
+    later = Panel.from_history(history, start=(T0 + 120_000) / 1000, step_seconds=60)
+    assert later.yes_bid.tolist() == [[30, 61], [35, 61]]  # quotes from before `start` carried in
+
+
+def test_target_stop_and_close_out():
+    bids = np.array([[30, 30, 30], [35, 27, 31], [41, 24, 33], [45, 20, 34]], dtype=np.int32)
+    panel = Panel(["WIN", "LOSS", "OPEN"], np.arange(4) * 60_000, bids, bids + 2, 60_000)
+    result = backtest(panel, {"entry_below": 32, "target": 8, "stop_loss": 6})
+
+    # WIN: in at 32, out at 41 (+9). LOSS: in at 32, stopped at 24 (-8), in again at 22, closed at 20 (-2).
+    # OPEN: in at 32, closed at 34 (+2).
+    assert result["pnl_cents"] == 9 - 8 - 2 + 2
+    assert result["trades"] == 4 and result["wins"] == 2
+    assert result["max_drawdown_cents"] > 0
+
+
+def test_no_side_fees_and_parallel_runs_match():
+    rng = np.random.default_rng(3)
+    bids = np.clip(50 + rng.integers(-2, 3, size=(200, 30)).cumsum(axis=0), 1, 97).astype(np.int32)
+    panel = Panel([f"T{i}" for i in range(30)], np.arange(200) * 60_000, bids, bids + 1, 60_000)
+    params = [{"side": side, "entry_below": below, "target": 5, "stop_loss": 5}
+              for side in ("yes", "no") for below in (45, 55)]
+
+    serial = run_many(panel, params, fee=1, workers=1)
+    parallel = run_many(panel, params, fee=1, workers=2)
+    pool = BacktestPool(workers=3)
+    shared = [run_many(panel, params, fee=1, pool=pool) for _ in range(2)]
+    asyncio.run(pool.aclose())
+    assert serial == parallel == shared[0] == shared[1]
+    assert all(r["trades"] > 0 for r in serial)
+    free = backtest(panel, params[0])
+    assert serial[0]["pnl_cents"] == free["pnl_cents"] - 2 * free["trades"]
+
+
+def test_run_backtest_and_endpoint(tmp_path, monkeypatch, kalshi_transport):
+    history = MarketHistory(str(tmp_path))
+    record(history, {"A": [30, 35, 42, 44], "B": [70, 72]})
+    result = run_backtest(history, [{"entry_below": 40, "target": 10}, {"entry_below": 20}], workers=1)
+    assert result["tickers"] == 2 and result["steps"] == 4
+    assert result["results"][0]["pnl_cents"] == 42 - 32
+    assert result["results"][1]["trades"] == 0
+    assert result["best"] == 0
+
+    monkeypatch.setattr(index, "history", history)
+    kalshi_transport(lambda request: httpx.Response(404, json={}))
+    with TestClient(index.app) as client:
+        body = client.post("/api/backtest", json={"params": [{"entry_below": 40, "target": 10}], "tickers": ["A"]}).json()
+    assert body["tickers"] == 1
+    assert body["results"][0]["pnl_cents"] == 10
+
+
+def test_oversized_panels_are_refused_before_allocating(tmp_path, monkeypatch, kalshi_transport):
+    history = MarketHistory(str(tmp_path))
+    record(history, {"A": [30, 35, 42, 44], "B": [70, 72]})
+    with pytest.raises(PanelTooLarge):
+        Panel.from_history(history, step_seconds=1, max_cells=300)   # 181 one-second steps x 2 tickers
+    assert Panel.from_history(history, step_seconds=60, max_cells=8).shape == (4, 2)
+
+    monkeypatch.setattr(index, "history", history)
+    monkeypatch.setattr("api.backtest.MAX_CELLS", 100)
+    kalshi_transport(lambda request: httpx.Response(404, json={}))
+    with TestClient(index.app) as client:
+        response = client.post("/api/backtest", json={"params": [{}], "step_seconds": 1})
+    assert response.status_code == 400 and "cell limit" in response.json()["error"]
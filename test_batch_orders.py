@@ -0,0 +1,61 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.risk import RiskEngine, RiskLimits
+
+
+def fake_kalshi(request: httpx.Request) -> httpx.Response:
+    if request.method == "POST" and request.url.path.endswith("/portfolio/orders"):
+        order = json.loads(request.content)
+        if order["ticker"] == "HALTED":
+            return httpx.Response(400, json={"error": "market closed"})
+        return httpx.Response(201, json={"order": {"order_id": "o-" + order["client_order_id"]}})
+    if request.method == "DELETE":
+        order_id = request.url.path.rsplit("/", 1)[-1]
+        if order_id == "gone":
+            return httpx.Response(404, json={"error": "not found"})
+        return httpx.Response(200, json={"order": {"order_id": order_id, "status": "canceled"}})
+    return httpx.Response(404)
+
+
+def test_batch_legs_succeed_or_fail_independently(kalshi_transport):
+    kalshi_transport(fake_kalshi)
+    legs = [
+        {"ticker": "BTC-A", "side": "yes", "count": 2, "price": 40, "client_order_id": "leg-1"},
+        {"ticker": "HALTED", "side": "no", "count": 1, "price": 30, "client_order_id": "leg-2"},
+        {"ticker": "ETH-A", "side": "maybe", "count": 1, "price": 30, "client_order_id": "leg-3"},
+    ]
+    with TestClient(index.app) as client:
+        body = client.post("/api/execute/batch", json={"orders": legs}).json()
+        duplicate = client.post("/api/execute/batch", json={"orders": [legs[0], legs[0]]}).json()
+        cancels = client.post("/api/orders/cancel/batch", json={"order_ids": ["o-leg-1", "gone"]}).json()
+
+    results = body["results"]
+    assert results["leg-1"]["status"] == "submitted"
+    assert results["leg-1"]["kalshi_response"]["order"]["order_id"] == "o-leg-1"
+    assert results["leg-2"]["status"] == "error"
+    assert results["leg-3"]["status"] == "rejected"
+    assert body["submitted"] == 1 and body["failed"] == 2
+
+    assert duplicate["status"] == "error"
+
+    assert cancels["results"]["o-leg-1"]["status"] == "canceled"
+    assert cancels["results"]["gone"]["status"] == "error"
+
+
+def test_legs_missing_from_a_short_batched_response_are_errors(monkeypatch, kalshi_transport):
+    monkeypatch.setattr(index, "KALSHI_BATCH_ENDPOINTS", True)
+    monkeypatch.setattr(index, "risk", RiskEngine(RiskLimits(price_collar=0)))
+    kalshi_transport(
+        lambda request: httpx.Response(201, json={"orders": [{"order": {"order_id": "o-1"}, "error": None}]}))
+    legs = [{"ticker": "BTC-A", "side": "yes", "count": 1, "price": 40, "client_order_id": f"leg-{i}"} for i in (1, 2)]
+    with TestClient(index.app) as client:
+        body = client.post("/api/execute/batch", json={"orders": legs}).json()
+
+    assert body["results"]["leg-1"]["status"] == "submitted"
+    assert body["results"]["leg-2"] == {"status": "error", "ticker": "BTC-A", "error": "missing from upstream response"}
+    assert body["submitted"] == 1 and body["failed"] == 1
+    assert list(index.risk.pending) == ["leg-1"]   # the missing leg's reservation was released
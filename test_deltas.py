@@ -0,0 +1,113 @@
+import httpx
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.deltas import DeltaLog, etag_matches
+
+MARKETS = [{"ticker": f"M-{i}", "volume": i} for i in range(5)]
+POSITIONS = {"market_positions": [{"ticker": "M-1", "position": 3, "market_exposure": 120}], "event_positions": [], "cursor": ""}
+
+
+def fake_kalshi(request):
+    if request.url.path.endswith("/markets"):
+        return httpx.Response(200, json={"markets": MARKETS, "cursor": ""})
+    if request.url.path.endswith("/portfolio/positions"):
+        return httpx.Response(200, json=POSITIONS)
+    return httpx.Response(404, json={})
+
+
+class Req:
+    def __init__(self, header):
+        self.headers = {"if-none-match": header}
+
+
+def test_version_only_changes_with_content():
+    log = DeltaLog("ticker", history=4)
+    first = log.update([{"ticker": "A", "p": 1}])
+    etag = log.etag
+    assert log.update([{"ticker": "A", "p": 1}]) == first
+    assert log.etag == etag
+    second = log.update([{"ticker": "A", "p": 2}])
+    assert second != first and 0 < second < 2 ** 53
+    assert log.etag != etag
+    assert DeltaLog().etag == 'W/"empty"' and etag.startswith('W/"')
+
+
+def test_diff_lists_changed_and_removed():
+    log = DeltaLog("ticker", history=2)
+    v1 = log.update([{"ticker": "A", "p": 1}, {"ticker": "B", "p": 1}])
+    v2 = log.update([{"ticker": "A", "p": 2}, {"ticker": "C", "p": 1}])
+    delta = log.diff(v1)
+    assert delta["version"] == v2 and delta["since"] == v1
+    assert delta["changed"] == [{"ticker": "A", "p": 2}, {"ticker": "C", "p": 1}]
+    assert delta["removed"] == ["B"]
+    assert log.diff(v2)["changed"] == []
+    log.update([{"ticker": "A", "p": 3}])
+    assert log.diff(v1) is None  # fell out of history
+
+
+def test_instances_with_the_same_content_agree_on_versions():
+    items = [{"ticker": "A", "p": 1}, {"ticker": "B", "p": 1}]
+    one, other = DeltaLog("ticker"), DeltaLog("ticker")
+    one.update([{"ticker": "Z", "p": 9}])   # a different history before reaching the same content
+    assert one.update(items) == other.update(list(reversed(items))) and one.etag == other.etag
+
+    changed = [{"ticker": "A", "p": 2}, {"ticker": "B", "p": 1}]
+    since = one.version
+    other.update(changed)
+    assert other.diff(since)["changed"] == [{"ticker": "A", "p": 2}]
+    assert DeltaLog("ticker").diff(since) is None   # never seen here: the caller sends the full response
+
+
+def test_etag_matching():
+    assert etag_matches(Req('"x", W/"abc"'), '"abc"')
+    assert etag_matches(Req("*"), '"abc"')
+    assert not etag_matches(Req('"abd"'), '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_feed_revalidation_and_since(kalshi_transport):
+    global MARKETS
+    kalshi_transport(fake_kalshi)
+    index.market_cache.snapshot = None
+    try:
+        with TestClient(index.app) as client:
+            first = client.get("/api/feed")
+            etag, version = first.headers["etag"], int(first.headers["x-version"])
+            assert first.headers["cache-control"] == "no-cache" and first.headers["vary"] == "Accept-Encoding"
+            assert first.json()["version"] == version
+
+            again = client.get("/api/feed", headers={"If-None-Match": etag})
+            assert again.status_code == 304 and again.content == b""
+            assert again.headers["etag"] == etag and again.headers["vary"] == "Accept-Encoding"
+            gzipped = client.get("/api/feed", headers={"Accept-Encoding": "gzip"})
+            assert gzipped.headers["etag"] == etag and gzipped.headers["vary"] == "Accept-Encoding"
+
+            MARKETS = MARKETS[1:] + [{"ticker": "M-9", "volume": 9}]
+            MARKETS[0] = {"ticker": "M-1", "volume": 100}
+            index.market_cache.snapshot = None
+            delta = client.get(f"/api/feed?since={version}", headers={"If-None-Match": etag}).json()
+            assert "markets" not in delta
+            assert delta["version"] != version and delta["version"] == index.feed_deltas.version
+            assert [m["ticker"] for m in delta["changed"]] == ["M-1", "M-9"]
+            assert delta["removed"] == ["M-0"]
+
+            full = client.get("/api/feed?since=-5").json()
+            assert len(full["markets"]) == 5
+    finally:
+        index.market_cache.snapshot = None
+
+
+def test_positions_etag_and_since(kalshi_transport):
+    kalshi_transport(fake_kalshi)
+    with TestClient(index.app) as client:
+        first = client.get("/api/positions")
+        assert [p["ticker"] for p in first.json()["positions"]] == ["M-1"]
+        etag, version = first.headers["etag"], int(first.headers["x-version"])
+        assert client.get("/api/positions", headers={"If-None-Match": etag}).status_code == 304
+
+        POSITIONS["market_positions"].append({"ticker": "M-2", "position": -1, "market_exposure": 60})
+        delta = client.get(f"/api/positions?since={version}").json()
+        assert [(p["ticker"], p["side"], p["exposure_cents"]) for p in delta["changed"]] == [("M-2", "no", 60)]
+        assert delta["totals"]["exposure_cents"] == 180
+        assert delta["event_positions"] == []
@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.exchange_sim import Exchange, ExchangeTransport, SimError
+from api.kalshi_client import KalshiClient
+from api.risk import RiskEngine, RiskLimits
+
+
+def quiet_exchange(**kwargs):
+    """Exchange with empty books: no market maker quotes, no taker flow, no background ticks."""
+    return Exchange(**{"markets": 2, "depth": 0, "taker_rate": 0, "tick_interval": 0, "seed": 1, **kwargs})
+
+
+def order(ex, side="yes", action="buy", count=10, price=40, ticker="SIM-00000", **extra):
+    return ex.place({"ticker": ticker, "side": side, "action": action, "count": count, "yes_price": price,
+                     "type": "limit", **extra})
+
+
+def ask(ex, price, count, ticker="SIM-00000"):
+    """Resting market maker ask (the account can't sell what it doesn't hold)."""
+    return ex._maker_order(ex.books[ticker], False, price, count)
+
+
+def test_price_time_priority_and_partial_fills():
+    ex = quiet_exchange()
+    first = ask(ex, 45, 5)     # asks at 45: first, second; at 44: best
+    second = ask(ex, 45, 5)
+    best = ask(ex, 44, 3)
+    assert ex.books["SIM-00000"].best_ask == 44
+
+    taker = order(ex, action="buy", count=10, price=45)
+    assert taker.status == "executed" and taker.filled == 10
+    assert best.remaining == 0 and first.remaining == 0   # better price, then earlier time
+    assert second.remaining == 3
+    fills = [f for f in ex.recent_fills() if f["order_id"] == taker.order_id]
+    assert [f["yes_price"] for f in fills] == [45, 45, 44]  # newest first
+    assert ex.books["SIM-00000"].last_price == 45 and ex.books["SIM-00000"].volume == 10
+
+
+def test_no_orders_trade_against_yes_orders():
+    ex = quiet_exchange()
+    yes_bid = order(ex, side="yes", action="buy", count=4, price=60)
+    no_buy = order(ex, side="no", action="buy", count=4, no_price=40, yes_price=None)  # YES ask at 60
+    assert yes_bid.status == no_buy.status == "executed"
+    assert ex.books["SIM-00000"].depth() == {"yes": None, "no": None}
+    # The account took both sides: positions net to zero and the cash comes back
+    holding = ex.portfolio.holdings["SIM-00000"]
+    assert holding.position == 0 and ex.balance() == ex.starting_balance
+
+
+def test_cancel_is_lazy_and_releases_held_cash():
+    ex = quiet_exchange(balance=10_000)
+    bid = order(ex, count=100, price=40)
+    assert ex.held == 4000
+    with pytest.raises(SimError) as e:
+        order(ex, count=200, price=40)
+    assert e.value.code == "insufficient_balance"
+
+    canceled, reduced = ex.cancel(bid.order_id)
+    assert (canceled.status, reduced, ex.held) == ("canceled", 100, 0)
+    assert ex.books["SIM-00000"].best_bid == 0
+    with pytest.raises(SimError):
+        ex.cancel(bid.order_id)
+    # The dead order left in the level is skipped by later matching
+    assert ask(ex, 40, 1).remaining == 1
+
+
+def test_positions_balance_and_market_orders():
+    ex = quiet_exchange(balance=10_000)
+    ask(ex, 30, 10, ticker="SIM-00001")
+    bought = ex.place({"ticker": "SIM-00001", "side": "yes", "action": "buy", "count": 15, "type": "market"})
+    assert bought.status == "canceled" and bought.filled == 10          # IOC: 5 unfilled
+    assert ex.held == 0
+    assert ex.positions() == [{"ticker": "SIM-00001", "position": 10, "market_exposure": 300, "realized_pnl": 0,
+                               "fees_paid": 0, "resting_orders_count": 0}]
+    sold = order(ex, action="sell", count=10, price=35, ticker="SIM-00001")
+    assert sold.status == "resting" and ex.selling["SIM-00001", "yes"] == 10
+    ex.cancel(sold.order_id)
+    assert ex.selling["SIM-00001", "yes"] == 0
+    ex._maker_order(ex.books["SIM-00001"], True, 35, 10)                # a bid to sell into
+    sold = order(ex, action="sell", count=10, price=35, ticker="SIM-00001")
+    assert sold.status == "executed" and ex.portfolio.holdings["SIM-00001"].realized == 50
+    assert ex.balance() == 10_050
+
+    order(ex, count=10, price=70)                                       # a resting YES bid at 70...
+    maker_sell = ex._maker_order(ex.books["SIM-00000"], False, 70, 10)
+    assert maker_sell.remaining == 0
+    assert ex.portfolio.holdings["SIM-00000"].position == 10
+    assert ex.balance() == 10_050 - 700
+
+
+def test_sells_beyond_the_holding_and_malformed_input_are_rejected():
+    ex = quiet_exchange(balance=10_000)
+    ex._maker_order(ex.books["SIM-00000"], True, 50, 500)
+    with pytest.raises(SimError) as e:
+        ex.place({"ticker": "SIM-00000", "side": "yes", "action": "sell", "count": 500, "type": "market"})
+    assert e.value.code == "insufficient_position" and ex.balance() == 10_000
+
+    ask(ex, 40, 5, ticker="SIM-00001")
+    order(ex, count=5, price=40, ticker="SIM-00001")                    # hold 5 YES
+    order(ex, action="sell", count=3, price=60, ticker="SIM-00001")     # 3 of them committed to a resting sell
+    with pytest.raises(SimError) as e:
+        order(ex, action="sell", count=3, price=60, ticker="SIM-00001")
+    assert e.value.code == "insufficient_position"
+    with pytest.raises(SimError) as e:
+        order(ex, side="no", action="sell", count=1, price=60, ticker="SIM-00001")   # holds no NO contracts
+    assert e.value.code == "insufficient_position"
+    with pytest.raises(SimError) as e:
+        order(ex, price="forty")
+    assert e.value.status == 400 and e.value.code == "invalid_parameters"
+
+
+def test_step_moves_prices_and_quotes_both_sides():
+    ex = Exchange(markets=5, tick_interval=0, seed=3)
+    for _ in range(20):
+        ex.step()
+    for ticker in ex.books:
+        m = ex.market(ticker)
+        assert 1 <= m["yes_bid"] < m["yes_ask"] <= 99
+        assert m["no_ask"] == 100 - m["yes_bid"]
+    assert sum(book.volume for book in ex.books.values()) > 0
+    assert ex.steps == 21
+
+
+def test_transport_speaks_the_kalshi_api():
+    ex = quiet_exchange()
+    client = KalshiClient("https://sim.invalid/trade-api/v2", http2=False, transport=ExchangeTransport(ex))
+
+    async def run():
+        await client.start()
+        try:
+            page = (await client.get("/markets", params={"limit": 1})).json()
+            assert [m["ticker"] for m in page["markets"]] == ["SIM-00000"] and page["cursor"] == "1"
+
+            created = await client.post("/portfolio/orders", json={
+                "ticker": "SIM-00000", "side": "yes", "action": "buy", "count": 5, "type": "limit", "yes_price": 41})
+            assert created.status_code == 201
+            order_id = created.json()["order"]["order_id"]
+            book = (await client.get("/markets/SIM-00000/orderbook")).json()["orderbook"]
+            assert book == {"yes": [[41, 5]], "no": None}
+
+            batch = (await client.post("/portfolio/orders/batched", json={"orders": [
+                {"ticker": "SIM-00000", "side": "no", "action": "buy", "count": 2, "type": "limit", "yes_price": 41},
+                {"ticker": "NOPE", "side": "yes", "action": "buy", "count": 1, "type": "limit", "yes_price": 41},
+            ]})).json()["orders"]
+            assert batch[0]["order"]["status"] == "executed" and batch[1]["error"]["code"] == "market_not_found"
+
+            canceled = (await client.request("DELETE", "/portfolio/orders/batched", json={"ids": [order_id, "x"]})).json()
+            assert canceled["orders"][0]["reduced_by"] == 3 and canceled["orders"][1]["error"]["code"] == "not_found"
+            positions = (await client.get("/portfolio/positions")).json()["market_positions"]
+            assert positions[0]["position"] == 0
+            assert (await client.get("/portfolio/nothing")).status_code == 404
+            assert (await client.get("/markets", params={"limit": "lots"})).status_code == 400
+            bad = await client.post("/portfolio/orders", json={"ticker": "SIM-00000", "side": "yes", "count": 1,
+                                                               "yes_price": "abc"})
+            assert bad.status_code == 400 and bad.json()["error"]["code"] == "invalid_parameters"
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+
+
+def test_app_trades_against_the_simulator(monkeypatch, kalshi_transport):
+    ex = Exchange(markets=3, tick_interval=0, seed=7)
+    monkeypatch.setattr(index, "exchange", ex)
+    monkeypatch.setattr(index, "risk", RiskEngine(RiskLimits(price_collar=0)))
+    kalshi_transport(ExchangeTransport(ex))
+    ask = ex.market("SIM-00002")["yes_ask"]
+    with TestClient(index.app) as client:
+        trade = client.post("/api/execute", json={"ticker": "SIM-00002", "side": "yes", "count": 3, "price": ask}).json()
+        positions = client.get("/api/positions").json()
+        stats = client.get("/api/simulator").json()
+    assert trade["status"] == "submitted" and trade["kalshi_response"]["order"]["status"] == "executed"
+    assert positions["positions"][0]["ticker"] == "SIM-00002" and positions["positions"][0]["position"] == 3
+    assert stats["orders_placed"] == 1 and stats["balance_cents"] == ex.starting_balance - 3 * ask
@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.fast_json import EncodedBodyCache, FastJSONResponse, negotiate
+
+MARKETS = [{"ticker": f"M-{i}", "category": "Crypto", "volume": i, "yes_bid": 40, "yes_ask": 42} for i in range(500)]
+ORDERS = b'{"orders": [{"order_id": "o-1", "ticker": "M-1", "status": "resting"}], "cursor": ""}'
+
+
+def fake_kalshi(request):
+    if request.url.path.endswith("/markets"):
+        return httpx.Response(200, json={"markets": MARKETS, "cursor": ""})
+    if request.url.path.endswith("/portfolio/orders"):
+        return httpx.Response(200, content=ORDERS, headers={"Content-Type": "application/json"})
+    return httpx.Response(404, json={})
+
+
+def test_negotiate_respects_q_values():
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0, deflate") is None
+    assert negotiate("") is None
+    assert negotiate("*") == "gzip"
+
+
+def test_small_bodies_are_not_compressed():
+    class Req:
+        headers = {"accept-encoding": "gzip"}
+
+    res = FastJSONResponse({"ok": True}, request=Req())
+    assert "content-encoding" not in res.headers
+    assert res.headers["vary"] == "Accept-Encoding"
+    assert json.loads(res.body) == {"ok": True}
+
+
+def test_feed_is_compressed_and_encoded_once_per_snapshot(kalshi_transport):
+    kalshi_transport(fake_kalshi)
+    index.market_cache.snapshot = None
+    with TestClient(index.app) as client:
+        first = client.get("/api/feed", headers={"Accept-Encoding": "gzip"})
+        misses = index.feed_bodies.misses
+        second = client.get("/api/feed", headers={"Accept-Encoding": "gzip"})
+        assert index.feed_bodies.misses == misses  # served from the body cache
+        plain = client.get("/api/feed", headers={"Accept-Encoding": "identity"})
+        top = client.get("/api/feed?sort=volume&limit=3")
+    index.market_cache.snapshot = None
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert int(first.headers["content-length"]) < len(plain.content) / 3
+    assert first.json() == second.json() == plain.json()
+    assert first.json()["markets"] == MARKETS
+    assert "content-encoding" not in plain.headers
+    assert [m["ticker"] for m in top.json()["markets"]] == ["M-499", "M-498", "M-497"]
+
+
+def test_upstream_body_is_relayed_byte_for_byte(kalshi_transport):
+    kalshi_transport(fake_kalshi)
+    with TestClient(index.app) as client:
+        res = client.get("/api/orders", headers={"Accept-Encoding": "identity"})
+    assert res.content == ORDERS
+
+
+def test_body_cache_evicts_oldest():
+    cache = EncodedBodyCache(max_entries=2)
+    for version in range(3):
+        body, encoding = cache.get(("snapshot", version), None, lambda: b"x" * 2000)
+    assert encoding is None and len(cache._bodies) == 2
+    body, encoding = cache.get(("snapshot", 2), "gzip", lambda: b"x" * 2000)
+    assert encoding == "gzip" and gzip.decompress(body) == b"x" * 2000
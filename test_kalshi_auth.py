@@ -0,0 +1,43 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+from api.kalshi_auth import KalshiSigner, get_signer
+
+private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+PEM = private_key.private_bytes(
+    serialization.Encoding.PEM,
+    serialization.PrivateFormat.PKCS8,
+    serialization.NoEncryption(),
+).decode()
+
+
+def verify(headers, method, full_path):
+    message = f"{headers['KALSHI-ACCESS-TIMESTAMP']}{method}{full_path}".encode()
+    private_key.public_key().verify(
+        base64.b64decode(headers["KALSHI-ACCESS-SIGNATURE"]),
+        message,
+        padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+        hashes.SHA256(),
+    )
+
+
+def test_signs_full_path_without_query():
+    # Env vars usually carry the key with escaped newlines
+    signer = KalshiSigner("key-id", PEM.replace("\n", "\\n"))
+    headers = signer.headers("get", "/markets?cursor=abc")
+    assert headers["KALSHI-ACCESS-KEY"] == "key-id"
+    verify(headers, "GET", "/trade-api/v2/markets")
+
+
+def test_signer_is_cached_and_thread_safe():
+    signer = get_signer("key-id", PEM)
+    assert get_signer("key-id", PEM) is signer
+
+    paths = [f"/markets/T{i}/orderbook" for i in range(32)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda p: (p, signer.headers("GET", p)), paths))
+    for path, headers in results:
+        verify(headers, "GET", f"/trade-api/v2{path}")
@@ -0,0 +1,60 @@
+import httpx
+from fastapi.testclient import TestClient
+
+import api.index as index
+
+seen = []
+
+
+def fake_kalshi(request: httpx.Request) -> httpx.Response:
+    seen.append(request)
+    if request.url.path.endswith("/markets"):
+        return httpx.Response(200, json={"markets": [{"ticker": "BTC-1"}]})
+    if request.url.path.endswith("/portfolio/orders") and request.method == "POST":
+        return httpx.Response(201, json={"order": {"order_id": "o-1"}})
+    return httpx.Response(404, json={})
+
+
+def test_client_is_reused_across_handlers(kalshi_transport):
+    seen.clear()
+    kalshi_transport(fake_kalshi)
+    with TestClient(index.app) as client:
+        pool = index.kalshi.client
+        assert client.get("/api/feed").json()["markets"] == [{"ticker": "BTC-1"}]
+        res = client.post("/api/execute", json={"ticker": "BTC-1", "side": "yes", "count": 1, "price": 40})
+        assert res.json()["status"] == "submitted"
+        assert index.kalshi.client is pool
+    # Closed by the lifespan hook on shutdown
+    assert pool.is_closed
+
+    assert [r.url.path for r in seen] == ["/trade-api/v2/markets", "/trade-api/v2/portfolio/orders"]
+
+
+def test_backup_orders_are_signed_after_admission(monkeypatch, kalshi_transport):
+    import backup.index as backup
+
+    events = []
+    acquire = backup.scheduler.acquire
+
+    async def admit(kind):
+        await acquire(kind)
+        events.append("admit")
+
+    def sign(method, path):
+        events.append("sign")
+        return {"KALSHI-ACCESS-KEY": "key-id"}
+
+    def send(request):
+        events.append("send")
+        assert request.headers["KALSHI-ACCESS-KEY"] == "key-id"
+        return httpx.Response(201, json={"order": {"order_id": "o-1"}})
+
+    monkeypatch.setattr(backup, "KALSHI_API_KEY", "key-id")
+    monkeypatch.setattr(backup, "KALSHI_API_SECRET", "secret")
+    monkeypatch.setattr(backup.scheduler, "acquire", admit)
+    monkeypatch.setattr(backup.kalshi, "auth_headers", sign)
+    kalshi_transport(send, backup.kalshi)
+    with TestClient(backup.app) as client:
+        res = client.post("/api/execute", json={"ticker": "BTC-1", "side": "yes", "count": 1, "price": 40})
+    assert res.json()["status"] == "submitted"
+    assert events == ["admit", "sign", "send"]
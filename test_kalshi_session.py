@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+import pytest
+
+from api.kalshi_client import KalshiClient
+from api.kalshi_session import KalshiSession, LoginError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeKalshi:
+    """Issues tokens t1, t2, ... and accepts only the latest one."""
+
+    def __init__(self, login_status=200):
+        self.login_status = login_status
+        self.logins = 0
+        self.orders = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/log_in"):
+            self.logins += 1
+            await asyncio.sleep(0.01)
+            return httpx.Response(self.login_status, json={"token": f"t{self.logins}"})
+        if request.headers.get("Authorization") != f"Bearer t{self.logins}":
+            return httpx.Response(401, json={"error": "unauthorized"})
+        self.orders.append(request.headers["Authorization"])
+        return httpx.Response(201, json={"order": {"order_id": f"o{len(self.orders)}"}})
+
+
+def make_session(fake, clock=None, **kwargs):
+    kalshi = KalshiClient("https://kalshi.test/trade-api/v2", transport=httpx.MockTransport(fake.handler), http2=False)
+    return KalshiSession(kalshi, "me@example.com", "pw", ttl=100, refresh_margin=10, clock=clock or FakeClock(), **kwargs)
+
+
+def test_concurrent_callers_share_one_login_and_reuse_the_token():
+    fake = FakeKalshi()
+    session = make_session(fake)
+
+    async def run():
+        tokens = await asyncio.gather(*(session.token() for _ in range(20)))
+        for _ in range(5):
+            await session.request("POST", "/portfolio/orders", json={})
+        return tokens
+
+    assert set(asyncio.run(run())) == {"t1"}
+    assert fake.logins == 1
+    assert len(fake.orders) == 5
+
+
+def test_refreshes_in_background_before_expiry():
+    fake = FakeKalshi()
+    clock = FakeClock()
+    session = make_session(fake, clock)
+
+    async def run():
+        assert await session.token() == "t1"
+        clock.now = 95  # inside the refresh margin: old token served, new one fetched behind it
+        assert await session.token() == "t1"
+        await asyncio.sleep(0.05)
+        return await session.token()
+
+    assert asyncio.run(run()) == "t2"
+    assert fake.logins == 2 and session.background_refreshes == 1
+
+    clock.now = 1000  # expired: callers wait for a fresh login
+    assert asyncio.run(session.token()) == "t3"
+
+
+def test_401_triggers_exactly_one_relogin_and_retry():
+    fake = FakeKalshi()
+    session = make_session(fake)
+
+    async def run():
+        await session.token()
+        fake.logins += 1  # upstream revoked t1 (only a newer token would be accepted)
+        return await asyncio.gather(*(session.request("POST", "/portfolio/orders", json={}) for _ in range(5)))
+
+    responses = asyncio.run(run())
+    assert [r.status_code for r in responses] == [201] * 5
+    assert fake.logins == 3  # the initial login, the revocation, one shared re-login
+    assert 1 <= session.relogins <= 5
+
+
+def test_failed_login_raises_and_is_retried_next_time():
+    fake = FakeKalshi(login_status=403)
+    session = make_session(fake)
+    with pytest.raises(LoginError):
+        asyncio.run(session.token())
+    fake.login_status = 200
+    assert asyncio.run(session.token()) == "t2"
+    assert session.login_failures == 1
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from api.market_cache import MarketCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_fetch(calls, fail=False):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if fail:
+            raise RuntimeError("upstream down")
+        return [{"ticker": f"T{len(calls)}"}]
+    return fetch
+
+
+def test_concurrent_misses_share_one_fetch():
+    calls = []
+    cache = MarketCache(make_fetch(calls), ttl=5, max_stale=60)
+
+    async def run():
+        return await asyncio.gather(*(cache.get() for _ in range(20)))
+
+    snapshots = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(s is snapshots[0] for s in snapshots)
+    assert cache.misses == 20 and cache.coalesced == 19
+
+
+def test_serves_stale_while_one_refresh_runs():
+    calls, clock = [], FakeClock()
+    cache = MarketCache(make_fetch(calls), ttl=5, max_stale=60, clock=clock)
+
+    async def run():
+        first = await cache.get()
+        assert (await cache.get()) is first and cache.hits == 1
+
+        clock.now = 10
+        stale = await asyncio.gather(*(cache.get() for _ in range(5)))
+        assert all(s is first for s in stale)
+        await cache._inflight
+        fresh = await cache.get()
+        assert fresh.version == 2 and fresh.markets == [{"ticker": "T2"}]
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert cache.stale_hits == 5
+
+
+def test_failed_refresh_keeps_previous_snapshot():
+    calls, clock = [], FakeClock()
+    cache = MarketCache(make_fetch(calls), ttl=5, max_stale=60, clock=clock)
+
+    async def run():
+        first = await cache.get()
+        cache.fetch = make_fetch(calls, fail=True)
+        clock.now = 10
+        assert (await cache.get()) is first
+        with pytest.raises(RuntimeError):
+            await cache._inflight
+        assert cache.snapshot is first
+
+    asyncio.run(run())
+    assert cache.stats()["refresh_errors"] == 1
+
+
+def test_failing_listener_does_not_fail_the_refresh():
+    calls, seen = [], []
+    cache = MarketCache(make_fetch(calls), ttl=5, max_stale=60)
+
+    @cache.subscribe
+    def broken(snapshot):
+        raise ValueError("bad market")
+
+    cache.subscribe(seen.append)
+    snapshot = asyncio.run(cache.get())
+    assert seen == [snapshot] and cache.snapshot is snapshot
+    assert cache.stats()["listener_errors"] == 1 and cache.stats()["refresh_errors"] == 0
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.kalshi_client import KalshiClient
+from api.market_crawler import CursorLoop, crawl_markets
+
+TOTAL = 25
+
+
+def paged_markets(request: httpx.Request) -> httpx.Response:
+    limit = int(request.url.params["limit"])
+    start = int(request.url.params.get("cursor") or 0)
+    end = min(start + limit, TOTAL)
+    markets = [{"ticker": f"M{i}", "status": request.url.params.get("status")} for i in range(start, end)]
+    return httpx.Response(200, json={"markets": markets, "cursor": str(end) if end < TOTAL else ""})
+
+
+def test_crawler_follows_cursor_page_by_page():
+    kalshi = KalshiClient("https://kalshi.test/trade-api/v2", transport=httpx.MockTransport(paged_markets))
+
+    async def run():
+        return [page async for page in crawl_markets(kalshi, limit=10)]
+
+    pages = asyncio.run(run())
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert pages[-1][-1]["ticker"] == "M24"
+
+
+def test_repeated_cursor_stops_the_crawl():
+    def stuck(request: httpx.Request) -> httpx.Response:
+        cursor = "b" if request.url.params.get("cursor") in (None, "c") else "c"   # b, c, b, ...
+        return httpx.Response(200, json={"markets": [{"ticker": cursor}], "cursor": cursor})
+
+    kalshi = KalshiClient("https://kalshi.test/trade-api/v2", transport=httpx.MockTransport(stuck))
+
+    async def run():
+        pages = []
+        with pytest.raises(CursorLoop):
+            async for page in crawl_markets(kalshi, limit=10):
+                pages.append(page)
+        return pages
+
+    assert len(asyncio.run(run())) == 2
+
+
+def test_stream_endpoint_emits_ndjson(kalshi_transport):
+    kalshi_transport(paged_markets)
+    with TestClient(index.app) as client:
+        res = client.get("/api/markets/stream", params={"limit": 7, "status": "open"})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [m["ticker"] for m in lines] == [f"M{i}" for i in range(TOTAL)]
+    assert all(m["status"] == "open" for m in lines)
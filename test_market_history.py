@@ -0,0 +1,124 @@
+import os
+from types import SimpleNamespace
+
+import httpx
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.market_history import RECORD_SIZE, MarketHistory
+
+DAY = 1_760_000_000_000  # 2025-10-09T08:53:20Z, in ms
+
+
+def market(ticker, bid, volume=0):
+    return {"ticker": ticker, "yes_bid": bid, "yes_ask": bid + 2, "last_price": bid, "volume": volume}
+
+
+def test_only_changes_are_recorded(tmp_path):
+    history = MarketHistory(str(tmp_path))
+    assert history.record([market("A", 40), market("B", 10)], DAY) == 2
+    assert history.record([market("A", 40), market("B", 11)], DAY + 1000) == 1
+    assert history.rows_skipped == 1
+    assert os.path.getsize(tmp_path / "2025-10-09.bin") == 3 * RECORD_SIZE
+
+    rows = history.query("B")
+    assert rows["yes_bid"].tolist() == [10, 11]
+    assert rows["ts_ms"].tolist() == [DAY, DAY + 1000]
+    assert len(history.query("missing")) == 0
+
+
+def test_time_range_limit_and_day_files(tmp_path):
+    history = MarketHistory(str(tmp_path))
+    evening = 1_760_040_000_000  # 2025-10-09T20:00:00Z
+    for i in range(10):
+        history.record([market("A", i), market("B", 50 - i)], evening + i * 3_600_000)  # hourly, crosses midnight
+    assert history.days() == ["2025-10-09", "2025-10-10"]
+
+    rows = history.query("A", start=(evening + 2 * 3_600_000) / 1000, end=(evening + 5 * 3_600_000) / 1000)
+    assert rows["yes_bid"].tolist() == [2, 3, 4]
+    assert history.query("A", limit=3)["yes_bid"].tolist() == [7, 8, 9]
+    assert history.query("B", start="2025-10-10T02:00:00Z")["yes_bid"].tolist() == [44, 43, 42, 41]
+
+
+def test_reopen_reads_existing_files_and_ignores_torn_tail(tmp_path):
+    writer = MarketHistory(str(tmp_path))
+    writer.record([market("A", 1), market("B", 2)], DAY)
+    with open(tmp_path / "2025-10-09.bin", "ab") as f:
+        f.write(b"\x01" * 7)   # crash mid-record
+    with open(tmp_path / "tickers.txt", "a") as f:
+        f.write("PARTIAL")     # crash mid-ticker
+
+    reader = MarketHistory(str(tmp_path))
+    assert reader.tickers == ["A", "B"]
+    assert reader.query("B")["yes_bid"].tolist() == [2]
+
+    reader.record([market("C", 3)], DAY + 1)  # the new writer repairs both files
+    assert os.path.getsize(tmp_path / "2025-10-09.bin") % RECORD_SIZE == 0
+    assert MarketHistory(str(tmp_path)).tickers == ["A", "B", "C"]
+
+
+def test_reader_sees_rows_appended_after_first_query(tmp_path):
+    history = MarketHistory(str(tmp_path))
+    history.record([market("A", 1)], DAY)
+    assert len(history.query("A")) == 1
+    history.record([market("A", 2)], DAY + 1)
+    assert history.query("A")["yes_bid"].tolist() == [1, 2]
+
+
+def test_history_endpoint(tmp_path, monkeypatch, kalshi_transport):
+    history = MarketHistory(str(tmp_path))
+    history.record([market("A", 40, 5)], DAY)
+    history.record([market("A", 41, 9)], DAY + 1000)
+    monkeypatch.setattr(index, "history", history)
+    kalshi_transport(lambda request: httpx.Response(404, json={}))
+    with TestClient(index.app) as client:
+        body = client.get("/api/markets/A/history?limit=1").json()
+    assert body == {"ticker": "A", "count": 1, "ts_ms": [DAY + 1000], "volume": [9],
+                    "yes_bid": [41], "yes_ask": [43], "last_price": [41]}
+
+
+def test_fractional_epochs_parse_and_bad_times_are_client_errors(tmp_path, monkeypatch, kalshi_transport):
+    history = MarketHistory(str(tmp_path))
+    history.record([market("A", 40, 5)], DAY)
+    history.record([market("A", 41, 9)], DAY + 1500)
+    assert history.query("A", start=str((DAY + 1000) / 1000))["yes_bid"].tolist() == [41]
+
+    monkeypatch.setattr(index, "history", history)
+    kalshi_transport(lambda request: httpx.Response(404, json={}))
+    with TestClient(index.app) as client:
+        bad = client.get("/api/markets/A/history?start=yesterday")
+        body = client.get(f"/api/markets/A/history?start={(DAY + 500) / 1000}").json()
+    assert bad.status_code == 400 and "yesterday" in bad.json()["error"]
+    assert body["ts_ms"] == [DAY + 1500]
+
+
+def test_subscriber_survives_any_write_error(tmp_path, caplog):
+    history = MarketHistory(str(tmp_path))
+    history.subscriber(SimpleNamespace(markets=[{"ticker": "A", "yes_bid": "not a number"}, None]))
+    assert history.errors == 1
+    assert "Market history write failed" in caplog.text
+
+
+def test_failed_record_leaves_the_ticker_index_in_sync(tmp_path):
+    history = MarketHistory(str(tmp_path))
+    history.subscriber(SimpleNamespace(markets=[market("A", 40), None]))   # fails after seeing A
+    assert history.errors == 1
+    assert history.record([market("A", 40), market("B", 10)], DAY) == 2
+
+    reader = MarketHistory(str(tmp_path))
+    assert reader.tickers == history.tickers == ["A", "B"]
+    assert reader.query("A")["yes_bid"].tolist() == [40]
+    assert reader.query("B")["yes_bid"].tolist() == [10]
+
+
+def test_scan_maps_days_with_its_own_readers(tmp_path):
+    history = MarketHistory(str(tmp_path))
+    for i in range(50):
+        history.record([market("A", i), market("B", i)], DAY + i * 1000)
+    assert len(history.query("A")) == 50
+    readers = dict(history._days)
+
+    scans = [len(history.scan()) for _ in range(3)]
+    history.record([market("A", 99)], DAY + 60_000)
+    assert scans == [100, 100, 100] and history._days == readers
+    assert len(history.query("A")) == 51 and len(history.scan()) == 101
@@ -0,0 +1,50 @@
+from api.market_store import MarketStore, parse_time
+
+MARKETS = [
+    {"ticker": "BTC-A", "event_ticker": "BTC", "category": "Crypto", "status": "open",
+     "yes_bid": 40, "yes_ask": 42, "volume": 500, "close_time": "2025-03-29T20:00:00Z"},
+    {"ticker": "BTC-B", "event_ticker": "BTC", "category": "Crypto", "status": "open",
+     "yes_bid": 10, "yes_ask": 15, "volume": 900, "close_time": "2025-04-10T20:00:00Z"},
+    {"ticker": "ETH-A", "event_ticker": "ETH", "category": "Crypto", "status": "closed",
+     "yes_bid": 70, "yes_ask": 71, "volume": 2000, "close_time": "2025-03-28T20:00:00Z"},
+    {"ticker": "CPI-A", "event_ticker": "CPI", "category": "Economics", "status": "open",
+     "yes_bid": 55, "yes_ask": 57, "volume": 5000},
+]
+
+
+def test_query_uses_indexes_and_sorts():
+    store = MarketStore(MARKETS, version=3)
+    total, markets = store.query(category="Crypto", status="open", sort="volume")
+    assert total == 2
+    assert [m["ticker"] for m in markets] == ["BTC-B", "BTC-A"]
+
+    week = (parse_time("2025-03-27T00:00:00Z"), parse_time("2025-04-03T00:00:00Z"))
+    total, markets = store.query(category="Crypto", close_after=week[0], close_before=week[1], limit=1)
+    assert total == 2
+    assert markets[0]["ticker"] == "ETH-A"
+
+    total, markets = store.query(sort="close_time", descending=False, offset=3)
+    assert total == 4 and markets[0]["ticker"] == "CPI-A" and markets[0]["close_time"] is None
+
+
+def test_row_round_trips_fields():
+    store = MarketStore(MARKETS)
+    market = store.get("BTC-A")
+    assert market["yes_ask"] == 42 and market["event_ticker"] == "BTC"
+    assert market["close_time"] == "2025-03-29T20:00:00Z"
+    assert store.get("missing") is None
+
+
+def test_top_uses_natural_direction_and_filters():
+    store = MarketStore(MARKETS)
+    rows = store.select(min_volume=600)
+    assert [store.tickers[i] for i in store.top(rows, 2, "volume")] == ["CPI-A", "ETH-A"]
+    # Tightest spread first
+    assert [store.tickers[i] for i in store.top(range(len(store)), 2, "spread")] == ["ETH-A", "BTC-A"]
+    assert store.get("BTC-B")["spread"] == 5 and store.get("BTC-B")["mid"] == 12.5
+
+
+def test_unparseable_upstream_close_time_sorts_like_a_missing_one():
+    store = MarketStore(MARKETS + [{"ticker": "ODD-A", "close_time": "soon"}])
+    total, markets = store.query(sort="close_time", descending=False, offset=3)
+    assert total == 5 and [m["close_time"] for m in markets] == [None, None]
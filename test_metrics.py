@@ -0,0 +1,60 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.metrics import HTTP_REQUESTS, REGISTRY, STAGE_LATENCY, UPSTREAM_RESPONSES, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("op_seconds", "Operation time", ("op",), buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 2.0):
+        latency.observe(value, "read")
+    text = registry.render()
+
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="read",le="0.01"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 3' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 4' in text
+    assert 'op_seconds_count{op="read"} 4' in text
+    assert 'op_seconds_sum{op="read"} 2.105' in text
+
+
+def test_requests_and_upstream_stages_are_counted(kalshi_transport):
+    def fake_kalshi(request):
+        if request.url.path.endswith("/orderbook"):
+            return httpx.Response(200, json={"orderbook": {"yes": [[40, 5]], "no": [[55, 3]]}})
+        return httpx.Response(429, json={})
+
+    kalshi_transport(fake_kalshi)
+    route = "/api/markets/{ticker}/orderbook"
+    before = HTTP_REQUESTS.values.get(("GET", route, "200"), 0)
+    with TestClient(index.app) as client:
+        client.get("/api/markets/BTC-1/orderbook")
+        client.get("/api/markets/ETH-1/orderbook")
+        client.get("/api/positions")
+        text = client.get("/api/metrics").text
+
+    # Labelled by route template, not by ticker
+    assert HTTP_REQUESTS.values[("GET", route, "200")] == before + 2
+    assert UPSTREAM_RESPONSES.values[("kalshi", "GET", "429")] >= 1
+    assert ("kalshi_request",) in STAGE_LATENCY.series
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/markets/{ticker}/orderbook"}' in text
+    assert 'upstream_responses_total{upstream="kalshi",method="GET",status="200"}' in text
+    assert 'cache_requests_total{app="api",cache="market",result="hit"}' in text
+
+
+def test_collected_stats_are_labelled_per_app():
+    import backup.index  # noqa: F401  (registers the backup app's collectors in the same process)
+
+    text = REGISTRY.render()
+    assert text.count("# TYPE risk_pending_orders gauge") == 1
+    assert 'risk_pending_orders{app="api"}' in text and 'risk_pending_orders{app="backup"}' in text
+
+    registry = Registry()
+    registry.collect("queue_depth", "Queued items", app="a")(lambda: [((), 1)])
+    with pytest.raises(ValueError):
+        registry.collect("queue_depth", "Queued items", app="a")(lambda: [((), 2)])
+    with pytest.raises(ValueError):
+        registry.collect("queue_depth", "Queued items", "counter", app="b")(lambda: [((), 2)])
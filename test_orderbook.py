@@ -0,0 +1,75 @@
+import asyncio
+
+from api.orderbook import OrderBook, OrderBookManager, QueueFeed
+
+
+def test_best_levels_follow_deltas():
+    book = OrderBook("BTC-A")
+    book.apply_snapshot(yes=[[40, 10], [42, 5]], no=[[55, 7]], seq=1)
+    assert (book.best_bid(), book.best_ask(), book.spread()) == (42, 45, 3)
+
+    assert book.apply_delta("yes", 42, -5, seq=2)
+    assert book.best_bid() == 40
+    assert book.apply_delta("yes", 44, 3, seq=3)
+    assert book.depth("yes", 3) == [[44, 3], [40, 10]]
+
+    # Gap in sequence numbers: update refused, book needs a new snapshot
+    assert not book.apply_delta("no", 56, 1, seq=5)
+    assert book.stale and book.seq == 3
+
+
+def test_manager_serves_local_book_driven_by_fake_feed():
+    calls = []
+
+    async def load_snapshot(ticker):
+        calls.append(ticker)
+        return {"orderbook": {"yes": [[30, 1]], "no": [[60, 2]]}}
+
+    async def run():
+        manager = OrderBookManager(load_snapshot, max_age=60)
+        books = await asyncio.gather(*(manager.get("ETH-A") for _ in range(5)))
+        assert all(b is books[0] for b in books) and calls == ["ETH-A"]
+
+        feed = QueueFeed()
+        feed.put({"type": "orderbook_snapshot", "seq": 10, "msg": {"market_ticker": "ETH-A", "yes": [[35, 4]], "no": []}})
+        feed.put({"type": "orderbook_delta", "seq": 11, "msg": {"market_ticker": "ETH-A", "side": "no", "price": 62, "delta": 9}})
+        feed.close()
+        await manager.run(feed)
+
+        book = await manager.get("ETH-A")
+        assert book.to_dict()["orderbook"] == {"yes": [[35, 4]], "no": [[62, 9]]}
+        assert book.seq == 11 and book.best_ask() == 38
+        assert calls == ["ETH-A"]
+
+    asyncio.run(run())
+
+
+def test_out_of_range_prices_are_refused_and_force_a_resnapshot():
+    book = OrderBook("BTC-A")
+    book.apply_snapshot(yes=[[40, 10], [0, 3], [100, 2], [-1, 4]], no=[[55, 7]], seq=1)
+    assert book.side_levels("yes") == [[40, 10]] and not book.stale
+
+    assert not book.apply_delta("yes", -1, 5, seq=2)      # would have wrapped to slot 99
+    assert book.stale and book.levels["yes"][99] == 0
+    book.apply_snapshot(yes=[[40, 10]], seq=2)
+    assert not book.apply_delta("yes", 100, 5, seq=3)     # would have raised IndexError
+    assert book.stale and book.seq == 2
+
+    snapshots = []
+
+    async def load_snapshot(ticker):
+        snapshots.append(ticker)
+        return {"orderbook": {"yes": [[41, 1]], "no": []}}
+
+    async def run():
+        manager = OrderBookManager(load_snapshot, max_age=60)
+        feed = QueueFeed()
+        feed.put({"type": "orderbook_snapshot", "seq": 1, "msg": {"market_ticker": "ETH-A", "yes": [[35, 4]], "no": []}})
+        feed.put({"type": "orderbook_delta", "seq": 2, "msg": {"market_ticker": "ETH-A", "side": "yes", "price": 150, "delta": 1}})
+        feed.put({"type": "orderbook_delta", "seq": 3, "msg": {"market_ticker": "ETH-A", "side": "yes", "price": -3, "delta": 1}})
+        feed.close()
+        await manager.run(feed)                            # the feed keeps running past bad deltas
+        assert "ETH-A" not in manager.live
+        assert (await manager.get("ETH-A")).side_levels("yes") == [[41, 1]] and snapshots == ["ETH-A"]
+
+    asyncio.run(run())
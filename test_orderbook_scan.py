@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.orderbook import OrderBook, OrderBookManager
+from api.orderbook_scan import book_stats, scan_orderbooks
+from api.rate_limit import TokenBucket
+
+
+def test_book_stats_vectorised():
+    a = OrderBook("A")
+    a.apply_snapshot(yes=[[40, 10], [41, 5], [42, 1], [30, 100]], no=[[55, 4]])
+    b = OrderBook("B")
+    b.apply_snapshot(yes=[], no=[[20, 3]])
+    stats = {s["ticker"]: s for s in book_stats([a, b])}
+
+    assert stats["A"]["spread"] == 3
+    assert stats["A"]["yes_depth"] == 16 and stats["A"]["no_depth"] == 4
+    assert stats["A"]["imbalance"] == 0.6
+    assert stats["B"]["spread"] is None and stats["B"]["best_yes_ask"] == 80
+    assert stats["B"]["imbalance"] == -1.0
+
+
+def test_scan_respects_concurrency_and_reports_errors():
+    in_flight, peak = [0], [0]
+
+    async def load_snapshot(ticker):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.005)
+        in_flight[0] -= 1
+        if ticker == "BAD":
+            raise RuntimeError("404")
+        return {"orderbook": {"yes": [[50, 1]], "no": [[45, 2]]}}
+
+    async def run():
+        manager = OrderBookManager(load_snapshot, max_age=60)
+        tickers = [f"T{i}" for i in range(20)] + ["BAD"]
+        limiter = TokenBucket(rate=10_000, capacity=100)
+        return [r async for batch in scan_orderbooks(manager, tickers, 4, limiter) for r in batch]
+
+    results = asyncio.run(run())
+    assert len(results) == 21 and peak[0] <= 4
+    assert [r for r in results if "error" in r] == [{"ticker": "BAD", "error": "404"}]
+    assert all(r["spread"] == 5 for r in results if "error" not in r)
+
+
+def test_scan_endpoint_bounds_requests_before_streaming(monkeypatch, kalshi_transport):
+    monkeypatch.setattr(index, "MAX_SCAN_TICKERS", 3)
+    kalshi_transport(lambda request: httpx.Response(200, json={"orderbook": {"yes": [[50, 1]], "no": [[45, 2]]}}))
+    with TestClient(index.app) as client:
+        ok = client.get("/api/orderbooks/scan", params={"tickers": "S-1,S-2,S-1", "concurrency": 10**6})
+        zero = client.get("/api/orderbooks/scan", params={"tickers": "S-1", "concurrency": 0})
+        too_many = client.get("/api/orderbooks/scan", params={"tickers": "S-1,S-2,S-3,S-4"})
+        huge_limit = client.get("/api/orderbooks/scan", params={"limit": 10**6})
+
+    assert sorted(json.loads(line)["ticker"] for line in ok.text.splitlines()) == ["S-1", "S-2"]
+    assert zero.status_code == too_many.status_code == huge_limit.status_code == 400
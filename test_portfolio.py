@@ -0,0 +1,95 @@
+import httpx
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.market_store import MarketStore
+from api.portfolio import Portfolio, cents, dollars, store_prices
+
+
+def recompute(portfolio):
+    """Totals from scratch, to check the incremental ones against."""
+    exposure = sum(h.exposure for h in portfolio.holdings.values())
+    value = sum(h.value for h in portfolio.holdings.values())
+    return exposure, value
+
+
+def test_cents_and_dollars():
+    assert cents("$1,234.50") == 123450
+    assert cents("$624") == 62400
+    assert cents(None) == 0 and cents("n/a") == 0
+    assert dollars(123450) == "$1,234.50"
+    assert dollars(-5) == "-$0.05"
+
+
+def test_fills_average_cost_and_realized():
+    p = Portfolio()
+    p.apply_fill("A", "yes", "buy", 10, 40)
+    p.apply_fill("A", "yes", "buy", 10, 50)
+    h = p.holdings["A"]
+    assert (h.position, h.exposure) == (20, 900)
+
+    p.apply_fill("A", "yes", "sell", 5, 60)       # 5 x (60 - 45)
+    assert h.realized == 75 and h.position == 15 and h.exposure == 675
+
+    p.apply_fill("A", "no", "buy", 20, 30, fee=7)  # buying NO at 30 sells YES at 70: closes 15, opens 5 NO
+    assert h.realized == 75 + 15 * (70 - 45)
+    assert h.position == -5 and h.side == "no"
+    assert h.exposure == 5 * 30
+    assert p.fees == 7
+    assert (p.exposure, p.value) == recompute(p)
+
+
+def test_marks_update_totals_incrementally():
+    p = Portfolio()
+    p.apply_fill("Y", "yes", "buy", 10, 40)
+    p.apply_fill("N", "no", "buy", 4, 25)         # NO at 25: marked at 100 - YES ask
+    assert p.totals()["unrealized_pnl_cents"] == 0  # unpriced positions are carried at cost
+
+    assert p.mark("Y", 45, 47)
+    assert p.mark("N", 70, 72)                    # NO bid = 28
+    assert not p.mark("Y", 45, 48)                # same held-side price
+    assert not p.mark("Y", 0, 0)                  # no quote keeps the last mark
+    totals = p.totals()
+    assert totals["unrealized_pnl_cents"] == 10 * 5 + 4 * 3
+    assert totals["exposure_cents"] == 400 + 100
+    assert (p.exposure, p.value) == recompute(p)
+
+
+def test_sync_from_upstream_and_store_prices():
+    store = MarketStore([{"ticker": "A", "yes_bid": 55, "yes_ask": 57}, {"ticker": "B", "yes_bid": 20, "yes_ask": 24}])
+    p = Portfolio()
+    p.sync([
+        {"ticker": "A", "position": 10, "market_exposure": 500, "realized_pnl": 30, "fees_paid": 4},
+        {"ticker": "B", "position": -5, "market_exposure": 350},
+    ], store_prices(store))
+    rows = {r["ticker"]: r for r in p.positions()}
+    assert rows["A"]["unrealized_pnl_cents"] == 10 * 55 - 500
+    assert rows["B"]["average_open_price_cents"] == 70
+    assert rows["B"]["current_price_cents"] == 76
+    assert rows["B"]["unrealized_pnl_cents"] == 5 * 76 - 350
+    assert p.allocation() == {"A": 5882, "B": 4117}  # of 850 cents exposure, rounded down
+
+    p.sync([{"ticker": "A", "position": 10, "market_exposure": 500, "realized_pnl": 30, "fees_paid": 4}])
+    assert list(p.holdings) == ["A"]
+    assert p.totals()["net_pnl_cents"] == 50 + 30 - 4
+    assert (p.exposure, p.value) == recompute(p)
+
+
+def test_positions_endpoint_marks_from_the_market_cache(kalshi_transport):
+    def fake_kalshi(request):
+        if request.url.path.endswith("/markets"):
+            return httpx.Response(200, json={"markets": [{"ticker": "A", "yes_bid": 60, "yes_ask": 62}], "cursor": ""})
+        if request.url.path.endswith("/portfolio/positions"):
+            return httpx.Response(200, json={"market_positions": [{"ticker": "A", "position": 2, "market_exposure": 100}]})
+        return httpx.Response(404, json={})
+
+    kalshi_transport(fake_kalshi)
+    index.market_cache.snapshot = None
+    try:
+        with TestClient(index.app) as client:
+            client.get("/api/feed")
+            body = client.get("/api/positions").json()
+    finally:
+        index.market_cache.snapshot = None
+    assert body["positions"][0]["current_price_cents"] == 60
+    assert body["totals"]["unrealized_pnl_cents"] == 20
@@ -0,0 +1,58 @@
+import asyncio
+
+from api.rate_limit import READ, WRITE, SchedulerOverloaded, TokenBucket, UpstreamScheduler
+
+
+def test_token_bucket_refills_at_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0])
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.wait_time() == 0.1
+    now[0] = 0.1
+    assert bucket.try_acquire()
+
+
+def test_writes_are_admitted_before_queued_reads():
+    scheduler = UpstreamScheduler(read_rate=1000, write_rate=1000, max_in_flight=1)
+    order = []
+
+    async def call(kind, name):
+        async with scheduler.slot(kind):
+            order.append(name)
+            await asyncio.sleep(0.001)
+
+    async def run():
+        first = asyncio.ensure_future(call(READ, "read-0"))
+        await asyncio.sleep(0)
+        waiting = [asyncio.ensure_future(call(READ, f"read-{i}")) for i in range(1, 4)]
+        waiting.append(asyncio.ensure_future(call(WRITE, "order")))
+        await asyncio.gather(first, *waiting)
+
+    asyncio.run(run())
+    assert order[:2] == ["read-0", "order"]
+    assert scheduler.stats()["classes"][WRITE]["admitted"] == 1
+
+
+def test_429_pauses_reads_but_not_writes():
+    scheduler = UpstreamScheduler(read_rate=1000, write_rate=1000, max_queue={READ: 2})
+
+    async def run():
+        scheduler.record_response(READ, 429, "30")
+        reads = [asyncio.ensure_future(scheduler.acquire(READ)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        # Writes go straight through while reads wait out the Retry-After
+        await asyncio.wait_for(scheduler.acquire(WRITE), 0.1)
+        assert not any(r.done() for r in reads)
+        try:
+            await scheduler.acquire(READ)
+            raise AssertionError("read queue should be full")
+        except SchedulerOverloaded:
+            pass
+        for r in reads:
+            r.cancel()
+
+    asyncio.run(run())
+    stats = scheduler.stats()["classes"]
+    assert stats[READ]["throttled"] == 1 and stats[READ]["rejected"] == 1
+    assert stats[WRITE]["admitted"] == 1
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+from api.reco_cache import RecommendationCache, market_fingerprint
+
+MARKETS = [{"ticker": "BTC-A", "yes_bid": 40, "yes_ask": 42}, {"ticker": "ETH-A", "yes_bid": 10, "yes_ask": 12}]
+
+
+def test_normalised_strategy_hits_until_snapshot_changes():
+    cache = RecommendationCache(max_entries=10, ttl=60)
+    cache.set_fingerprint(market_fingerprint(MARKETS))
+    cache.put("Buy BTC on volume spikes.", "| BTC | Buy YES |", cost_ms=4000)
+
+    assert cache.get("  buy btc   on volume SPIKES ") == "| BTC | Buy YES |"
+    # A one-cent tick stays in the same price bucket
+    cache.set_fingerprint(market_fingerprint([dict(MARKETS[0], yes_bid=41), MARKETS[1]]))
+    assert cache.get("Buy BTC on volume spikes") is not None
+
+    cache.set_fingerprint(market_fingerprint([dict(MARKETS[0], yes_bid=60), MARKETS[1]]))
+    assert cache.get("Buy BTC on volume spikes") is None
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["invalidations"] == 1 and stats["latency_saved_ms"] == 8000
+
+
+def test_lru_ttl_and_disk_backend(tmp_path):
+    now = [0.0]
+    path = str(tmp_path / "reco.sqlite")
+    cache = RecommendationCache(max_entries=2, ttl=60, path=path, clock=lambda: now[0])
+    cache.set_fingerprint("snap")
+    for name in ("a", "b", "c"):
+        cache.put(f"strategy {name}", name)
+    assert cache.get("strategy a") is None and cache.evictions == 1
+
+    restarted = RecommendationCache(max_entries=2, ttl=60, path=path, clock=lambda: now[0])
+    restarted.set_fingerprint("snap")
+    assert restarted.get("strategy c") == "c"
+    now[0] = 61
+    assert restarted.get("strategy b") is None
+
+
+def test_aput_writes_to_disk_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "reco.sqlite")
+    cache = RecommendationCache(max_entries=1, ttl=60, path=path)
+    asyncio.run(cache.aput("strategy a", "a"))
+    asyncio.run(cache.aput("strategy b", "b"))
+    assert cache.get("strategy b") == "b" and cache.evictions == 1
+
+    restarted = RecommendationCache(max_entries=2, ttl=60, path=path)
+    assert restarted.get("strategy b") == "b" and restarted.get("strategy a") is None
+
+
+def test_aget_reads_and_expires_on_disk_off_the_event_loop(tmp_path):
+    now = [0.0]
+    path = str(tmp_path / "reco.sqlite")
+    RecommendationCache(ttl=60, path=path, clock=lambda: now[0]).put("strategy a", "a")
+    cache = RecommendationCache(ttl=60, path=path, clock=lambda: now[0])
+    threads = []
+    for name in ("_read_disk", "_delete_disk"):
+        method = getattr(cache, name)
+        setattr(cache, name, lambda key, method=method: threads.append(threading.get_ident()) or method(key))
+
+    async def run():
+        loop_thread = threading.get_ident()
+        assert await cache.aget("strategy a") == "a"
+        now[0] = 61
+        assert await cache.aget("strategy a") is None
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) == 2 and loop_thread not in threads   # the lookup and the expiry delete
+    assert RecommendationCache(ttl=60, path=path, clock=lambda: 0.0).get("strategy a") is None
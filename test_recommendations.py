@@ -0,0 +1,85 @@
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import backup.index as backup
+
+PIECES = ["| Market | Action |", "\n| BTC-24MAR | Buy YES |"]
+
+
+class FakeCompletions:
+    async def create(self, **kwargs):
+        assert kwargs["stream"] is True
+
+        async def chunks():
+            for piece in PIECES:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+        return chunks()
+
+
+def parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_sends_agent_result_before_llm_tokens(monkeypatch):
+    monkeypatch.setattr(backup, "client", SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions())))
+    monkeypatch.setattr(backup, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+
+    with TestClient(backup.app) as client:
+        res = client.post(
+            "/api/recommendations",
+            json={"strategy": "Trade hourly BTC on volume spikes"},
+            headers={"Accept": "text/event-stream"},
+        )
+
+    assert res.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(res.text)
+    assert events[0][0] == "agent"
+    assert events[0][1]["source"] == "custom_agent"
+    assert [e[1]["delta"] for e in events if e[0] == "token"] == PIECES
+    assert events[-1][0] == "done" and events[-1][1]["openai"] is True
+
+
+def test_openai_mode_returns_full_markdown(monkeypatch):
+    monkeypatch.setattr(backup, "client", SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions())))
+    monkeypatch.setattr(backup, "OPENAI_API_KEY", "sk-test")
+
+    with TestClient(backup.app) as client:
+        body = client.post("/api/recommendations?mode=openai", json={"strategy": "Trade hourly BTC"}).json()
+    assert body["source"] == "openai"
+    assert body["recommendations"]["content"] == "".join(PIECES)
+
+
+def test_agent_result_does_not_wait_on_a_market_crawl(monkeypatch):
+    async def never_ready():
+        raise AssertionError("recommendations must not wait for a market cache refresh")
+
+    monkeypatch.setattr(backup, "KALSHI_API_KEY", "key")   # credentials: the feed would crawl
+    monkeypatch.setattr(backup.market_cache, "get", never_ready)
+    monkeypatch.setattr(backup, "OPENAI_API_KEY", None)
+    with TestClient(backup.app) as client:
+        res = client.post("/api/recommendations", json={"strategy": "Trade hourly BTC on volume spikes"},
+                          headers={"Accept": "text/event-stream"})
+    assert parse_sse(res.text)[0][0] == "agent"
+
+
+def test_recommendation_logs_are_structured(monkeypatch, caplog):
+    monkeypatch.setattr(backup, "client", SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions())))
+    monkeypatch.setattr(backup, "OPENAI_API_KEY", "sk-test")
+    caplog.set_level("INFO", logger="kalshi_assistant")
+
+    with TestClient(backup.app) as client:
+        client.post("/api/recommendations?mode=openai", json={"strategy": "Fade late ETH rallies"})
+
+    records = {r.getMessage(): r for r in caplog.records if r.name == "kalshi_assistant"}
+    assert records["Recommendations requested"].strategy == "Fade late ETH rallies"
+    assert records["Recommendations requested"].mode == "openai"
+    assert records["OpenAI generation finished"].source == "openai"
+    assert not any(ord(ch) > 127 for message in records for ch in message)
@@ -0,0 +1,151 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import api.index as index
+from api.metrics import RISK_CHECKS
+from api.kalshi_client import KalshiClient
+from api.risk import RiskEngine, RiskLimits, RiskRejected, RiskSync
+
+
+class Order:
+    def __init__(self, ticker="A-1", side="yes", count=10, price=40, action="buy", order_type="limit"):
+        self.ticker, self.side, self.count, self.price = ticker, side, count, price
+        self.action, self.order_type = action, order_type
+
+
+MARKETS = {"A-1": ("EV-A", 38, 42), "A-2": ("EV-A", 50, 52)}
+
+
+def engine(clock=None, **limits):
+    return RiskEngine(RiskLimits(**limits), lookup=lambda t: MARKETS.get(t, ("", 0, 0)), clock=clock or (lambda: 0.0))
+
+
+def reason(risk, order, order_id="o"):
+    with pytest.raises(RiskRejected) as e:
+        risk.check(order, order_id)
+    return e.value.reason
+
+
+def test_per_order_checks():
+    risk = engine(max_order_contracts=100, max_order_notional=2000, price_collar=10)
+    assert reason(risk, Order(price=0)) == "invalid_order"
+    assert reason(risk, Order(count=101)) == "max_order_contracts"
+    assert reason(risk, Order(count=60, price=40)) == "max_order_notional"   # 2400c
+    assert reason(risk, Order(price=55)) == "price_collar"                   # mid 40
+    assert risk.check(Order(side="no", price=45), "no-leg") == 10 * 55       # NO costs 100 - YES price
+    assert risk.check(Order(ticker="NEW", price=90), "unquoted") == 900     # no quote: no collar
+    assert risk.check(Order(action="sell", count=100), "sell") == 0
+    assert risk.rejected == {"invalid_order": 1, "max_order_contracts": 1, "max_order_notional": 1, "price_collar": 1}
+
+
+def test_exposure_counters_per_market_event_and_account():
+    risk = engine(max_market_exposure=1000, max_event_exposure=1500, max_account_exposure=2000)
+    risk.check(Order(count=20, price=40), "o1")                 # A-1: 800
+    assert reason(risk, Order(count=6, price=40)) == "market_exposure"
+    risk.check(Order(ticker="A-2", count=10, price=51), "o2")   # EV-A: 1310
+    assert reason(risk, Order(ticker="A-2", count=5, price=51)) == "event_exposure"
+    risk.check(Order(ticker="B", count=10, price=60), "o3")     # account: 1910
+    assert reason(risk, Order(ticker="C", count=3, price=40)) == "account_exposure"
+
+    risk.release("o3")
+    risk.release("o3")  # idempotent
+    assert risk.account_exposure == 1310
+    risk.check(Order(ticker="C", count=3, price=40), "o4")
+
+
+def test_reservations_hold_until_reconciled_with_upstream():
+    now = [0.0]
+    risk = engine(clock=lambda: now[0], max_market_exposure=1000)
+    risk.check(Order(count=20, price=40), "o1")
+    risk.submitted("o1")
+    now[0] = 3600                                    # no positions polled for an hour: still reserved
+    assert reason(risk, Order(count=6, price=40)) == "market_exposure"
+
+    risk.check(Order(ticker="B", count=5, price=40), "in-flight")   # not yet acknowledged upstream
+    now[0] = 3601
+    risk.submitted("o2-missing")                     # unknown ids are ignored
+    # o1 rests with 5 of 20 unfilled and 15 filled (600c): reservation shrinks to the unfilled 200c
+    risk.reconcile({"o1": 200}, [("A-1", 600)], as_of=3601)
+    assert risk.ticker_exposure["A-1"] == 800 and "in-flight" in risk.pending
+    # o1 done: its fills are all in positions, the reservation goes
+    risk.reconcile({}, [("A-1", 800)], as_of=3602)
+    assert risk.ticker_exposure["A-1"] == 800 and "o1" not in risk.pending
+    assert risk.ticker_exposure["B"] == 200          # in flight: untouched
+
+    risk.sync_filled([])
+    assert risk.account_exposure == 200
+
+
+def test_sync_service_settles_reservations_from_resting_orders_and_positions():
+    now = [0.0]
+    risk = engine(clock=lambda: now[0], max_market_exposure=1000)
+    for order_id in ("filled", "resting", "gone"):
+        risk.check(Order(ticker="A-2", count=4, price=50), order_id)
+        risk.submitted(order_id)
+    pages = {
+        "/trade-api/v2/portfolio/orders": [
+            {"orders": [{"client_order_id": "resting", "action": "buy", "side": "yes", "yes_price": 50,
+                         "remaining_count": 1}], "cursor": "next"},
+            {"orders": [{"client_order_id": "sell", "action": "sell", "side": "yes", "yes_price": 50,
+                         "remaining_count": 9}], "cursor": ""},
+        ],
+        "/trade-api/v2/portfolio/positions": [{"market_positions": [{"ticker": "A-2", "position": 7,
+                                                                     "market_exposure": 350}]}],
+    }
+    seen = []
+
+    def fake_kalshi(request):
+        seen.append((request.url.path, request.url.params.get("cursor")))
+        return httpx.Response(200, json=pages[request.url.path].pop(0))
+
+    client = KalshiClient("https://kalshi.invalid/trade-api/v2", http2=False, transport=httpx.MockTransport(fake_kalshi))
+    sync = RiskSync(lambda: risk, client, interval=0)
+    now[0] = 1
+    asyncio.run(sync.sync())
+    assert seen[1] == ("/trade-api/v2/portfolio/orders", "next")
+    assert risk.pending == {"resting": ("A-2", "EV-A", 50, 0.0)}
+    assert risk.ticker_exposure["A-2"] == 400 and sync.syncs == 1
+
+
+def test_execute_rejections_carry_a_reason_and_are_counted(monkeypatch, kalshi_transport):
+    monkeypatch.setattr(index, "risk", engine(max_market_exposure=1000))
+    sent = []
+
+    def fake_kalshi(request):
+        sent.append(request)
+        return httpx.Response(201, json={"order": {"order_id": "x"}})
+
+    kalshi_transport(fake_kalshi)
+    before = RISK_CHECKS.values.get(("rejected", "market_exposure"), 0)
+    with TestClient(index.app) as client:
+        ok = client.post("/api/execute", json={"ticker": "A-1", "side": "yes", "count": 20, "price": 40}).json()
+        too_big = client.post("/api/execute", json={"ticker": "A-1", "side": "yes", "count": 10, "price": 40}).json()
+        batch = client.post("/api/execute/batch", json={"orders": [
+            {"ticker": "B-1", "side": "yes", "count": 20, "price": 40, "client_order_id": "b1"},
+            {"ticker": "B-1", "side": "yes", "count": 10, "price": 40, "client_order_id": "b2"},
+        ]}).json()
+        metrics = client.get("/api/metrics").text
+
+    assert ok["status"] == "submitted"
+    assert too_big["status"] == "rejected" and too_big["reason"] == "market_exposure"
+    assert batch["results"]["b1"]["status"] == "submitted"
+    assert batch["results"]["b2"]["reason"] == "market_exposure"  # earlier legs count
+    assert len(sent) == 2
+    assert RISK_CHECKS.values[("rejected", "market_exposure")] == before + 2
+    assert 'risk_checks_total{result="rejected",reason="market_exposure"}' in metrics
+
+
+def test_failed_orders_release_their_reservation(monkeypatch, kalshi_transport):
+    risk = engine()
+    monkeypatch.setattr(index, "risk", risk)
+    kalshi_transport(lambda request: httpx.Response(400, json={"error": "closed"}))
+    monkeypatch.setattr(index, "risk_sync", None)   # no credentials: nothing to sync against
+    with TestClient(index.app) as client:
+        body = client.post("/api/execute", json={"ticker": "A-1", "side": "yes", "count": 5, "price": 40}).json()
+        stats = client.get("/api/risk").json()
+    assert body["status"] == "error"
+    assert risk.account_exposure == 0 and not risk.pending
+    assert stats["sync"] == {"enabled": False}
@@ -0,0 +1,56 @@
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.structured_log import DebugSampler, JsonFormatter, RequestIdFilter, RequestIdMiddleware, request_id_var
+
+
+def make_record(level=logging.INFO, msg="Order placed", **extra):
+    record = logging.LogRecord("kalshi_assistant", level, __file__, 1, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_carry_request_id_and_extra_fields():
+    token = request_id_var.set("req-1")
+    try:
+        record = make_record(ticker="BTC-24MAR", count=3)
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    line = json.loads(JsonFormatter().format(record))
+    assert line["msg"] == "Order placed"
+    assert line["level"] == "INFO"
+    assert line["request_id"] == "req-1"
+    assert line["ticker"] == "BTC-24MAR" and line["count"] == 3
+
+
+def test_debug_sampling_is_per_request_and_leaves_other_levels_alone():
+    sampler = DebugSampler(0.5)
+    kept = [sampler.filter(make_record(logging.DEBUG, request_id=f"req-{i}")) for i in range(1000)]
+    assert 350 < sum(kept) < 650
+    # Same request, same decision for every one of its debug lines
+    assert len({sampler.filter(make_record(logging.DEBUG, request_id="req-7")) for _ in range(20)}) == 1
+    assert all(sampler.filter(make_record(logging.INFO, request_id=f"req-{i}")) for i in range(100))
+    assert not any(DebugSampler(0).filter(make_record(logging.DEBUG, request_id=f"req-{i}")) for i in range(100))
+
+
+def test_middleware_sets_and_echoes_request_id():
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/id")
+    async def current_id():
+        return {"request_id": request_id_var.get()}
+
+    with TestClient(app) as client:
+        res = client.get("/id", headers={"X-Request-ID": "upstream-42"})
+        assert res.json()["request_id"] == "upstream-42"
+        assert res.headers["x-request-id"] == "upstream-42"
+
+        generated = client.get("/id")
+        assert generated.json()["request_id"] == generated.headers["x-request-id"]
+    assert request_id_var.get() is None
@@ -0,0 +1,39 @@
+import asyncio
+import subprocess
+import sys
+
+from api.warmup import WarmUp, preload
+
+
+def test_runs_sync_and_async_hooks_and_survives_failures():
+    calls = []
+
+    async def open_pool():
+        calls.append("pool")
+
+    def broken():
+        raise RuntimeError("no network")
+
+    warmup = WarmUp(open_pool, broken, preload("json"), enabled=True)
+    warmup.hook(lambda: calls.append("late"))
+    asyncio.run(warmup.start())
+
+    assert calls == ["pool", "late"]
+    assert "import json" in warmup.stats()["timings_ms"]
+    assert warmup.runs == 1
+
+
+def test_start_is_a_no_op_unless_enabled():
+    calls = []
+    warmup = WarmUp(lambda: calls.append(1), enabled=False)
+    asyncio.run(warmup.start())
+    assert calls == [] and warmup.runs == 0
+
+
+def test_importing_apps_defers_heavy_modules():
+    code = (
+        "import sys, api.index, backup.index; "
+        "print(sorted(m for m in ('openai', 'numpy', 'cryptography', 'dotenv') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api.write_behind import WriteBehindQueue
+
+
+class StandInSink(BaseHTTPRequestHandler):
+    """Minimal PostgREST stand-in: records bulk inserts, or fails while `down`."""
+    inserts = []
+    down = False
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if StandInSink.down:
+            self.send_response(503)
+        else:
+            StandInSink.inserts.append((self.path, body))
+            self.send_response(201)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInSink)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/rest/v1"
+
+
+def test_rows_are_flushed_as_bulk_inserts_per_table(tmp_path):
+    StandInSink.inserts, StandInSink.down = [], False
+    server, url = serve()
+
+    async def run():
+        queue = WriteBehindQueue(url, max_batch=3, flush_interval=30, spill_path=str(tmp_path / "spill.jsonl"))
+        await queue.start()
+        for i in range(3):
+            queue.enqueue("agent_recommendations", {"request_id": i})
+        queue.enqueue("openai_recommendations", {"request_id": 0})
+        await asyncio.sleep(0.2)   # size trigger flushes without waiting for the interval
+        await queue.aclose()
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    server.shutdown()
+    assert ("/rest/v1/agent_recommendations", [{"request_id": 0}, {"request_id": 1}, {"request_id": 2}]) in StandInSink.inserts
+    assert ("/rest/v1/openai_recommendations", [{"request_id": 0}]) in StandInSink.inserts
+    assert stats["written"] == 4 and stats["batches"] == 2 and stats["pending"] == 0
+
+
+def test_rows_spill_while_sink_is_down_and_replay_later(tmp_path):
+    StandInSink.inserts, StandInSink.down = [], True
+    server, url = serve()
+    spill = tmp_path / "spill.jsonl"
+
+    async def run():
+        queue = WriteBehindQueue(url, max_batch=10, flush_interval=30, max_retries=1, backoff=0.01, spill_path=str(spill))
+        queue.enqueue("agent_recommendations", {"request_id": "a"})
+        await queue.flush()
+        assert spill.exists() and queue.spilled == 1 and queue.retries == 1
+
+        StandInSink.down = False
+        queue.enqueue("agent_recommendations", {"request_id": "b"})
+        await queue.flush()   # success replays the spill file into the buffer
+        await queue.flush()
+        await queue.aclose()
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    server.shutdown()
+    written = [row["request_id"] for _, rows in StandInSink.inserts for row in rows]
+    assert sorted(written) == ["a", "b"]
+    assert stats["replayed"] == 1 and not spill.exists()
+
+
+def test_closing_during_backoff_spills_instead_of_retrying(tmp_path):
+    StandInSink.inserts, StandInSink.down = [], True
+    server, url = serve()
+    spill = tmp_path / "spill.jsonl"
+
+    async def run():
+        queue = WriteBehindQueue(url, max_batch=2, flush_interval=30, max_retries=3, backoff=30, spill_path=str(spill))
+        await queue.start()
+        queue.enqueue("agent_recommendations", {"request_id": "a"})
+        queue.enqueue("agent_recommendations", {"request_id": "b"})
+        await asyncio.sleep(0.2)   # the size-triggered flush failed once and is now in its 30s backoff
+        assert queue.retries == 1 and queue.pending() == 0
+        await asyncio.wait_for(queue.aclose(), 5)
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    server.shutdown()
+    spilled = [json.loads(line)["record"]["request_id"] for line in spill.read_text().splitlines()]
+    assert spilled == ["a", "b"] and stats["spilled"] == 2
+
+
+def test_unwritable_spill_drops_rows_and_keeps_the_queue_running(tmp_path):
+    StandInSink.inserts, StandInSink.down = [], True
+    server, url = serve()
+
+    async def run():
+        queue = WriteBehindQueue(url, max_batch=1, flush_interval=30, max_retries=0,
+                                 spill_path=str(tmp_path / "missing" / "spill.jsonl"))
+        await queue.start()
+        queue.enqueue("agent_recommendations", {"request_id": "lost"})
+        await asyncio.sleep(0.2)
+        assert not queue._task.done()
+        StandInSink.down = False
+        queue.enqueue("agent_recommendations", {"request_id": "kept"})
+        await asyncio.sleep(0.2)
+        await queue.aclose()
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    server.shutdown()
+    assert stats["dropped"] == 1 and stats["spilled"] == 0 and stats["written"] == 1
+    assert StandInSink.inserts == [("/rest/v1/agent_recommendations", [{"request_id": "kept"}])]
+
+
+def test_spill_defaults_to_the_temp_dir(monkeypatch):
+    monkeypatch.delenv("WRITE_BEHIND_SPILL_PATH", raising=False)
+    assert WriteBehindQueue("http://sink.invalid").spill_path.startswith(tempfile.gettempdir())